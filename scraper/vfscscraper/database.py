@@ -6,6 +6,9 @@ from datetime import datetime, UTC
 
 from scrapy.utils.serialize import ScrapyJSONEncoder
 
+from vfscscraper import queries
+from vfscscraper.migrations import MIGRATIONS, migrate
+
 
 class DataManager:
     def __init__(self, **kwargs):
@@ -16,68 +19,11 @@ class DataManager:
         self.json_encoder = ScrapyJSONEncoder(**kwargs)
 
     def setup_databases(self):
-        # Set up current state database
-        with self.current_db:
-            self.current_db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS companies (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    company_name TEXT,
-                    company_number TEXT,
-                    company_type TEXT,
-                    entity_type TEXT,
-                    entity_status TEXT,
-                    registration_date TEXT,
-                    annual_filing_month TEXT,
-                    email_address TEXT,
-                    office_address TEXT,
-                    postal_address TEXT,
-                    total_shares INTEGER,
-                    created_at TIMESTAMP,
-                    updated_at TIMESTAMP,
-                    lastseen TIMESTAMP
-                )
-            """
-            )
-
-            self.current_db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS individuals (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT UNIQUE
-                )
-            """
-            )
-
-            self.current_db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS company_directors (
-                    company_id INTEGER,
-                    individual_id INTEGER,
-                    entity_id INTEGER,
-                    appointed_date TEXT,
-                    ceased_at TEXT,
-                    FOREIGN KEY (company_id) REFERENCES companies(id),
-                    FOREIGN KEY (entity_id) REFERENCES compaies(id),
-                    FOREIGN KEY (individual_id) REFERENCES individuals(id)
-                )
-            """
-            )
-
-            self.current_db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS company_shareholders (
-                    company_id INTEGER,
-                    individual_id INTEGER,
-                    entity_id,
-                    appointed_date TEXT,
-                    ceased_at TEXT,
-                    number_of_shares INTEGER,
-                    FOREIGN KEY (company_id) REFERENCES companies(id),
-                    FOREIGN KEY (entity_id) REFERENCES companies(id),
-                    FOREIGN KEY (individual_id) REFERENCES individuals(id)
-                )
-            """
+        # Bring the current state database up to the latest schema
+        applied = migrate(self.current_db)
+        if applied:
+            self.logger.info(
+                f"Migrated current state database to version {len(MIGRATIONS)}"
             )
 
         # Set up change history database
@@ -183,7 +129,7 @@ class DataManager:
         However, shareholders and directors are only referenced by name so this is
         the best option to associate a known company in these cases.
         """
-        query = "SELECT id FROM companies WHERE company_name = ?"
+        query = queries.COMPANY_ID_BY_NAME
         with self.current_db:
             cursor = self.current_db.cursor()
             cursor.execute(query, (company_name,))
@@ -192,7 +138,7 @@ class DataManager:
 
     def get_individual_id_by_name(self, individual_name):
         """Fetch individual by name."""
-        query = "SELECT id FROM individuals WHERE name = ?"
+        query = queries.INDIVIDUAL_ID_BY_NAME
         with self.current_db:
             cursor = self.current_db.cursor()
             cursor.execute(query, (individual_name,))
@@ -338,7 +284,7 @@ class DataManager:
             self.record_company_change(company_number, old_data, item)
 
     def update_company_lastseen(self, company_number):
-        query = "UPDATE companies SET lastseen = ? WHERE company_number = ?"
+        query = queries.UPDATE_COMPANY_LASTSEEN
         self.execute_query(self.current_db, query, (datetime.now(UTC), company_number))
 
     def update_company_relationships(self, company_id, item):
@@ -469,12 +415,10 @@ class DataManager:
         requires removing and recreate the relationships as its easy and efficient enough.
         """
         self.logger.debug("Removing old relationships")
-        queries = [
-            "DELETE FROM company_directors WHERE company_id = ?",
-            "DELETE FROM company_shareholders WHERE company_id = ?",
-        ]
-
-        for query in queries:
+        for query in (
+            queries.DELETE_COMPANY_DIRECTORS,
+            queries.DELETE_COMPANY_SHAREHOLDERS,
+        ):
             self.execute_query(self.current_db, query, (company_id,))
 
     def get_changes(self, start_time=None, end_time=None):
@@ -0,0 +1,163 @@
+"""Versioned schema migrations of the graph database.
+
+The scraper writes the graph database and owns its schema; the web app only
+reads it. `DataManager.setup_databases` migrates the database on every crawl,
+and a database crawled by an older scraper is migrated before it is copied
+to the web app with:
+
+    python -m vfscscraper.migrations current_state.db
+
+The schema version is the database's `user_version`. Migration n takes the
+schema from version n - 1 to n, so a released migration is never edited;
+changes go in a new migration at the end of `MIGRATIONS`.
+"""
+import sqlite3
+
+MIGRATIONS = [
+    # 1: the tables as the scraper has always created them
+    [
+        """
+        CREATE TABLE IF NOT EXISTS companies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_name TEXT,
+            company_number TEXT,
+            company_type TEXT,
+            entity_type TEXT,
+            entity_status TEXT,
+            registration_date TEXT,
+            annual_filing_month TEXT,
+            email_address TEXT,
+            office_address TEXT,
+            postal_address TEXT,
+            total_shares INTEGER,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            lastseen TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS individuals (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS company_directors (
+            company_id INTEGER,
+            individual_id INTEGER,
+            entity_id INTEGER,
+            appointed_date TEXT,
+            ceased_at TEXT,
+            FOREIGN KEY (company_id) REFERENCES companies(id),
+            FOREIGN KEY (entity_id) REFERENCES compaies(id),
+            FOREIGN KEY (individual_id) REFERENCES individuals(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS company_shareholders (
+            company_id INTEGER,
+            individual_id INTEGER,
+            entity_id,
+            appointed_date TEXT,
+            ceased_at TEXT,
+            number_of_shares INTEGER,
+            FOREIGN KEY (company_id) REFERENCES companies(id),
+            FOREIGN KEY (entity_id) REFERENCES companies(id),
+            FOREIGN KEY (individual_id) REFERENCES individuals(id)
+        )
+        """,
+    ],
+    # 2: indexes for looking companies up by name and number, the latest and
+    # oldest company lists and rewriting a company's relationships. Looking
+    # individuals up by name already uses the index of its UNIQUE constraint.
+    [
+        "CREATE INDEX IF NOT EXISTS ix_companies_company_name"
+        " ON companies (company_name)",
+        "CREATE INDEX IF NOT EXISTS ix_companies_company_number"
+        " ON companies (company_number)",
+        "CREATE INDEX IF NOT EXISTS ix_companies_status_registration_date"
+        " ON companies (entity_status, registration_date)",
+        "CREATE INDEX IF NOT EXISTS ix_companies_updated_at"
+        " ON companies (updated_at)",
+        "CREATE INDEX IF NOT EXISTS ix_company_directors_company_id"
+        " ON company_directors (company_id)",
+        "CREATE INDEX IF NOT EXISTS ix_company_shareholders_company_id"
+        " ON company_shareholders (company_id)",
+    ],
+    # 3: cover the columns the web app's latest, oldest and updated company
+    # lists select, so they are read from the index alone
+    [
+        "DROP INDEX IF EXISTS ix_companies_status_registration_date",
+        "CREATE INDEX ix_companies_status_registration_date ON companies"
+        " (entity_status, registration_date, company_name, company_number,"
+        " company_type)",
+        "DROP INDEX IF EXISTS ix_companies_updated_at",
+        "CREATE INDEX ix_companies_updated_at ON companies"
+        " (updated_at, company_name, company_number, company_type,"
+        " entity_status, registration_date)",
+    ],
+    # 4: company_directors.entity_id referenced a `compaies` table. SQLite
+    # cannot alter a foreign key, so the table is rebuilt.
+    [
+        """
+        CREATE TABLE company_directors_new (
+            company_id INTEGER,
+            individual_id INTEGER,
+            entity_id INTEGER,
+            appointed_date TEXT,
+            ceased_at TEXT,
+            FOREIGN KEY (company_id) REFERENCES companies(id),
+            FOREIGN KEY (entity_id) REFERENCES companies(id),
+            FOREIGN KEY (individual_id) REFERENCES individuals(id)
+        )
+        """,
+        "INSERT INTO company_directors_new SELECT company_id, individual_id,"
+        " entity_id, appointed_date, ceased_at FROM company_directors",
+        "DROP TABLE company_directors",
+        "ALTER TABLE company_directors_new RENAME TO company_directors",
+        "CREATE INDEX ix_company_directors_company_id"
+        " ON company_directors (company_id)",
+    ],
+]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply the migrations the database is missing and return how many.
+
+    They are applied in one transaction, so a failed migration leaves the
+    database as it was, and the query planner's statistics are refreshed
+    with ANALYZE afterwards.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = schema_version(conn)
+        pending = MIGRATIONS[version:]
+        for number, statements in enumerate(pending, start=version + 1):
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {number}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    if pending:
+        conn.execute("ANALYZE")
+    return len(pending)
+
+
+if __name__ == "__main__":
+    import logging
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    for path in sys.argv[1:]:
+        conn = sqlite3.connect(path, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        applied = migrate(conn)
+        version = schema_version(conn)
+        logging.info("Applied %d migrations to %s, now at %d", applied, path, version)
+        conn.close()
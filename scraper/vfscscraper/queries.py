@@ -0,0 +1,20 @@
+"""Lookups `DataManager` runs against the current state database per company.
+
+They are kept here, apart from the scrapy code in `database.py`, so the web
+app's tests can check with EXPLAIN QUERY PLAN that the indexes added in
+`migrations.py` serve each of them.
+"""
+
+COMPANY_ID_BY_NAME = "SELECT id FROM companies WHERE company_name = ?"
+INDIVIDUAL_ID_BY_NAME = "SELECT id FROM individuals WHERE name = ?"
+UPDATE_COMPANY_LASTSEEN = "UPDATE companies SET lastseen = ? WHERE company_number = ?"
+DELETE_COMPANY_DIRECTORS = "DELETE FROM company_directors WHERE company_id = ?"
+DELETE_COMPANY_SHAREHOLDERS = "DELETE FROM company_shareholders WHERE company_id = ?"
+
+HOT_QUERIES = [
+    COMPANY_ID_BY_NAME,
+    INDIVIDUAL_ID_BY_NAME,
+    UPDATE_COMPANY_LASTSEEN,
+    DELETE_COMPANY_DIRECTORS,
+    DELETE_COMPANY_SHAREHOLDERS,
+]
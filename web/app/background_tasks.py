@@ -1,4 +1,5 @@
 import atexit
+import os
 import sqlite3
 import queue
 import threading
@@ -7,15 +8,22 @@ from datetime import datetime, UTC
 from loguru import logger
 
 
-# NOTE: the BackgroundTasks access to database is designed to be syncronous.
-# If more than one worker exists then it can run into database locked errors.
+# NOTE: the worker thread is started lazily in the process that records the
+# first task so that gunicorn workers forked from a preloaded master each get
+# their own queue and thread. Writes from several processes are serialized by
+# SQLite; each batch is written in one transaction with a busy timeout.
+
+BATCH_SIZE = 100
+BUSY_TIMEOUT = 30
 
 
 class BackgroundTasks:
     def __init__(self, app=None):
-        self.queue = queue.Queue(maxsize=1000)
+        self.queue = None
         self.worker_thread = None
         self.db_path = None
+        self._pid = None
+        self._lock = threading.Lock()
         if app is not None:
             self.init_app(app)
 
@@ -23,40 +31,50 @@ class BackgroundTasks:
         self.db_path = app.config["APP_DB"]
         app.background_tasks = self
         atexit.register(self.teardown)
-        self.start_worker()
 
     def start_worker(self):
         def worker():
             logger.debug("Starting worker")
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
             while True:
-                try:
-                    task, args = self.queue.get()
-                    if task is None:
-                        logger.info(
-                            "Got worker teardown sentinel value - Exiting thread"
-                        )
+                tasks = [self.queue.get()]
+                while len(tasks) < BATCH_SIZE:
+                    try:
+                        tasks.append(self.queue.get_nowait())
+                    except queue.Empty:
                         break
-                    if task == "record_visit":
-                        self._record_visit(
-                            args["node_id"], args["device_id"], args["timestamp"]
-                        )
-                    elif task == "record_query":
-                        self._record_query(
-                            args["query"], args["device_id"], args["timestamp"]
-                        )
-                    self.queue.task_done()
+                stop = (None, None) in tasks
+                try:
+                    self._process(conn, [task for task in tasks if task[0]])
                 except Exception as e:
                     logger.exception(f"Error processing task: {e}")
+                for _ in tasks:
+                    self.queue.task_done()
+                if stop:
+                    logger.info("Got worker teardown sentinel value - Exiting thread")
+                    break
+            conn.close()
 
+        self.queue = queue.Queue(maxsize=1000)
         self.worker_thread = threading.Thread(target=worker, daemon=True)
         self.worker_thread.start()
+        self._pid = os.getpid()
+
+    def _ensure_worker(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self.start_worker()
 
     def teardown(self, exception=None):
+        if self._pid != os.getpid():
+            return
         self.queue.put((None, None))  # Send sentinel value to stop the worker
         if self.worker_thread:
             self.worker_thread.join(timeout=5)
 
     def record_visit(self, node_id, device_id):
+        self._ensure_worker()
         try:
             logger.info(f"Recording visit to node {node_id}")
             now = datetime.now(UTC).isoformat()
@@ -71,6 +89,7 @@ class BackgroundTasks:
             return False
 
     def record_query(self, query, device_id):
+        self._ensure_worker()
         try:
             logger.info(f"Recording query for {query}")
             now = datetime.now(UTC).isoformat()
@@ -84,25 +103,33 @@ class BackgroundTasks:
         except queue.Full:
             return False
 
-    def _record_visit(self, node_id, device_id, timestamp):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
+    def _process(self, conn, tasks):
+        """Write a batch of tasks in a single transaction."""
+        if not tasks:
+            return
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for task, args in tasks:
+                if task == "record_visit":
+                    self._record_visit(
+                        conn, args["node_id"], args["device_id"], args["timestamp"]
+                    )
+                elif task == "record_query":
+                    self._record_query(
+                        conn, args["query"], args["device_id"], args["timestamp"]
+                    )
+
+    def _record_visit(self, conn, node_id, device_id, timestamp):
+        conn.execute(
             "INSERT INTO visits (node_id, device_id, timestamp) VALUES (?, ?, ?)",
             (node_id, device_id, timestamp),
         )
-        conn.commit()
-        conn.close()
 
-    def _record_query(self, query, device_id, timestamp):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
+    def _record_query(self, conn, query, device_id, timestamp):
+        conn.execute(
             "INSERT INTO queries (query, device_id, timestamp) VALUES (?, ?, ?)",
             (query, device_id, timestamp),
         )
-        conn.commit()
-        conn.close()
 
 
 background_tasks = BackgroundTasks()
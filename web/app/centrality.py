@@ -0,0 +1,118 @@
+"""Centrality scores used to rank the significant nodes of the graph.
+
+PageRank runs on the reversed edges, so rank flows from a company to the
+directors and shareholders controlling it (in proportion to their shares)
+and builds up at the people and companies behind many others.
+
+Betweenness is estimated with Brandes' algorithm from a random sample of
+source nodes over the undirected graph, which finishes in minutes where the
+exact computation over every source would take hours.
+"""
+from array import array
+import random
+
+import numpy as np
+import scipy.sparse as sp
+
+from app.csr import CSRGraph
+
+DEFAULT_SAMPLES = 100
+DAMPING = 0.85
+
+
+def _edge_arrays(G: CSRGraph):
+    """Return the (sources, targets, weights) of every edge; directors weigh 1."""
+    out_offsets = np.asarray(G.out_offsets, dtype=np.int64)
+    sources = np.repeat(np.arange(len(G)), np.diff(out_offsets))
+    targets = np.asarray(G.out_targets, dtype=np.int64)
+    weights = np.nan_to_num(np.asarray(G.edge_weights, dtype=np.float64), nan=1.0)
+    return sources, targets, weights
+
+
+def pagerank(G: CSRGraph, alpha=DAMPING, tol=1e-10, max_iter=100):
+    """Return the PageRank of every node over the reversed, weighted edges."""
+    n = len(G)
+    sources, targets, weights = _edge_arrays(G)
+    transitions = sp.csr_matrix((weights, (targets, sources)), shape=(n, n))
+    out_weight = np.asarray(transitions.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    transitions = sp.diags(1 / np.where(dangling, 1, out_weight)) @ transitions
+    transitions = transitions.T.tocsr()
+
+    rank = np.full(n, 1 / n)
+    for _ in range(max_iter):
+        previous = rank
+        rank = alpha * (transitions @ rank + previous[dangling].sum() / n)
+        rank += (1 - alpha) / n
+        if np.abs(rank - previous).sum() < n * tol:
+            break
+    return rank
+
+
+def undirected_adjacency(G: CSRGraph):
+    """Return (offsets, neighbors) arrays of the undirected graph without repeats."""
+    n = len(G)
+    sources, targets, _ = _edge_arrays(G)
+    pairs = np.unique(np.concatenate([sources * n + targets, targets * n + sources]))
+    return np.searchsorted(pairs // n, np.arange(n + 1)), pairs % n
+
+
+def _brandes(offsets, neighbors, source, betweenness):
+    """Add the dependencies of every node on shortest paths from `source`."""
+    sigma = {source: 1}
+    dist = {source: 0}
+    preds = {}
+    order = [source]
+    for v in order:
+        next_dist, paths = dist[v] + 1, sigma[v]
+        for w in neighbors[offsets[v] : offsets[v + 1]]:
+            w_dist = dist.get(w)
+            if w_dist is None:
+                dist[w] = next_dist
+                sigma[w] = paths
+                preds[w] = [v]
+                order.append(w)
+            elif w_dist == next_dist:
+                sigma[w] += paths
+                preds[w].append(v)
+
+    delta = dict.fromkeys(order, 0.0)
+    for w in reversed(order[1:]):
+        coefficient = (1 + delta[w]) / sigma[w]
+        for v in preds[w]:
+            delta[v] += sigma[v] * coefficient
+        betweenness[w] += delta[w]
+
+
+def betweenness(G: CSRGraph, samples=DEFAULT_SAMPLES, seed=0):
+    """Return betweenness estimates from `samples` random source nodes.
+
+    The estimates are scaled to the full number of sources and, since every
+    path of the undirected graph is found from both ends, halved.
+    """
+    n = len(G)
+    # Slices of stdlib arrays are much faster to iterate than numpy arrays
+    offsets, neighbors = (array("q", a.tobytes()) for a in undirected_adjacency(G))
+    scores = [0.0] * n
+    sources = random.Random(seed).sample(range(n), min(samples, n))
+    for source in sources:
+        _brandes(offsets, neighbors, source, scores)
+    return np.asarray(scores) * n / max(len(sources), 1) / 2
+
+
+def centrality_rows(G: CSRGraph, samples=DEFAULT_SAMPLES, seed=0):
+    """Yield the `node_metrics` rows of every node."""
+    _, targets, weights = _edge_arrays(G)
+    in_degree = np.diff(np.asarray(G.in_offsets, dtype=np.int64))
+    degree = in_degree + np.diff(np.asarray(G.out_offsets, dtype=np.int64))
+    weighted_in_degree = np.bincount(targets, weights=weights, minlength=len(G))
+    columns = [
+        np.asarray(G.ids).tolist(),
+        degree.tolist(),
+        in_degree.tolist(),
+        weighted_in_degree.tolist(),
+        pagerank(G).tolist(),
+        betweenness(G, samples, seed).tolist(),
+    ]
+    for index, row in enumerate(zip(*columns, strict=True)):
+        yield (G.node_type(index), *row)
@@ -0,0 +1,324 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from loguru import logger
+
+from app.centrality import DEFAULT_SAMPLES, centrality_rows
+from app.clusters import DEFAULT_MAX_ITER, cluster_rows
+from app.cycles import cycle_rows, find_cycles, holding_rows
+from app.db.graph_db import SIGNIFICANCE_METRICS, replace_table, search_index_rows
+from app.export import (
+    EXPORT_FORMATS,
+    export_path,
+    lock_export,
+    remove_stale_exports,
+    unlock_export,
+    write_export,
+)
+from app.graph import load_graph
+from app.graph_store import graph_store
+from app.neighborhoods import DEFAULT_MAX_SIZE, NeighborhoodIndex
+from app.ownership import (
+    DEFAULT_MAX_DEPTH,
+    DEFAULT_THRESHOLD,
+    compute_ownership,
+    ownership_rows,
+)
+from app.snapshot import write_snapshot
+from app.trigrams import TrigramIndex
+from app.utils import timer
+
+
+@click.command("compile-graph")
+@with_appcontext
+@timer
+def compile_graph_command():
+    """Compile the graph db into a snapshot file that workers memory-map."""
+    G = load_graph()
+    path = write_snapshot(
+        G, current_app.config["GRAPH_SNAPSHOT"], graph_store.db_version
+    )
+    logger.info(
+        f"Wrote {G.number_of_nodes()} nodes and {G.number_of_edges()} edges to {path}"
+    )
+
+
+@click.command("build-neighborhood-index")
+@click.option(
+    "--max-size",
+    default=DEFAULT_MAX_SIZE,
+    show_default=True,
+    help="Largest 2-hop neighborhood to store; larger ones use a live BFS.",
+)
+@with_appcontext
+@timer
+def build_neighborhood_index_command(max_size):
+    """Precompute the 1-hop and 2-hop neighborhood of every node."""
+    G = load_graph()
+    index = NeighborhoodIndex.build(G, max_size=max_size)
+    path = index.write(
+        current_app.config["GRAPH_NEIGHBORHOODS"], graph_store.db_version
+    )
+    logger.info(f"Wrote {index.nbytes() / 2**20:.1f} MiB neighborhood index to {path}")
+
+
+@click.command("build-trigram-index")
+@with_appcontext
+@timer
+def build_trigram_index_command():
+    """Index the trigrams of every node name for typo-tolerant search."""
+    G = load_graph()
+    index = TrigramIndex.build(G)
+    path = index.write(current_app.config["GRAPH_TRIGRAMS"], graph_store.db_version)
+    logger.info(f"Wrote {index.nbytes() / 2**20:.1f} MiB trigram index to {path}")
+
+
+@click.command("build-ownership")
+@click.option(
+    "--threshold",
+    default=DEFAULT_THRESHOLD,
+    show_default=True,
+    help="Smallest effective stake to keep.",
+)
+@click.option(
+    "--max-depth",
+    default=DEFAULT_MAX_DEPTH,
+    show_default=True,
+    help="Longest chain of companies to follow.",
+)
+@with_appcontext
+@timer
+def build_ownership_command(threshold, max_depth):
+    """Compute the effective ownership of every company by every individual.
+
+    Writes the `ultimate_ownership` table to the derived db.
+    """
+    G = load_graph()
+    ownership = compute_ownership(G, threshold=threshold, max_depth=max_depth)
+    count = replace_table(
+        "ultimate_ownership",
+        [
+            """
+            CREATE TABLE ultimate_ownership (
+                company_id INTEGER NOT NULL,
+                individual_id INTEGER NOT NULL,
+                ownership REAL NOT NULL,
+                PRIMARY KEY (company_id, individual_id)
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE INDEX ix_ultimate_ownership_individual_id
+            ON ultimate_ownership (individual_id)
+            """,
+        ],
+        ownership_rows(G, ownership),
+    )
+    logger.info(f"Wrote {count} ultimate ownership rows")
+
+
+@click.command("build-centrality")
+@click.option(
+    "--samples",
+    default=DEFAULT_SAMPLES,
+    show_default=True,
+    help="Number of source nodes sampled to estimate betweenness.",
+)
+@click.option("--seed", default=0, show_default=True)
+@with_appcontext
+@timer
+def build_centrality_command(samples, seed):
+    """Compute the degree, PageRank and betweenness of every node.
+
+    Writes the `node_metrics` table to the derived db.
+    """
+    G = load_graph()
+    count = replace_table(
+        "node_metrics",
+        [
+            """
+            CREATE TABLE node_metrics (
+                node_type TEXT NOT NULL,
+                node_id INTEGER NOT NULL,
+                degree INTEGER NOT NULL,
+                in_degree INTEGER NOT NULL,
+                weighted_in_degree REAL NOT NULL,
+                pagerank REAL NOT NULL,
+                betweenness REAL NOT NULL,
+                PRIMARY KEY (node_type, node_id)
+            ) WITHOUT ROWID
+            """,
+            *(
+                f"CREATE INDEX ix_node_metrics_{metric} ON node_metrics ({metric} DESC)"
+                for metric in SIGNIFICANCE_METRICS
+            ),
+        ],
+        centrality_rows(G, samples=samples, seed=seed),
+    )
+    logger.info(f"Wrote centrality metrics for {count} nodes")
+
+
+@click.command("build-clusters")
+@click.option(
+    "--max-iter",
+    default=DEFAULT_MAX_ITER,
+    show_default=True,
+    help="Rounds of label propagation.",
+)
+@click.option("--seed", default=0, show_default=True)
+@with_appcontext
+@timer
+def build_clusters_command(max_iter, seed):
+    """Label every node with its connected component and community.
+
+    Writes the `node_clusters` table to the derived db.
+    """
+    G = load_graph()
+    count = replace_table(
+        "node_clusters",
+        [
+            """
+            CREATE TABLE node_clusters (
+                node_type TEXT NOT NULL,
+                node_id INTEGER NOT NULL,
+                component INTEGER NOT NULL,
+                community INTEGER NOT NULL,
+                PRIMARY KEY (node_type, node_id)
+            ) WITHOUT ROWID
+            """,
+            "CREATE INDEX ix_node_clusters_component ON node_clusters (component)",
+            "CREATE INDEX ix_node_clusters_community ON node_clusters (community)",
+        ],
+        cluster_rows(G, max_iter=max_iter, seed=seed),
+    )
+    logger.info(f"Wrote clusters for {count} nodes")
+
+
+@click.command("build-cycles")
+@with_appcontext
+@timer
+def build_cycles_command():
+    """Find the companies holding shares in each other in a circle.
+
+    Writes the `ownership_cycles` and `ownership_cycle_holdings` tables to the
+    derived db.
+    """
+    G = load_graph()
+    cycles = find_cycles(G)
+    replace_table(
+        "ownership_cycle_holdings",
+        [
+            """
+            CREATE TABLE ownership_cycle_holdings (
+                cycle_id INTEGER NOT NULL,
+                holder_id INTEGER NOT NULL,
+                company_id INTEGER NOT NULL,
+                share REAL NOT NULL,
+                PRIMARY KEY (cycle_id, holder_id, company_id)
+            ) WITHOUT ROWID
+            """,
+        ],
+        holding_rows(G, cycles),
+    )
+    # Written last, so the list page only sees cycles whose holdings exist
+    count = replace_table(
+        "ownership_cycles",
+        [
+            """
+            CREATE TABLE ownership_cycles (
+                cycle_id INTEGER PRIMARY KEY,
+                size INTEGER NOT NULL,
+                holdings INTEGER NOT NULL
+            )
+            """,
+        ],
+        cycle_rows(cycles),
+    )
+    logger.info(f"Wrote {count} circular shareholdings")
+
+
+@click.command("export-graph")
+@click.option(
+    "--format",
+    "formats",
+    type=click.Choice(list(EXPORT_FORMATS)),
+    multiple=True,
+    help="Format to write; repeat for several. Defaults to all of them.",
+)
+@click.option(
+    "--graph-version",
+    help="Only write the exports if the graph db is still at this version.",
+)
+@click.option(
+    "--locked",
+    is_flag=True,
+    hidden=True,
+    help="The locks of the exports are held by the web app that started this.",
+)
+@with_appcontext
+@timer
+def export_graph_command(formats, graph_version, locked):
+    """Write the full graph as gzip-compressed GraphML, GEXF and CSV downloads.
+
+    An export another process is writing is skipped. Downloads of other graph
+    versions are removed. The locks taken by the web app for `--locked` are
+    released however the command ends, so a failed export is retried.
+    """
+    directory = current_app.config["GRAPH_EXPORTS"]
+    formats = formats or list(EXPORT_FORMATS)
+    if locked and graph_version is None:
+        msg = "--locked is only used with --graph-version"
+        raise click.UsageError(msg)
+    # Locks this process holds, released however the command ends
+    held = set()
+    if locked:
+        held = {export_path(directory, graph_version, fmt) for fmt in formats}
+    try:
+        G = load_graph()
+        version = graph_store.db_version
+        for fmt in formats:
+            path = export_path(directory, graph_version or version, fmt)
+            if path not in held:
+                if not lock_export(path):
+                    logger.info(f"Skipping {path}, another process is writing it")
+                    continue
+                held.add(path)
+            try:
+                if graph_version not in (None, version):
+                    logger.info(f"Skipping {path}, the graph db has changed since")
+                    continue
+                write_export(G, fmt, path)
+            finally:
+                unlock_export(path)
+                held.discard(path)
+            logger.info(f"Wrote {path.stat().st_size / 2**20:.1f} MiB to {path}")
+
+        remove_stale_exports(directory, version)
+    finally:
+        for path in held:
+            unlock_export(path)
+
+
+@click.command("build-search-index")
+@with_appcontext
+@timer
+def build_search_index_command():
+    """Build the full-text index of company and individual names behind /search.
+
+    Writes the `search_names` FTS5 table to the derived db.
+    """
+    count = replace_table(
+        "search_names",
+        [
+            """
+            CREATE VIRTUAL TABLE search_names USING fts5(
+                name,
+                node_type UNINDEXED,
+                node_id UNINDEXED,
+                prefix = '2 3',
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+            """,
+        ],
+        search_index_rows(),
+    )
+    logger.info(f"Indexed {count} names")
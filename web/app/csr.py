@@ -0,0 +1,386 @@
+from array import array
+from bisect import bisect_left
+from collections import deque
+from itertools import chain
+import math
+
+NODE_TYPES = ("entity", "individual")
+NODE_PREFIXES = ("e", "i")
+RELATIONSHIPS = ("director", "shareholder")
+DIRECTOR, SHAREHOLDER = 0, 1
+
+
+class CSRGraph:
+    """Directed multigraph of companies and individuals stored in flat arrays.
+
+    Nodes are integer indices: companies sorted by database id come first,
+    followed by individuals sorted by database id, so a node key such as
+    `"e-123"` is resolved with a binary search instead of a dict lookup.
+
+    Edges are stored twice in compressed sparse row (CSR) form. The forward
+    arrays hold each node's outgoing edges along with the relationship and
+    weight columns; the reverse arrays hold incoming edges as indices into the
+    forward columns. Labels are packed into one UTF-8 buffer and statuses are
+    codes into a small string table, so no per-node Python objects are kept.
+    """
+
+    def __init__(
+        self,
+        n_entities,
+        ids,
+        statuses,
+        status_table,
+        label_offsets,
+        label_data,
+        out_offsets,
+        out_targets,
+        edge_relationships,
+        edge_weights,
+        in_offsets,
+        in_sources,
+        in_edges,
+    ):
+        self.n_entities = n_entities
+        self.ids = ids
+        self.statuses = statuses
+        self.status_table = status_table
+        self.label_offsets = label_offsets
+        self.label_data = label_data
+        self.out_offsets = out_offsets
+        self.out_targets = out_targets
+        self.edge_relationships = edge_relationships
+        self.edge_weights = edge_weights
+        self.in_offsets = in_offsets
+        self.in_sources = in_sources
+        self.in_edges = in_edges
+        # Optional precomputed `NeighborhoodIndex` for this graph
+        self.neighborhoods = None
+        # Optional `TrigramIndex` of the node names
+        self.trigrams = None
+        # `SuggestionIndex` of the node names, built on first use
+        self.suggestions = None
+
+    @classmethod
+    def from_edges(cls, companies, individuals, edges):
+        """Build the graph from company and individual rows and an edge iterable.
+
+        `edges` yields (source, target, data) with node keys like `"e-123"`,
+        as produced by `app.graph._iter_edges`.
+        """
+        companies = sorted(companies, key=lambda row: row[0])
+        individuals = sorted(individuals, key=lambda row: row[0])
+        n_entities = len(companies)
+
+        ids = array("q", [row[0] for row in companies])
+        ids.extend(row[0] for row in individuals)
+        index = {f"e-{row[0]}": i for i, row in enumerate(companies)}
+        index.update(
+            (f"i-{row[0]}", n_entities + i) for i, row in enumerate(individuals)
+        )
+
+        status_table = [None]
+        status_codes = {None: 0}
+        statuses = array("B")
+        for _, _, entity_status in companies:
+            code = status_codes.get(entity_status)
+            if code is None:
+                code = status_codes[entity_status] = len(status_table)
+                status_table.append(entity_status)
+            statuses.append(code)
+        statuses.extend(bytes(len(individuals)))
+
+        label_offsets = array("I", [0])
+        label_data = bytearray()
+        for row in companies + individuals:
+            label_data += (row[1] or "").encode()
+            label_offsets.append(len(label_data))
+
+        sources, targets = array("I"), array("I")
+        relationships, weights = array("B"), array("f")
+        for source, target, data in edges:
+            sources.append(index[source])
+            targets.append(index[target])
+            relationships.append(RELATIONSHIPS.index(data["relationship"]))
+            weights.append(data.get("weight", math.nan))
+
+        n_nodes = len(ids)
+        out_offsets, order = _counting_sort(sources, n_nodes)
+        in_offsets, in_order = _counting_sort(targets, n_nodes)
+
+        # Re-number edges in source order so the forward columns are contiguous
+        position = array("I", bytes(4 * len(order)))
+        for new, old in enumerate(order):
+            position[old] = new
+
+        return cls(
+            n_entities=n_entities,
+            ids=ids,
+            statuses=statuses,
+            status_table=status_table,
+            label_offsets=label_offsets,
+            label_data=bytes(label_data),
+            out_offsets=out_offsets,
+            out_targets=array("I", (targets[e] for e in order)),
+            edge_relationships=array("B", (relationships[e] for e in order)),
+            edge_weights=array("f", (weights[e] for e in order)),
+            in_offsets=in_offsets,
+            in_sources=array("I", (sources[e] for e in in_order)),
+            in_edges=array("I", (position[e] for e in in_order)),
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, node_id):
+        return self.index(node_id) is not None
+
+    def number_of_nodes(self):
+        return len(self.ids)
+
+    def number_of_edges(self):
+        return len(self.out_targets)
+
+    def index(self, node_id):
+        """Return the integer index for a node key like `"e-123"`, or None."""
+        prefix, _, db_id = str(node_id).partition("-")
+        try:
+            db_id = int(db_id)
+        except ValueError:
+            return None
+        if prefix == "e":
+            lo, hi = 0, self.n_entities
+        elif prefix == "i":
+            lo, hi = self.n_entities, len(self.ids)
+        else:
+            return None
+        i = bisect_left(self.ids, db_id, lo, hi)
+        return i if i < hi and self.ids[i] == db_id else None
+
+    def key(self, index):
+        """Return the node key like `"e-123"` for an integer index."""
+        prefix = NODE_PREFIXES[index >= self.n_entities]
+        return f"{prefix}-{self.ids[index]}"
+
+    def node_type(self, index):
+        return NODE_TYPES[index >= self.n_entities]
+
+    def label(self, index):
+        start, end = self.label_offsets[index], self.label_offsets[index + 1]
+        return bytes(self.label_data[start:end]).decode() or None
+
+    def status(self, index):
+        return self.status_table[self.statuses[index]]
+
+    def node_data(self, index):
+        return {
+            "label": self.label(index),
+            "status": self.status(index),
+            "type": self.node_type(index),
+        }
+
+    def edge_data(self, edge):
+        data = {"relationship": RELATIONSHIPS[self.edge_relationships[edge]]}
+        if self.edge_relationships[edge] == SHAREHOLDER:
+            data["weight"] = self.edge_weights[edge]
+        return data
+
+    def successors(self, index):
+        return self.out_targets[self.out_offsets[index] : self.out_offsets[index + 1]]
+
+    def predecessors(self, index):
+        return self.in_sources[self.in_offsets[index] : self.in_offsets[index + 1]]
+
+    def neighbors(self, index):
+        """Return the successors and predecessors of a node (may repeat)."""
+        return [*self.successors(index), *self.predecessors(index)]
+
+    def out_edges(self, index):
+        """Yield (target, edge) pairs for the outgoing edges of a node."""
+        start, end = self.out_offsets[index], self.out_offsets[index + 1]
+        for edge in range(start, end):
+            yield self.out_targets[edge], edge
+
+    def incoming_edges(self, index):
+        """Yield (source, edge) pairs for the incoming edges of a node."""
+        start, end = self.in_offsets[index], self.in_offsets[index + 1]
+        for position in range(start, end):
+            yield self.in_sources[position], self.in_edges[position]
+
+    def degree(self, index):
+        return (
+            self.out_offsets[index + 1]
+            - self.out_offsets[index]
+            + self.in_offsets[index + 1]
+            - self.in_offsets[index]
+        )
+
+    def bfs_nodes(self, source, depth, reverse=False, undirected=False):
+        """Return the set of node indices within `depth` hops of `source`."""
+        if undirected:
+            neighbors = self.neighbors
+        else:
+            neighbors = self.predecessors if reverse else self.successors
+        seen = {source}
+        frontier = [source]
+        for _ in range(depth):
+            next_frontier = []
+            for node in frontier:
+                for neighbor in neighbors(node):
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        next_frontier.append(neighbor)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return seen
+
+    def subgraph(self, nodes, hidden=None, max_edges=None, known=None, center=None):
+        return CSRSubgraph(self, nodes, hidden, max_edges, known, center)
+
+
+class CSRSubgraph:
+    """Read-only view of the edges between a set of nodes in a `CSRGraph`.
+
+    Mirrors the parts of the NetworkX subgraph view used by the graph view so
+    that callers can iterate `nodes(data=True)` and `edges(data=True)`.
+
+    `hidden` maps node indices to a count of neighbors left out of the view;
+    each is represented by an aggregate node of type `"more"` linked to it.
+    At most `max_edges` edges between the nodes are included, taken breadth
+    first from `center` (or the lowest node index), so the edges nearest the
+    center are kept. Dropped edges are added to the count of the node nearer
+    the center, giving it a "more" node too.
+
+    `known` nodes are ones the caller already has: they are left out of
+    `nodes()` but the edges linking them to the other nodes are included, so
+    the view is the delta to merge into an existing graph.
+    """
+
+    def __init__(
+        self, graph, nodes, hidden=None, max_edges=None, known=None, center=None
+    ):
+        self.graph = graph
+        self.known = set(known or ())
+        self.node_indices = sorted(set(nodes) - self.known)
+        self._node_set = set(self.node_indices)
+        self.hidden = hidden or {}
+        self.max_edges = max_edges
+        self.center = center
+        self._selected = None
+
+    def __len__(self):
+        return len(self.node_indices)
+
+    def __contains__(self, node_id):
+        return self.graph.index(node_id) in self._node_set
+
+    def number_of_nodes(self):
+        return len(self.node_indices)
+
+    def number_of_edges(self):
+        return len(self._select_edges()[0])
+
+    def _incident_edges(self, node):
+        """Yield (source, target, edge) for the edges of a node, loops once."""
+        graph = self.graph
+        for target, edge in graph.out_edges(node):
+            yield node, target, edge
+        for source, edge in graph.incoming_edges(node):
+            if source != node:
+                yield source, node, edge
+
+    def _select_edges(self):
+        """Return the included edges and the number dropped per node.
+
+        Nodes are visited breadth first, and each edge is taken when the
+        first of its ends is visited, until there are `max_edges`.
+        """
+        if self._selected is not None:
+            return self._selected
+        edges, dropped = [], {}
+        order = {}
+        queue = deque()
+        starts = [self.center] if self.center in self._node_set else []
+        for start in chain(starts, self.node_indices):
+            if start in order:
+                continue
+            order[start] = len(order)
+            queue.append(start)
+            while queue:
+                node = queue.popleft()
+                for source, target, edge in self._incident_edges(node):
+                    other = target if source == node else source
+                    if other in self.known:
+                        pass
+                    elif other not in self._node_set:
+                        continue
+                    elif other not in order:
+                        order[other] = len(order)
+                        queue.append(other)
+                    elif order[other] < order[node]:
+                        # Taken or dropped when `other` was visited
+                        continue
+                    if len(edges) == self.max_edges:
+                        dropped[node] = dropped.get(node, 0) + 1
+                    else:
+                        edges.append((source, target, edge))
+        self._selected = edges, dropped
+        return self._selected
+
+    def _edge_indices(self):
+        return iter(self._select_edges()[0])
+
+    def _more(self):
+        """Return the count of left out neighbors and edges of each node."""
+        more = dict(self.hidden)
+        for index, count in self._select_edges()[1].items():
+            more[index] = more.get(index, 0) + count
+        return more
+
+    def nodes(self, data=False):
+        graph = self.graph
+        for index in self.node_indices:
+            if data:
+                yield graph.key(index), graph.node_data(index)
+            else:
+                yield graph.key(index)
+        for index, count in self._more().items():
+            anchor = graph.key(index)
+            if data:
+                yield f"more-{anchor}", {
+                    "label": f"{count} more hidden",
+                    "status": None,
+                    "type": "more",
+                    "anchor": anchor,
+                }
+            else:
+                yield f"more-{anchor}"
+
+    def edges(self, data=False):
+        graph = self.graph
+        for source, target, edge in self._edge_indices():
+            if data:
+                yield graph.key(source), graph.key(target), graph.edge_data(edge)
+            else:
+                yield graph.key(source), graph.key(target)
+        for index in self._more():
+            key = graph.key(index)
+            if data:
+                yield key, f"more-{key}", {"relationship": "more"}
+            else:
+                yield key, f"more-{key}"
+
+
+def _counting_sort(keys, n):
+    """Return CSR offsets for `keys` in range(n) and the stable sort order."""
+    offsets = array("I", bytes(4 * (n + 1)))
+    for key in keys:
+        offsets[key + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+    cursor = array("I", offsets[:-1])
+    order = array("I", bytes(4 * len(keys)))
+    for e, key in enumerate(keys):
+        order[cursor[key]] = e
+        cursor[key] += 1
+    return offsets, order
@@ -0,0 +1,124 @@
+"""Circular shareholdings between companies.
+
+Companies that hold shares in each other, directly or through a chain of
+other companies, form a strongly connected component of the company to
+company shareholder edges. Components are found with Tarjan's algorithm,
+run with an explicit stack so long chains of holdings cannot exhaust the
+recursion limit.
+"""
+import numpy as np
+
+from app.csr import SHAREHOLDER, CSRGraph
+
+
+def _company_holdings(G: CSRGraph):
+    """Return (offsets, targets, weights) of the company to company holdings.
+
+    A company listed twice as a holder of another is one holding.
+    """
+    n_entities = G.n_entities
+    out_offsets = np.asarray(G.out_offsets, dtype=np.int64)[: n_entities + 1]
+    sources = np.repeat(np.arange(n_entities), np.diff(out_offsets))
+    targets = np.asarray(G.out_targets, dtype=np.int64)[: out_offsets[-1]]
+    weights = np.asarray(G.edge_weights, dtype=np.float64)[: out_offsets[-1]]
+    relationships = np.asarray(G.edge_relationships)[: out_offsets[-1]]
+    is_share = relationships == SHAREHOLDER
+
+    pairs, first = np.unique(
+        sources[is_share] * n_entities + targets[is_share], return_index=True
+    )
+    offsets = np.searchsorted(pairs // n_entities, np.arange(n_entities + 1))
+    return offsets, pairs % n_entities, weights[is_share][first]
+
+
+def strongly_connected_components(offsets, targets):
+    """Return the components of more than one node of a CSR graph.
+
+    Each component is a sorted list of node indices.
+    """
+    n = len(offsets) - 1
+    offsets, targets = offsets.tolist(), targets.tolist()
+    index = [-1] * n
+    low = [0] * n
+    on_stack = bytearray(n)
+    stack = []
+    components = []
+    counter = 0
+
+    for root in range(n):
+        if index[root] != -1 or offsets[root] == offsets[root + 1]:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        # Each frame is a node and the position of its next edge to visit
+        work = [(root, offsets[root])]
+        while work:
+            v, edge = work[-1]
+            if edge < offsets[v + 1]:
+                work[-1] = (v, edge + 1)
+                w = targets[edge]
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = 1
+                    work.append((w, offsets[w]))
+                elif on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[v])
+            if low[v] == index[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = 0
+                    component.append(w)
+                    if w == v:
+                        break
+                if len(component) > 1:
+                    components.append(sorted(component))
+    return components
+
+
+def find_cycles(G: CSRGraph):
+    """Return the circular shareholdings between companies, largest first.
+
+    Each cycle is a (members, holdings) pair: the sorted graph indices of the
+    companies involved and the (holder, company, share) holdings between them.
+    """
+    offsets, targets, weights = _company_holdings(G)
+    cycles = []
+    for members in strongly_connected_components(offsets, targets):
+        in_cycle = set(members)
+        holdings = [
+            (holder, company, weight)
+            for holder in members
+            for company, weight in zip(
+                targets[offsets[holder] : offsets[holder + 1]].tolist(),
+                weights[offsets[holder] : offsets[holder + 1]].tolist(),
+                strict=True,
+            )
+            if company in in_cycle
+        ]
+        cycles.append((members, holdings))
+    cycles.sort(key=lambda cycle: (-len(cycle[0]), cycle[0][0]))
+    return cycles
+
+
+def cycle_rows(cycles):
+    """Yield (cycle_id, size, holdings) rows for the graph db."""
+    for cycle_id, (members, holdings) in enumerate(cycles):
+        yield cycle_id, len(members), len(holdings)
+
+
+def holding_rows(G: CSRGraph, cycles):
+    """Yield (cycle_id, holder_id, company_id, share) rows for the graph db."""
+    for cycle_id, (_, holdings) in enumerate(cycles):
+        for holder, company, share in holdings:
+            yield cycle_id, G.ids[holder], G.ids[company], share
@@ -4,20 +4,18 @@ from concurrent.futures import ThreadPoolExecutor
 
 from flask import g, current_app
 
+from app.db.connections import connections
+
 
 def get_db():
     db = getattr(g, "_app_database", None)
     if db is None:
-        uri = f"file:{str(current_app.config['APP_DB'])}?mode=ro"
-        db = g._app_database = sqlite3.connect(uri, uri=True)
-        db.row_factory = sqlite3.Row
+        db = g._app_database = connections.get(current_app.config["APP_DB"])
     return db
 
 
 def close_db(exception=None):
-    db = getattr(g, "_app_database", None)
-    if db is not None:
-        db.close()
+    g.pop("_app_database", None)
 
 
 def init_db():
@@ -0,0 +1,81 @@
+"""Read-only SQLite connections kept open for the life of a worker thread.
+
+Opening a connection per request throws away SQLite's page cache, its
+parsed schema and its prepared statements. Instead each thread keeps one
+connection per database file and hands it to every request it serves.
+
+A connection sees everything committed to its files, including the tables
+`replace_table` rewrites in an attached database, so it only has to be
+reopened when a file is replaced by a new one, noticed by its inode changing.
+
+Connections are also kept per process. A gunicorn master that preloads the
+app may open some before forking, and SQLite connections must not be used
+or closed across a fork, so a forked worker opens its own and leaves the
+ones it inherited alone.
+"""
+import os
+from pathlib import Path
+import sqlite3
+import threading
+
+# Prepared statements each connection keeps, up from sqlite3's 128
+CACHED_STATEMENTS = 256
+
+
+def _file_id(path):
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+class ReadOnlyConnections:
+    def __init__(self):
+        self._local = threading.local()
+
+    def _connect(self, path, attach, mmap_size, cache_size):
+        db = sqlite3.connect(
+            f"file:{path}?mode=ro",
+            uri=True,
+            cached_statements=CACHED_STATEMENTS,
+        )
+        db.row_factory = sqlite3.Row
+        for schema, attached in attach.items():
+            # An empty database stands in for a file not written yet
+            uri = f"file:{attached}?mode=ro" if attached.exists() else "file::memory:"
+            db.execute(f"ATTACH DATABASE ? AS {schema}", (uri,))
+        # Pages are read through a memory map shared by every process
+        db.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+        db.execute(f"PRAGMA cache_size = -{int(cache_size)}")
+        db.execute("PRAGMA query_only = ON")
+        db.execute("PRAGMA temp_store = MEMORY")
+        return db
+
+    def get(self, path, attach=None, mmap_size=0, cache_size=2048):
+        """Return this thread's connection to `path`, opening it if needed.
+
+        `attach` maps schema names to database files attached read-only to
+        the connection; the connection is reopened once a missing one exists.
+        `mmap_size` is in bytes and `cache_size`, the page cache of the
+        connection, in KiB; both apply when the connection is opened.
+        """
+        path = Path(path)
+        attach = {schema: Path(file) for schema, file in (attach or {}).items()}
+        key = tuple(_file_id(file) for file in (path, *attach.values()))
+        if key[0] is None:
+            raise FileNotFoundError(path)
+        processes = getattr(self._local, "processes", None)
+        if processes is None:
+            processes = self._local.processes = {}
+        connections = processes.setdefault(os.getpid(), {})
+        entry = connections.get(path)
+        if entry is None or entry[0] != key:
+            if entry is not None:
+                entry[1].close()
+            db = self._connect(path, attach, mmap_size, cache_size)
+            entry = connections[path] = (key, db)
+        return entry[1]
+
+
+connections = ReadOnlyConnections()
@@ -1,31 +1,140 @@
+import json
 import random
+import re
 import sqlite3
 from flask import g, current_app
 
+from app.db.connections import connections
 from app.extensions import cache
+from app.graph_store import versioned_name
 
 
 def get_db():
+    """Return the read-only graph db connection of the current thread."""
     db = getattr(g, "_graph_database", None)
     if db is None:
-        uri = f"file:{str(current_app.config['GRAPH_DB'])}?mode=ro"
-        db = g._graph_database = sqlite3.connect(uri, uri=True)
-        db.row_factory = sqlite3.Row
+        db = g._graph_database = connections.get(
+            current_app.config["GRAPH_DB"],
+            attach={"derived": current_app.config["GRAPH_DERIVED_DB"]},
+            mmap_size=current_app.config["GRAPH_DB_MMAP_SIZE"],
+            cache_size=current_app.config["GRAPH_DB_CACHE_SIZE"],
+        )
     return db
 
 
 def close_db(e=None):
-    db = getattr(g, "_graph_database", None)
-    if db is not None:
-        db.close()
+    # The connection stays open for the thread's next request
+    g.pop("_graph_database", None)
 
 
-def search_company_names(q: str):
-    db = get_db()
-    cursor = db.cursor()
+def replace_table(name: str, schema: list[str], rows):
+    """Replace a table derived from the graph with `rows` in one transaction.
+
+    `schema` holds the statements creating the table and its indexes. The
+    table is written to the derived db, which graph db connections attach as
+    `derived`, so the graph db and the snapshot compiled from it are left
+    unchanged. Readers see either the old or the new table, never a partly
+    written one.
+    """
+    conn = sqlite3.connect(current_app.config["GRAPH_DERIVED_DB"], isolation_level=None)
+    conn.execute("PRAGMA busy_timeout = 30000")
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(f"DROP TABLE IF EXISTS {name}")
+        for statement in schema:
+            conn.execute(statement)
+        n_columns = len(conn.execute(f"PRAGMA table_info({name})").fetchall())
+        placeholders = ", ".join("?" * n_columns)
+        conn.executemany(f"INSERT INTO {name} VALUES ({placeholders})", rows)
+        count = conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return count
+
+
+def _table_exists(db, name: str) -> bool:
+    query = "SELECT 1 FROM derived.sqlite_master WHERE type = 'table' AND name = ?"
+    return db.execute(query, (name,)).fetchone() is not None
+
+
+SEARCH_LIMIT = 50
+
+
+def search_index_rows():
+    """Return (name, node_type, node_id) rows for the `search_names` index."""
+    query = """
+        SELECT company_name, 'company', id FROM companies
+        UNION ALL
+        SELECT name, 'individual', id FROM individuals
+    """
+    return [tuple(row) for row in get_db().execute(query).fetchall()]
+
 
-    query = "SELECT id, company_name, company_number, company_type, entity_status, registration_date FROM companies WHERE company_name LIKE ?"
-    cursor.execute(query, (f"%{q}%",))
+def _match_query(q: str):
+    """Return an FTS5 query for names containing every word of `q`.
+
+    The last word may be unfinished, so it matches as a prefix. Only the last
+    one does: a prefix of a word found in most names, such as "limited",
+    expands to every row of the index.
+    """
+    words = [f'"{word}"' for word in re.findall(r"\w+", q)]
+    if words:
+        words[-1] += "*"
+    return " ".join(words)
+
+
+def _search_rows(db, table: str, columns: str, q: str, limit, after):
+    """Return rows of `columns` and their rank for the names in `table` matching `q`.
+
+    Rows come in (rank, id) order, starting after the (rank, id) pair `after`
+    when it is given, so the last row of one page is the cursor of the next.
+    The rank is the bm25 score of the full-text index, lower is better; the
+    fallback scan for names containing `q` ranks every row 0.
+    """
+    after_rank, after_id = after or (float("-inf"), -1)
+    if _table_exists(db, "search_names"):
+        match = _match_query(q)
+        if not match:
+            return []
+        node_type = "company" if table == "companies" else "individual"
+        # FTS5 does not filter on `rank` in a row value, so bm25() is spelled out
+        query = f"""
+            SELECT {columns}, bm25(search_names) AS score FROM derived.search_names s
+            JOIN {table} t ON t.id = s.node_id
+            WHERE search_names MATCH ? AND s.node_type = ?
+            AND (bm25(search_names), t.id) > (?, ?)
+            ORDER BY score, t.id
+            LIMIT ?
+        """
+        params = (match, node_type, after_rank, after_id, limit)
+    else:
+        name = "company_name" if table == "companies" else "name"
+        query = f"""
+            SELECT {columns}, 0 FROM {table} t
+            WHERE t.{name} LIKE ? AND (0, t.id) > (?, ?)
+            ORDER BY t.id
+            LIMIT ?
+        """
+        params = (f"%{q}%", after_rank, after_id, limit)
+    return db.execute(query, params).fetchall()
+
+
+def search_company_names(q: str, limit=SEARCH_LIMIT, after=None):
+    """Return up to `limit` companies matching `q`, best matches first.
+
+    Uses the `search_names` full-text index when it has been built and falls
+    back to a scan for names containing `q`. Pass the (rank, id) of the last
+    company of a page as `after` to get the next page.
+    """
+    columns = """
+        t.id, t.company_name, t.company_number, t.company_type,
+        t.entity_status, t.registration_date
+    """
+    rows = _search_rows(get_db(), "companies", columns, q, limit, after)
     return [
         {
             "id": row[0],
@@ -35,65 +144,100 @@ def search_company_names(q: str):
             "company_type": row[3],
             "status": row[4],
             "registration_date": row[5],
+            "rank": row[6],
         }
-        for row in cursor.fetchall()
+        for row in rows
     ]
 
 
-def search_individual_names(q: str):
-    db = get_db()
-    cursor = db.cursor()
-
-    query = "SELECT id, name FROM individuals WHERE name LIKE ?"
-    cursor.execute(query, (f"%{q}%",))
+def search_individual_names(q: str, limit=SEARCH_LIMIT, after=None):
+    """Return up to `limit` individuals matching `q`, best matches first."""
+    rows = _search_rows(get_db(), "individuals", "t.id, t.name", q, limit, after)
     return [
         {
             "id": row[0],
             "type": "individual",
             "name": row[1],
+            "rank": row[2],
         }
-        for row in cursor.fetchall()
+        for row in rows
     ]
 
 
+COMPANY_COLUMNS = """
+    id, company_name, company_number, company_type, entity_status,
+    registration_date, office_address, postal_address, lastseen
+"""
+
+
+def _company(row):
+    return {
+        "id": row[0],
+        "type": "company",
+        "name": row[1],
+        "number": row[2],
+        "company_type": row[3],
+        "status": row[4],
+        "registration_date": row[5],
+        "office_address": row[6],
+        "postal_address": row[7],
+        "lastseen": row[8],
+    }
+
+
+def _individual(row):
+    return {
+        "id": row[0],
+        "type": "individual",
+        "name": row[1],
+    }
+
+
 def get_company_by_id(node_id):
     db = get_db()
-    query = "SELECT company_name, company_number, company_type, entity_status, registration_date, office_address, postal_address, lastseen FROM companies WHERE id = ?"
+    query = f"SELECT {COMPANY_COLUMNS} FROM companies WHERE id = ?"
     result = db.execute(query, (node_id,)).fetchone()
-    return (
-        {
-            "id": node_id,
-            "type": "company",
-            "name": result[0],
-            "number": result[1],
-            "company_type": result[2],
-            "status": result[3],
-            "registration_date": result[4],
-            "office_address": result[5],
-            "postal_address": result[6],
-            "lastseen": result[7],
-        }
-        if result
-        else None
-    )
+    return _company(result) if result else None
 
 
 def get_individual_by_id(node_id):
     db = get_db()
-    query = "SELECT name FROM individuals WHERE id = ?"
+    query = "SELECT id, name FROM individuals WHERE id = ?"
     result = db.execute(query, (node_id,)).fetchone()
-    return (
-        {
-            "id": node_id,
-            "type": "individual",
-            "name": result[0],
-        }
-        if result
-        else None
-    )
+    return _individual(result) if result else None
+
+
+def get_nodes_by_ids(node_ids):
+    """Return the companies and individuals with keys like "e-123", in order.
 
+    Runs one query per node type however many keys there are. The ids are
+    passed as a single JSON array so the statement is the same every time.
+    Keys of nodes not in the graph db are left out.
+    """
+    ids = {"e": [], "i": []}
+    for node_id in node_ids:
+        prefix, _, db_id = str(node_id).partition("-")
+        if prefix in ids and db_id.isdigit():
+            ids[prefix].append(int(db_id))
 
-@cache.memoize()
+    db = get_db()
+    nodes = {}
+    for prefix, table, columns, item in [
+        ("e", "companies", COMPANY_COLUMNS, _company),
+        ("i", "individuals", "id, name", _individual),
+    ]:
+        if not ids[prefix]:
+            continue
+        query = f"""
+            SELECT {columns} FROM {table}
+            WHERE id IN (SELECT value FROM json_each(?))
+        """
+        for row in db.execute(query, (json.dumps(ids[prefix]),)):
+            nodes[f"{prefix}-{row[0]}"] = item(row)
+    return [nodes[node_id] for node_id in node_ids if node_id in nodes]
+
+
+@cache.memoize(make_name=versioned_name)
 def get_latest_registered_companies(limit=10):
     db = get_db()
     query = """
@@ -118,7 +262,7 @@ def get_latest_registered_companies(limit=10):
     ]
 
 
-@cache.memoize()
+@cache.memoize(make_name=versioned_name)
 def get_oldest_registered_companies(limit=10):
     db = get_db()
     query = """
@@ -143,7 +287,7 @@ def get_oldest_registered_companies(limit=10):
     ]
 
 
-@cache.memoize()
+@cache.memoize(make_name=versioned_name)
 def get_latest_updated_companies(limit=10):
     db = get_db()
     query = """
@@ -168,7 +312,7 @@ def get_latest_updated_companies(limit=10):
     ]
 
 
-@cache.memoize()
+@cache.memoize(make_name=versioned_name)
 def _get_min_max_company_ids():
     db = get_db()
     query = "SELECT MIN(ROWID), MAX(ROWID) FROM companies"
@@ -176,7 +320,7 @@ def _get_min_max_company_ids():
     return min_id, max_id
 
 
-@cache.memoize(timeout=15)
+@cache.memoize(timeout=15, make_name=versioned_name)
 def get_random_company_id():
     db = get_db()
     min_id, max_id = _get_min_max_company_ids()
@@ -195,7 +339,7 @@ def get_random_company_id():
     return result[0]
 
 
-@cache.memoize()
+@cache.memoize(make_name=versioned_name)
 def get_db_counter_stats():
     db = get_db()
     query = "SELECT COUNT(id) FROM individuals"
@@ -216,3 +360,148 @@ def get_db_counter_stats():
         "shareholders": shareholders_result[0],
         "directors": directors_result[0],
     }
+
+
+@cache.memoize(make_name=versioned_name)
+def get_ultimate_owners(company_id, limit=100):
+    """Return the individuals owning a company directly or through other companies.
+
+    Returns None when the ownership table has not been built.
+    """
+    db = get_db()
+    if not _table_exists(db, "ultimate_ownership"):
+        return None
+    query = """
+        SELECT o.individual_id, i.name, o.ownership
+        FROM derived.ultimate_ownership o
+        JOIN individuals i ON i.id = o.individual_id
+        WHERE o.company_id = ?
+        ORDER BY o.ownership DESC
+        LIMIT ?
+    """
+    results = db.execute(query, (company_id, limit)).fetchall()
+    return [
+        {
+            "id": result[0],
+            "type": "individual",
+            "name": result[1],
+            "ownership": result[2],
+        }
+        for result in results
+    ]
+
+
+SIGNIFICANCE_METRICS = ("pagerank", "betweenness", "degree", "weighted_in_degree")
+
+
+@cache.memoize(make_name=versioned_name)
+def get_significant_nodes(metric="pagerank", limit=50):
+    """Return the highest scoring nodes by one of `SIGNIFICANCE_METRICS`.
+
+    Returns None when the metrics table has not been built.
+    """
+    if metric not in SIGNIFICANCE_METRICS:
+        msg = f"Unknown metric {metric}"
+        raise ValueError(msg)
+    db = get_db()
+    if not _table_exists(db, "node_metrics"):
+        return None
+    query = f"""
+        SELECT m.node_type, m.node_id, c.company_name, c.company_number,
+            c.company_type, c.entity_status, c.registration_date, i.name
+        FROM derived.node_metrics m
+        LEFT JOIN companies c ON m.node_type = 'entity' AND c.id = m.node_id
+        LEFT JOIN individuals i ON m.node_type = 'individual' AND i.id = m.node_id
+        ORDER BY m.{metric} DESC
+        LIMIT ?
+    """
+    results = db.execute(query, (limit,)).fetchall()
+    return [
+        {
+            "id": result[1],
+            "type": "company",
+            "name": result[2],
+            "number": result[3],
+            "company_type": result[4],
+            "status": result[5],
+            "registration_date": result[6],
+        }
+        if result[0] == "entity"
+        else {
+            "id": result[1],
+            "type": "individual",
+            "name": result[7],
+        }
+        for result in results
+    ]
+
+
+@cache.memoize(make_name=versioned_name)
+def get_node_community(node_type: str, node_id: int):
+    """Return the community of a node, or None if it is unknown or not built."""
+    db = get_db()
+    if not _table_exists(db, "node_clusters"):
+        return None
+    query = (
+        "SELECT community FROM derived.node_clusters"
+        " WHERE node_type = ? AND node_id = ?"
+    )
+    result = db.execute(query, (node_type, node_id)).fetchone()
+    return result[0] if result else None
+
+
+@cache.memoize(make_name=versioned_name)
+def get_community_members(community: int):
+    """Return the (node_type, node_id) of every node in a community.
+
+    Returns None when the clusters table has not been built.
+    """
+    db = get_db()
+    if not _table_exists(db, "node_clusters"):
+        return None
+    query = "SELECT node_type, node_id FROM derived.node_clusters WHERE community = ?"
+    return [tuple(row) for row in db.execute(query, (community,)).fetchall()]
+
+
+@cache.memoize(make_name=versioned_name)
+def get_ownership_cycles(limit=50, max_holdings=20):
+    """Return the largest circular shareholdings with up to `max_holdings` each.
+
+    Returns None when the cycles table has not been built.
+    """
+    db = get_db()
+    if not _table_exists(db, "ownership_cycles"):
+        return None
+    query = """
+        SELECT cycle_id, size, holdings FROM derived.ownership_cycles
+        ORDER BY cycle_id
+        LIMIT ?
+    """
+    cycles = {
+        row[0]: {"id": row[0], "size": row[1], "count": row[2], "holdings": []}
+        for row in db.execute(query, (limit,)).fetchall()
+    }
+    query = """
+        SELECT h.cycle_id, h.holder_id, holder.company_name,
+            h.company_id, company.company_name, h.share
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (
+                PARTITION BY cycle_id ORDER BY share DESC
+            ) AS position
+            FROM derived.ownership_cycle_holdings
+            WHERE cycle_id < ?
+        ) h
+        JOIN companies holder ON holder.id = h.holder_id
+        JOIN companies company ON company.id = h.company_id
+        WHERE h.position <= ?
+        ORDER BY h.cycle_id, h.position
+    """
+    for row in db.execute(query, (limit, max_holdings)).fetchall():
+        cycles[row[0]]["holdings"].append(
+            {
+                "holder": {"id": row[1], "name": row[2]},
+                "company": {"id": row[3], "name": row[4]},
+                "share": row[5],
+            }
+        )
+    return list(cycles.values())
@@ -0,0 +1,359 @@
+"""Graph exports streamed straight from the CSR arrays.
+
+Nodes and edges are encoded one at a time as the graph is walked and
+written out in chunks, so the memory used does not grow with the size of
+the export beyond the set of node indices.
+
+Subgraphs are streamed to the client as JSON. The full graph is written to
+gzip-compressed GraphML, GEXF or CSV files, one per graph version, which
+are then served as static files. They are written by the `export-graph`
+command, which the web app starts in a process of its own for an export
+that is missing, and a lock file next to each export makes sure only one
+process writes it.
+"""
+import csv
+import gzip
+import io
+import math
+import os
+from pathlib import Path
+import re
+import subprocess
+import sys
+import time
+from xml.sax.saxutils import escape, quoteattr
+
+from loguru import logger
+import orjson
+
+from app.csr import RELATIONSHIPS, CSRGraph
+
+# Bytes of encoded elements gathered before a chunk is written out
+CHUNK_SIZE = 64 * 1024
+# The app `export-graph` is run from
+APP = "app.main:create_app"
+# Seconds after which the lock of an export was left by a process that died
+EXPORT_LOCK_TIMEOUT = 60 * 60
+
+
+def collect_nodes(G: CSRGraph, source, depth, limit):
+    """Return the nodes within `depth` hops of `source`, ignoring direction.
+
+    Returns None as soon as more than `limit` nodes are found. `depth=None`
+    collects the whole connected component.
+    """
+    seen = {source}
+    frontier = [source]
+    hops = 0
+    while frontier and (depth is None or hops < depth):
+        next_frontier = []
+        for node in frontier:
+            for neighbor in G.neighbors(node):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    next_frontier.append(neighbor)
+            if len(seen) > limit:
+                return None
+        frontier = next_frontier
+        hops += 1
+    return seen
+
+
+def _nodes(subgraph):
+    for node, data in subgraph.nodes(data=True):
+        yield orjson.dumps(
+            {
+                "id": node,
+                "name": data["label"],
+                "type": data["type"],
+                "status": data["status"],
+            }
+        )
+
+
+def _edges(subgraph):
+    for source, target, data in subgraph.edges(data=True):
+        yield orjson.dumps({"source": source, "target": target, **data})
+
+
+def _chunked(parts):
+    """Join byte strings into chunks of about `CHUNK_SIZE` bytes."""
+    chunk, size = [], 0
+    for part in parts:
+        chunk.append(part)
+        size += len(part)
+        if size >= CHUNK_SIZE:
+            yield b"".join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield b"".join(chunk)
+
+
+def ndjson_lines(subgraph):
+    """Yield the subgraph as newline delimited JSON, nodes first then edges.
+
+    Each line is a Cytoscape element: `{"group": "nodes", "data": {...}}`.
+    """
+
+    def parts():
+        for node in _nodes(subgraph):
+            yield b'{"group":"nodes","data":%s}\n' % node
+        for edge in _edges(subgraph):
+            yield b'{"group":"edges","data":%s}\n' % edge
+
+    return _chunked(parts())
+
+
+def _separated(items):
+    for i, item in enumerate(items):
+        if i:
+            yield b","
+        yield item
+
+
+def json_document(subgraph):
+    """Yield the subgraph as one JSON document of Cytoscape elements.
+
+    The document has the shape `{"nodes": [{"data": {...}}], "edges": [...]}`.
+    """
+
+    def parts():
+        yield b'{"nodes":['
+        yield from _separated(b'{"data":%s}' % node for node in _nodes(subgraph))
+        yield b'],"edges":['
+        yield from _separated(b'{"data":%s}' % edge for edge in _edges(subgraph))
+        yield b"]}"
+
+    return _chunked(parts())
+
+
+def _graph_nodes(G: CSRGraph):
+    """Yield (key, label, type, status) for every node of the graph."""
+    for index in range(len(G)):
+        yield G.key(index), G.label(index), G.node_type(index), G.status(index)
+
+
+def _graph_edges(G: CSRGraph):
+    """Yield (source, target, relationship, weight) for every edge of the graph.
+
+    Sources and targets are node indices. Director edges have no weight.
+    """
+    for source in range(len(G)):
+        for target, edge in G.out_edges(source):
+            weight = G.edge_weights[edge]
+            yield (
+                source,
+                target,
+                RELATIONSHIPS[G.edge_relationships[edge]],
+                None if math.isnan(weight) else weight,
+            )
+
+
+# Control characters are not allowed in XML 1.0 documents
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _text(value):
+    return escape(_XML_INVALID.sub("", value or ""))
+
+
+def _attr(value):
+    return quoteattr(_XML_INVALID.sub("", value or ""))
+
+
+def graphml_chunks(G: CSRGraph):
+    """Yield the graph as a GraphML document."""
+
+    def parts():
+        yield (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+            '<key id="label" for="node" attr.name="label" attr.type="string"/>\n'
+            '<key id="type" for="node" attr.name="type" attr.type="string"/>\n'
+            '<key id="status" for="node" attr.name="status" attr.type="string"/>\n'
+            '<key id="relationship" for="edge" attr.name="relationship" '
+            'attr.type="string"/>\n'
+            '<key id="weight" for="edge" attr.name="weight" attr.type="double"/>\n'
+            '<graph id="vfsc" edgedefault="directed">\n'
+        )
+        for key, label, node_type, status in _graph_nodes(G):
+            status_data = f'<data key="status">{_text(status)}</data>' if status else ""
+            yield (
+                f'<node id="{key}"><data key="label">{_text(label)}</data>'
+                f'<data key="type">{node_type}</data>{status_data}</node>\n'
+            )
+        for source, target, relationship, weight in _graph_edges(G):
+            weight_data = (
+                "" if weight is None else f'<data key="weight">{weight}</data>'
+            )
+            yield (
+                f'<edge source="{G.key(source)}" target="{G.key(target)}">'
+                f'<data key="relationship">{relationship}</data>{weight_data}</edge>\n'
+            )
+        yield "</graph>\n</graphml>\n"
+
+    return _chunked(part.encode() for part in parts())
+
+
+def gexf_chunks(G: CSRGraph):
+    """Yield the graph as a GEXF 1.2 document for Gephi."""
+
+    def parts():
+        yield (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<gexf xmlns="http://www.gexf.net/1.2draft" version="1.2">\n'
+            '<graph defaultedgetype="directed">\n'
+            '<attributes class="node">'
+            '<attribute id="type" title="type" type="string"/>'
+            '<attribute id="status" title="status" type="string"/>'
+            "</attributes>\n"
+            '<attributes class="edge">'
+            '<attribute id="relationship" title="relationship" type="string"/>'
+            "</attributes>\n"
+            "<nodes>\n"
+        )
+        for key, label, node_type, status in _graph_nodes(G):
+            status_value = (
+                f'<attvalue for="status" value={_attr(status)}/>' if status else ""
+            )
+            yield (
+                f'<node id="{key}" label={_attr(label)}><attvalues>'
+                f'<attvalue for="type" value="{node_type}"/>{status_value}'
+                "</attvalues></node>\n"
+            )
+        yield "</nodes>\n<edges>\n"
+        for id, (source, target, relationship, weight) in enumerate(_graph_edges(G)):
+            weight_attr = "" if weight is None else f' weight="{weight}"'
+            yield (
+                f'<edge id="{id}" source="{G.key(source)}" '
+                f'target="{G.key(target)}"{weight_attr}>'
+                f'<attvalues><attvalue for="relationship" value="{relationship}"/>'
+                "</attvalues></edge>\n"
+            )
+        yield "</edges>\n</graph>\n</gexf>\n"
+
+    return _chunked(part.encode() for part in parts())
+
+
+def csv_chunks(G: CSRGraph):
+    """Yield the edge list of the graph as CSV with the names of both ends."""
+
+    def parts():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(
+            ["source", "source_name", "target", "target_name", "relationship", "weight"]
+        )
+        for source, target, relationship, weight in _graph_edges(G):
+            writer.writerow(
+                [
+                    G.key(source),
+                    G.label(source),
+                    G.key(target),
+                    G.label(target),
+                    relationship,
+                    weight,
+                ]
+            )
+            if buffer.tell() >= CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return (part.encode() for part in parts())
+
+
+EXPORT_FORMATS = {"graphml": graphml_chunks, "gexf": gexf_chunks, "csv": csv_chunks}
+
+
+def export_path(directory, version, fmt) -> Path:
+    """Return where the export of a graph version in a format is stored."""
+    return Path(directory) / f"graph-{version}.{fmt}.gz"
+
+
+def write_export(G: CSRGraph, fmt, path):
+    """Write the graph to a gzip-compressed file in one of `EXPORT_FORMATS`.
+
+    The file is written under a temporary name and moved into place, so it
+    is never read while partly written.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    chunks = EXPORT_FORMATS[fmt]
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with gzip.open(tmp, "wb", compresslevel=6) as f:
+            for chunk in chunks(G):
+                f.write(chunk)
+        tmp.replace(path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return path
+
+
+def _lock_path(path) -> Path:
+    path = Path(path)
+    return path.with_name(f"{path.name}.lock")
+
+
+def lock_export(path) -> bool:
+    """Take the lock on writing an export, or return False if it is held.
+
+    The lock file is created with O_EXCL, so of all the web workers and
+    commands asking for an export only one writes it. A lock older than
+    `EXPORT_LOCK_TIMEOUT` is taken over.
+    """
+    lock = _lock_path(path)
+    lock.parent.mkdir(parents=True, exist_ok=True)
+    for _ in range(2):
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            try:
+                age = time.time() - lock.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if age < EXPORT_LOCK_TIMEOUT:
+                return False
+            logger.warning(f"Taking over {lock}, left {age:.0f} seconds ago")
+            lock.unlink(missing_ok=True)
+    return False
+
+
+def unlock_export(path):
+    _lock_path(path).unlink(missing_ok=True)
+
+
+def remove_stale_exports(directory, version):
+    """Delete the exports of graph versions other than `version`."""
+    current = {export_path(directory, version, fmt) for fmt in EXPORT_FORMATS}
+    for path in Path(directory).glob("graph-*.gz"):
+        if path not in current:
+            path.unlink(missing_ok=True)
+
+
+def ensure_export(version, fmt, directory):
+    """Return the export of the graph version, or None if it is not written yet.
+
+    A missing export is written by `flask export-graph` in a new process, so
+    the worker serving the request goes on serving others. The request that
+    takes the export's lock starts it, and the command releases the lock.
+    """
+    path = export_path(directory, version, fmt)
+    if path.exists():
+        return path
+    if lock_export(path):
+        command = ["export-graph", "--format", fmt, "--graph-version", version]
+        try:
+            subprocess.Popen(
+                [sys.executable, "-m", "flask", "--app", APP, *command, "--locked"],
+                stdin=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+        except OSError:
+            unlock_export(path)
+            raise
+        logger.info(f"Started writing {path}")
+    return None
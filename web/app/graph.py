@@ -1,7 +1,21 @@
+import heapq
+from itertools import chain
+import math
+
+from flask import current_app
+from loguru import logger
 import networkx as nx
 
+from app.csr import CSRGraph
 from app.db.graph_db import get_db
-from app.extensions import cache
+from app.graph_store import get_db_version, graph_store
+from app.neighborhoods import NeighborhoodIndex
+from app.snapshot import load_snapshot
+from app.trigrams import TrigramIndex
+
+DEFAULT_MAX_NODES = 250
+# Edges examined by a budgeted subgraph before it stops expanding
+MAX_SCANNED_EDGES = 50_000
 
 
 def _fetch_graph_data():
@@ -34,114 +48,287 @@ def _fetch_graph_data():
     return companies, individuals, directors, shareholders
 
 
-def _construct_graph(companies, individuals, directors, shareholders):
-    G = nx.MultiDiGraph()
+def _iter_edges(companies, individuals, directors, shareholders, rejected):
+    """Yield (source, target, data) for every director and shareholder edge.
 
-    # Add company nodes
-    company_nodes = []
-    for company_id, company_name, entity_status in companies:
-        company_nodes.append(company_id)
-        G.add_node(
-            f"e-{company_id}",
-            label=company_name,
-            status=entity_status,
-            type="entity",
-        )
+    Runs in linear time: node membership is checked against sets and the
+    shareholder edge weights are computed from one grouped pass over the rows.
+    Rows that reference a company or individual missing from the graph are
+    skipped and counted per relationship in the `rejected` dict.
+    """
+    company_ids = {row[0] for row in companies}
+    individual_ids = {row[0] for row in individuals}
 
-    # Add individual nodes
-    individual_nodes = []
-    for individual_id, individual_name in individuals:
-        individual_nodes.append(individual_id)
-        G.add_node(
-            f"i-{individual_id}",
-            label=individual_name,
-            status=None,
-            type="individual",
-        )
+    def resolve(company_id, individual_id, entity_id):
+        if company_id not in company_ids:
+            return None
+        if individual_id and individual_id in individual_ids:
+            return f"i-{individual_id}"
+        if entity_id and entity_id in company_ids:
+            return f"e-{entity_id}"
+        return None
+
+    rejected.setdefault("director", 0)
+    rejected.setdefault("shareholder", 0)
 
-    # Add director edges
     for company_id, individual_id, entity_id in directors:
-        if individual_id and individual_id in individual_nodes:
-            G.add_edge(
-                f"i-{individual_id}",
-                f"e-{company_id}",
-                relationship="director",
-            )
-        elif entity_id and entity_id in company_nodes:
-            G.add_edge(
-                f"e-{entity_id}",
-                f"e-{company_id}",
-                relationship="director",
-            )
+        source = resolve(company_id, individual_id, entity_id)
+        if source is None:
+            rejected["director"] += 1
+            continue
+        yield source, f"e-{company_id}", {"relationship": "director"}
 
     # Calculate shareholder edge weight
     company_shares = {}
     for company_id, individual_id, entity_id, number_of_shares in shareholders:
-        if company_id not in company_shares:
-            company_shares[company_id] = {}
-        if individual_id:
-            company_shares[company_id][f"i-{individual_id}"] = number_of_shares
-        elif entity_id:
-            company_shares[company_id][f"e-{entity_id}"] = number_of_shares
-    company_shares_percentages = {}
-    for company_id, data in company_shares.items():
-        company_shares_percentages[company_id] = {}
-        total_shares = sum(map(lambda v: v, data.values()))
-        for key, value in data.items():
-            try:
-                company_shares_percentages[company_id][key] = value / total_shares
-            except ZeroDivisionError:
-                company_shares_percentages[company_id][key] = 1
-
-    # Add shareholder edges
+        holder = _holder_key(individual_id, entity_id)
+        if holder is not None:
+            holders = company_shares.setdefault(company_id, {})
+            holders[holder] = number_of_shares or 0
+    company_totals = {
+        company_id: sum(holders.values())
+        for company_id, holders in company_shares.items()
+    }
+
     for company_id, individual_id, entity_id, _ in shareholders:
-        if individual_id and individual_id in individual_nodes:
-            weight = company_shares_percentages[company_id][f"i-{individual_id}"]
-            G.add_edge(
-                f"i-{individual_id}",
-                f"e-{company_id}",
-                relationship="shareholder",
-                weight=weight,
-            )
-        elif entity_id and entity_id in company_nodes:
-            weight = company_shares_percentages[company_id][f"e-{entity_id}"]
-            G.add_edge(
-                f"e-{entity_id}",
-                f"e-{company_id}",
-                relationship="shareholder",
-                weight=weight,
-            )
+        source = resolve(company_id, individual_id, entity_id)
+        if source is None:
+            rejected["shareholder"] += 1
+            continue
+        total_shares = company_totals[company_id]
+        shares = company_shares[company_id][_holder_key(individual_id, entity_id)]
+        weight = shares / total_shares if total_shares else 1
+        yield source, f"e-{company_id}", {
+            "relationship": "shareholder",
+            "weight": weight,
+        }
+
+
+def _holder_key(individual_id, entity_id):
+    if individual_id:
+        return f"i-{individual_id}"
+    if entity_id:
+        return f"e-{entity_id}"
+    return None
+
+
+def _log_rejected(rejected):
+    if any(rejected.values()):
+        logger.warning(
+            f"Skipped {rejected['director']} director and "
+            f"{rejected['shareholder']} shareholder rows with dangling references"
+        )
+
+
+def _construct_graph(companies, individuals, directors, shareholders):
+    """Return a NetworkX graph of the companies database rows.
+
+    The count of rows rejected as dangling references is stored in
+    `G.graph["rejected"]`.
+    """
+    G = nx.MultiDiGraph()
+    G.add_nodes_from(
+        (
+            f"e-{company_id}",
+            {"label": company_name, "status": entity_status, "type": "entity"},
+        )
+        for company_id, company_name, entity_status in companies
+    )
+    G.add_nodes_from(
+        (
+            f"i-{individual_id}",
+            {"label": individual_name, "status": None, "type": "individual"},
+        )
+        for individual_id, individual_name in individuals
+    )
+
+    rejected = G.graph["rejected"] = {}
+    G.add_edges_from(
+        _iter_edges(companies, individuals, directors, shareholders, rejected)
+    )
+    _log_rejected(rejected)
+    return G
 
+
+def _construct_csr_graph(companies, individuals, directors, shareholders):
+    """Return a `CSRGraph` of the companies database rows."""
+    rejected = {}
+    G = CSRGraph.from_edges(
+        companies,
+        individuals,
+        _iter_edges(companies, individuals, directors, shareholders, rejected),
+    )
+    G.rejected = rejected
+    _log_rejected(rejected)
+    return G
+
+
+def _build_graph():
+    """Return the serving graph, preferring a compiled snapshot of the graph db."""
+    version = get_db_version(current_app.config["GRAPH_DB"])
+    G = load_snapshot(current_app.config["GRAPH_SNAPSHOT"], version)
+    if G is not None:
+        logger.info("Loaded graph from snapshot")
+    else:
+        companies, individuals, directors, shareholders = _fetch_graph_data()
+        G = _construct_csr_graph(companies, individuals, directors, shareholders)
+    G.neighborhoods = NeighborhoodIndex.load(
+        current_app.config["GRAPH_NEIGHBORHOODS"], version
+    )
+    G.trigrams = TrigramIndex.load(current_app.config["GRAPH_TRIGRAMS"], version)
     return G
 
 
-@cache.memoize()
 def load_graph():
-    """Return the NetworkX graph constructed from values in companies database.
+    """Return the compact CSR graph constructed from values in companies database.
 
-    This function is memoized for performance.
-    The backing database does not update often so no problem with extended caching.
+    The graph is built once per worker process and kept in memory by the graph
+    store; it is not passed through the page cache so no pickling is involved.
+    Use `_construct_graph` when a NetworkX graph is needed for analysis.
     """
-    companies, individuals, directors, shareholders = _fetch_graph_data()
-    return _construct_graph(companies, individuals, directors, shareholders)
+    return graph_store.get(_build_graph)
 
 
-@cache.memoize()
-def _calculate_subgraph_nodes(G, node_id: str, depth: int, reverse: bool = False):
-    """Return list of nodes connected to the given node_id."""
-    return list(nx.bfs_tree(G, node_id, depth_limit=depth, reverse=reverse))
+def _node_index(G, node_id):
+    index = G.index(node_id)
+    if index is None:
+        err_msg = f"Node {node_id} not found in the graph"
+        raise ValueError(err_msg)
+    return index
 
 
 def extract_subgraph(G, node_id, depth: int = 1):
     """Return a subgraph for the given node ID.
 
-    NOTE: subgraph can not be memoized because it can not be pickled.
+    Includes nodes within `depth` hops ignoring edge direction. The nodes are
+    read from the precomputed neighborhood index when it covers the node.
     """
-    if node_id not in G:
-        err_msg = f"Node {node_id} not found in the graph"
-        raise ValueError(err_msg)
-
-    subgraph_nodes = _calculate_subgraph_nodes(G, node_id, depth)
-    reverse_subgraph_nodes = _calculate_subgraph_nodes(G, node_id, depth, reverse=True)
-    nodes = list(set(subgraph_nodes) | set(reverse_subgraph_nodes))
+    index = _node_index(G, node_id)
+    nodes = G.neighborhoods.get(index, depth) if G.neighborhoods else None
+    if nodes is None:
+        nodes = G.bfs_nodes(index, depth, undirected=True)
     return G.subgraph(nodes)
+
+
+def expand_node(G, node_id, exclude=(), max_nodes=DEFAULT_MAX_NODES):
+    """Return the neighbors of a node that are not among `exclude`.
+
+    The result is a delta for a client that already has the `exclude` nodes:
+    it holds the node if it is not excluded, its highest ranked new neighbors
+    up to `max_nodes`, and the edges linking them to each other and to the
+    excluded nodes. Unknown IDs in `exclude` are ignored.
+    """
+    index = _node_index(G, node_id)
+    known = {i for i in map(G.index, exclude) if i is not None}
+    ranked, left_out, _ = _rank_neighbors(
+        G, index, known | {index}, max_nodes, MAX_SCANNED_EDGES
+    )
+    hidden = {index: left_out} if left_out else {}
+    return G.subgraph(
+        [index, *ranked],
+        hidden=hidden,
+        max_edges=4 * max_nodes,
+        known=known,
+        center=index,
+    )
+
+
+def cytoscape_elements(nodes, edges):
+    """Return (node, data) and (source, target, data) pairs as Cytoscape elements."""
+    return {
+        "nodes": [
+            {
+                "data": {
+                    "id": node,
+                    "name": data["label"],
+                    "type": data["type"],
+                    "status": data["status"],
+                    "anchor": data.get("anchor"),
+                }
+            }
+            for node, data in nodes
+        ],
+        "edges": [
+            {
+                "data": {
+                    "source": source,
+                    "target": target,
+                    "relationship": data["relationship"],
+                }
+            }
+            for source, target, data in edges
+        ],
+    }
+
+
+def subgraph_elements(subgraph):
+    """Return the nodes and edges of a subgraph as Cytoscape elements."""
+    return cytoscape_elements(subgraph.nodes(data=True), subgraph.edges(data=True))
+
+
+def _rank_neighbors(G, index, seen, room, max_scan):
+    """Return the best `room` unseen neighbors of a node and how many were left.
+
+    Neighbors are ranked by their largest shareholding in or of the node, then
+    by degree, so controlling shareholders and hubs are kept first. At most
+    `max_scan` edges are examined; neighbors behind the rest count as left out.
+    """
+    weights = {}
+    edges = chain(G.out_edges(index), G.incoming_edges(index))
+    scanned = 0
+    for neighbor, edge in edges:
+        if scanned == max_scan:
+            break
+        scanned += 1
+        if neighbor in seen:
+            continue
+        weight = G.edge_weights[edge]
+        weight = 0.0 if math.isnan(weight) else weight
+        if weights.get(neighbor, -1.0) < weight:
+            weights[neighbor] = weight
+    ranked = heapq.nlargest(room, weights, key=lambda n: (weights[n], G.degree(n)))
+    left_out = len(weights) - len(ranked) + G.degree(index) - scanned
+    return ranked, left_out, scanned
+
+
+def extract_budgeted_subgraph(
+    G, node_id, depth: int = 1, max_nodes=DEFAULT_MAX_NODES, max_edges=None
+):
+    """Return a subgraph for the given node ID that fits within a budget.
+
+    Expands up to `depth` hops ignoring edge direction, keeping the highest
+    ranked neighbors of each node until `max_nodes` nodes are included or
+    `MAX_SCANNED_EDGES` edges have been examined, and returns at most
+    `max_edges` edges (four per node by default), nearest the node first.
+    Nodes whose neighbors or edges did not all fit get an aggregate
+    "N more hidden" node, so the work done and the size of the result are
+    bounded whatever the degree of the nodes involved.
+    """
+    index = _node_index(G, node_id)
+    if max_edges is None:
+        max_edges = 4 * max_nodes
+
+    nodes = G.neighborhoods.get(index, depth) if G.neighborhoods else None
+    if nodes is not None and len(nodes) <= max_nodes:
+        return G.subgraph(nodes, max_edges=max_edges, center=index)
+
+    seen = {index}
+    hidden = {}
+    frontier = [index]
+    budget = MAX_SCANNED_EDGES
+    for _ in range(depth):
+        next_frontier = []
+        for node in frontier:
+            room = max_nodes - len(seen)
+            if room <= 0 or budget <= 0:
+                break
+            ranked, left_out, scanned = _rank_neighbors(G, node, seen, room, budget)
+            budget -= scanned
+            seen.update(ranked)
+            next_frontier.extend(ranked)
+            if left_out:
+                hidden[node] = left_out
+        if not next_frontier:
+            break
+        frontier = next_frontier
+    return G.subgraph(seen, hidden=hidden, max_edges=max_edges, center=index)
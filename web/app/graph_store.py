@@ -0,0 +1,204 @@
+import hashlib
+import os
+from pathlib import Path
+import threading
+import time
+
+from flask import g, has_app_context, request
+from loguru import logger
+
+from app.snapshot import read_header
+
+
+def get_db_version(db_path) -> str:
+    """Return a version tag for the graph database file.
+
+    The tag changes whenever the file is replaced or rewritten so it can be used
+    to tell graphs built from different copies of the database apart.
+    """
+    st = Path(db_path).stat()
+    return f"{st.st_ino:x}-{st.st_mtime_ns:x}-{st.st_size:x}"
+
+
+def _file_version(path):
+    try:
+        return get_db_version(path)
+    except FileNotFoundError:
+        return None
+
+
+class GraphStore:
+    """Holds the graph used for serving requests in process memory.
+
+    The graph is built once per worker process and handed out by reference,
+    so a request never has to read or unpickle it from the page cache.
+
+    A watcher thread polls the files the served pages are built from: the
+    graph db, the snapshot and indexes compiled from it and the derived db of
+    tables computed from the graph. Once a change has settled for a poll, a
+    new graph is loaded alongside the current one and swapped in; requests
+    that already hold the old graph keep using it until they finish.
+
+    The watcher only runs in the workers. A gunicorn master that preloaded
+    the graph calls `refresh` before forking each worker, so new workers do
+    not start from the graph it loaded at startup.
+
+    A replaced graph db is only loaded once `compile-graph` has written its
+    snapshot, so every worker maps the same snapshot instead of rebuilding
+    the graph from SQL, and the commands run in between do not each cause a
+    reload. Without a snapshot file the graph is rebuilt from the graph db.
+    A change to the derived db alone keeps the graph and only changes the
+    version.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._current = None  # (sources, version, graph)
+        self._builder = None
+        self._watcher_pid = None
+        self._waiting_for = None
+        self.app = None
+        self.db_path = None
+        self.snapshot_path = None
+        self.paths = ()
+        self.reload_interval = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.db_path = Path(app.config["GRAPH_DB"])
+        self.snapshot_path = Path(app.config["GRAPH_SNAPSHOT"])
+        # The graph is built from all but the last, the derived db
+        self.paths = (
+            self.db_path,
+            self.snapshot_path,
+            Path(app.config["GRAPH_NEIGHBORHOODS"]),
+            Path(app.config["GRAPH_TRIGRAMS"]),
+            Path(app.config["GRAPH_DERIVED_DB"]),
+        )
+        self.reload_interval = app.config["GRAPH_RELOAD_INTERVAL"]
+        app.graph_store = self
+        # Started on the first request so only the serving processes watch
+        app.before_request(self._ensure_watcher)
+
+    @property
+    def version(self):
+        """Version of the served graph and derived tables, for cache keys."""
+        current = self.pinned()
+        return current[1] if current else None
+
+    @property
+    def db_version(self):
+        """Version of the graph db the served graph was built from."""
+        current = self.pinned()
+        return current[0][0] if current else None
+
+    def _sources(self):
+        return tuple(_file_version(path) for path in self.paths)
+
+    def _publish(self, sources, graph):
+        tag = hashlib.blake2b(repr(sources).encode(), digest_size=8).hexdigest()
+        self._current = (sources, tag, graph)
+
+    def pinned(self):
+        """Return the (sources, version, graph) of the current app context.
+
+        The first call in a request takes the graph being served, and later
+        calls return the same one, so a graph swapped in during the request
+        is never mixed with the one it started with or with its version.
+        """
+        if not has_app_context():
+            return self._current
+        current = g.get("_graph_store_current")
+        if current is None and self._current is not None:
+            current = g._graph_store_current = self._current
+        return current
+
+    def get(self, builder):
+        """Return the graph, calling `builder` to construct it on first use."""
+        if self._current is None:
+            with self._lock:
+                if self._current is None:
+                    self._builder = builder
+                    sources = self._sources()
+                    self._publish(sources, builder())
+        return self.pinned()[2]
+
+    def _snapshot_pending(self, db_version):
+        header = read_header(self.snapshot_path)
+        return header is not None and header["source_version"] != db_version
+
+    def reload(self, sources=None):
+        """Swap in the graph and version of the current files."""
+        sources = sources or self._sources()
+        current_sources, _, graph = self._current
+        if sources[:-1] != current_sources[:-1]:
+            if self._snapshot_pending(sources[0]):
+                # Keep serving the current graph until compile-graph has run
+                if self._waiting_for != sources[0]:
+                    self._waiting_for = sources[0]
+                    logger.info("Graph db changed; waiting for its snapshot")
+                sources = (*current_sources[:-1], sources[-1])
+            else:
+                with self.app.app_context():
+                    graph = self._builder()
+                if self._sources()[:-1] != sources[:-1]:
+                    logger.info("Graph files changed while reloading; retrying later")
+                    return
+        if sources != current_sources:
+            self._publish(sources, graph)
+            logger.info(f"Reloaded graph version {self._current[1]}")
+
+    def refresh(self):
+        """Reload now if the files changed since the graph was loaded.
+
+        Called by gunicorn in the master before it forks a worker, so a worker
+        started after a new graph was published, such as one replacing a
+        recycled worker, begins with that graph instead of the preloaded one.
+        """
+        if self._current is None or self._builder is None:
+            return
+        sources = self._sources()
+        if sources != self._current[0]:
+            self.reload(sources)
+
+    def _ensure_watcher(self):
+        if not self.reload_interval or self._watcher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._watcher_pid != os.getpid():
+                self._watcher_pid = os.getpid()
+                thread = threading.Thread(target=self._watch, daemon=True)
+                thread.start()
+
+    def _watch(self):
+        logger.debug("Starting graph db watcher")
+        previous = None
+        while True:
+            time.sleep(self.reload_interval)
+            try:
+                sources = self._sources()
+                # Wait for a change to settle, as publishing runs several commands
+                if (
+                    self._builder
+                    and sources == previous
+                    and sources != self._current[0]
+                ):
+                    self.reload(sources)
+                previous = sources
+            except Exception as e:
+                logger.exception(f"Error reloading graph: {e}")
+
+
+graph_store = GraphStore()
+
+
+def versioned_name(name):
+    """Prefix a cache key or memoized function name with the graph version."""
+    return f"{graph_store.version}:{name}"
+
+
+def versioned_view_key():
+    """Return the `cache.cached` key for the current view and graph version."""
+    return versioned_name(f"view/{request.path}")
@@ -0,0 +1,79 @@
+"""Force-directed node positions computed on the server.
+
+Positions come from the Fruchterman-Reingold algorithm: every pair of nodes
+repels, linked nodes attract, and the distance a node may move each round
+shrinks until the layout settles. Each round is a few NumPy operations over
+all pairs of nodes, so a page of a few hundred nodes is laid out in tens of
+milliseconds and the browser only has to draw it. The cost grows with the
+square of the number of nodes, so larger pages are sent without positions
+and laid out by the browser as before.
+"""
+import numpy as np
+
+DEFAULT_ITERATIONS = 50
+# Typical distance in pixels between linked nodes
+EDGE_LENGTH = 100
+# Largest graph laid out on the server, about 70 ms
+MAX_LAYOUT_NODES = 500
+
+
+def force_layout(n, sources, targets, iterations=DEFAULT_ITERATIONS, seed=0):
+    """Return an (n, 2) array of positions for a graph of `n` nodes.
+
+    `sources` and `targets` are arrays of node indices, one pair per edge.
+    The same graph and seed always give the same layout.
+    """
+    if n < 2:
+        return np.zeros((n, 2))
+    rng = np.random.default_rng(seed)
+    # Single precision halves the memory traffic of the all-pairs arrays
+    x, y = rng.random((2, n), dtype=np.float32)
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+
+    # Optimal distance between nodes in the unit square
+    k = np.float32(np.sqrt(1 / n))
+    temperature = 0.1
+    cooling = temperature / (iterations + 1)
+    for _ in range(iterations):
+        dx = x[:, None] - x[None, :]
+        dy = y[:, None] - y[None, :]
+        # Repulsion k^2 / d along each pair, as k^2 / d^2 times the offset
+        repulsion = dx * dx
+        repulsion += dy * dy
+        np.maximum(repulsion, 1e-4, out=repulsion)
+        np.divide(k * k, repulsion, out=repulsion)
+        move_x = (dx * repulsion).sum(axis=1)
+        move_y = (dy * repulsion).sum(axis=1)
+
+        # Attraction d^2 / k along each edge
+        edge_x, edge_y = x[sources] - x[targets], y[sources] - y[targets]
+        pull = np.hypot(edge_x, edge_y) / k
+        for move, edge in ((move_x, edge_x), (move_y, edge_y)):
+            np.subtract.at(move, sources, edge * pull)
+            np.add.at(move, targets, edge * pull)
+
+        length = np.maximum(np.hypot(move_x, move_y), 0.01)
+        x += move_x * (temperature / length)
+        y += move_y * (temperature / length)
+        temperature -= cooling
+
+    positions = np.column_stack([x, y]).astype(np.float64)
+    positions -= positions.mean(axis=0)
+    return positions * (EDGE_LENGTH / k)
+
+
+def add_positions(payload, iterations=DEFAULT_ITERATIONS, seed=0):
+    """Add the x and y columns of preset positions to a graph payload in place.
+
+    `payload` is a columnar payload from `app.payload`. A payload of more than
+    `MAX_LAYOUT_NODES` nodes is returned without positions.
+    """
+    nodes, edges = payload["nodes"], payload["edges"]
+    if len(nodes["id"]) > MAX_LAYOUT_NODES:
+        return payload
+    positions = force_layout(
+        len(nodes["id"]), edges["source"], edges["target"], iterations, seed
+    )
+    nodes["x"], nodes["y"] = positions.round(1).T.tolist()
+    return payload
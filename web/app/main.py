@@ -4,8 +4,20 @@ import sys
 
 from flask import Flask, send_from_directory
 from loguru import logger
+from werkzeug.exceptions import HTTPException
 
 from app.background_tasks import background_tasks
+from app.commands import (
+    build_centrality_command,
+    build_clusters_command,
+    build_cycles_command,
+    build_neighborhood_index_command,
+    build_ownership_command,
+    build_search_index_command,
+    build_trigram_index_command,
+    compile_graph_command,
+    export_graph_command,
+)
 from app.db.app_db import (
     close_db as close_app_db,
 )
@@ -14,12 +26,14 @@ from app.db.app_db import (
 )
 from app.db.graph_db import close_db as close_graph_db
 from app.extensions import cache
+from app.graph import load_graph
+from app.graph_store import graph_store
+from app.views.api_view import api_bp
 from app.views.graph_view import graph_bp
 from app.views.home_view import home_bp
 
 
 def create_app():
-
     app = Flask(__name__, instance_relative_config=True)
     app.config.from_object("config.Config")
 
@@ -30,6 +44,8 @@ def create_app():
     register_template_filters(app)
     register_errorhandlers(app)
     register_favicon(app)
+    register_commands(app)
+    preload_graph(app)
 
     return app
 
@@ -61,11 +77,25 @@ def setup_db(app):
 def register_extensions(app):
     background_tasks.init_app(app)
     cache.init_app(app)
+    graph_store.init_app(app)
+
+
+def preload_graph(app):
+    """Load the graph while the app is created instead of on the first request.
+
+    With a compiled snapshot this only memory-maps the file.
+    """
+    if not app.config["GRAPH_DB"].exists():
+        logger.warning(f"Graph db {app.config['GRAPH_DB']} not found; skipping preload")
+        return
+    with app.app_context():
+        load_graph()
 
 
 def register_blueprints(app):
     app.register_blueprint(home_bp)
     app.register_blueprint(graph_bp)
+    app.register_blueprint(api_bp)
 
 
 def register_template_filters(app):
@@ -83,10 +113,25 @@ def register_template_filters(app):
 def register_errorhandlers(app):
     @app.errorhandler(Exception)
     def handle_unexpected_error(e):
+        if isinstance(e, HTTPException):
+            # Not found, method not allowed and the like keep their status
+            return e
         logger.exception(f"An unhandled exception occurred: {e}")
         return "An error occurred", 500
 
 
+def register_commands(app):
+    app.cli.add_command(compile_graph_command)
+    app.cli.add_command(build_neighborhood_index_command)
+    app.cli.add_command(build_trigram_index_command)
+    app.cli.add_command(build_ownership_command)
+    app.cli.add_command(build_centrality_command)
+    app.cli.add_command(build_clusters_command)
+    app.cli.add_command(build_cycles_command)
+    app.cli.add_command(build_search_index_command)
+    app.cli.add_command(export_graph_command)
+
+
 def register_favicon(app):
     @app.route("/favicon.ico")
     def favicon():
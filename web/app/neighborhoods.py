@@ -0,0 +1,74 @@
+"""Precomputed undirected 1-hop and 2-hop neighborhoods of every node.
+
+Each neighborhood is stored as a sorted array of node indices, including the
+node itself, in CSR form so that looking one up is a single slice of a
+memory-mapped file. Neighborhoods larger than `max_size` are not stored; an
+empty slice means the caller has to fall back to a live BFS.
+"""
+from array import array
+
+from app.csr import CSRGraph
+from app.snapshot import read_arrays, write_arrays
+
+DEFAULT_MAX_SIZE = 1000
+
+
+class NeighborhoodIndex:
+    def __init__(self, hop1_offsets, hop1_nodes, hop2_offsets, hop2_nodes):
+        self.offsets = {1: hop1_offsets, 2: hop2_offsets}
+        self.nodes = {1: hop1_nodes, 2: hop2_nodes}
+
+    @classmethod
+    def build(cls, G: CSRGraph, max_size=DEFAULT_MAX_SIZE):
+        hop1_offsets, hop1_nodes = array("I", [0]), array("I")
+        for index in range(len(G)):
+            hop1_nodes.extend(sorted({index, *G.neighbors(index)}))
+            hop1_offsets.append(len(hop1_nodes))
+
+        def hop1(index):
+            return hop1_nodes[hop1_offsets[index] : hop1_offsets[index + 1]]
+
+        hop2_offsets, hop2_nodes = array("I", [0]), array("I")
+        for index in range(len(G)):
+            neighbors = hop1(index)
+            # A neighbor with too many neighbors of its own overflows the budget
+            if all(len(hop1(n)) <= max_size for n in neighbors):
+                nodes = set().union(*(hop1(n) for n in neighbors))
+                if len(nodes) <= max_size:
+                    hop2_nodes.extend(sorted(nodes))
+            hop2_offsets.append(len(hop2_nodes))
+
+        return cls(hop1_offsets, hop1_nodes, hop2_offsets, hop2_nodes)
+
+    def get(self, index, depth):
+        """Return the sorted neighborhood of a node, or None if not stored."""
+        if depth not in self.offsets:
+            return None
+        offsets = self.offsets[depth]
+        nodes = self.nodes[depth][offsets[index] : offsets[index + 1]]
+        return nodes if len(nodes) else None
+
+    def nbytes(self):
+        return sum(
+            memoryview(buffer).nbytes
+            for buffers in (self.offsets, self.nodes)
+            for buffer in buffers.values()
+        )
+
+    def write(self, path, source_version: str):
+        arrays = {
+            "hop1_offsets": self.offsets[1],
+            "hop1_nodes": self.nodes[1],
+            "hop2_offsets": self.offsets[2],
+            "hop2_nodes": self.nodes[2],
+        }
+        return write_arrays(path, arrays, source_version)
+
+    @classmethod
+    def load(cls, path, source_version: str):
+        """Return the index backed by a memory-mapped file, or None."""
+        index = read_arrays(path, source_version)
+        if index is None:
+            return None
+        _, arrays = index
+        return cls(**arrays)
@@ -0,0 +1,83 @@
+"""Effective ownership of companies by individuals through shareholder chains.
+
+Shareholder edge weights are the fraction of a company's shares held by the
+holder. With `D` the individuals-by-companies matrix of direct holdings and
+`A` the companies-by-companies matrix of holdings between companies, the
+effective ownership is the sum over chain lengths `D + DA + DA^2 + ...`.
+Each term is a sparse matrix product. Stakes a hundred times smaller than
+the threshold are dropped from each term as it is found, so the series ends
+once every chain has thinned out. Circular holdings make the series decay
+rather than end; it is cut off after `max_depth` terms and the totals are
+capped at 1 before stakes below the threshold are dropped.
+"""
+import numpy as np
+import scipy.sparse as sp
+
+from app.csr import SHAREHOLDER, CSRGraph
+
+DEFAULT_THRESHOLD = 0.01
+DEFAULT_MAX_DEPTH = 20
+
+
+def _holding_matrix(G: CSRGraph):
+    """Return the nodes-by-companies matrix of direct shareholdings."""
+    n, n_entities = len(G), G.n_entities
+    out_offsets = np.asarray(G.out_offsets, dtype=np.int64)
+    sources = np.repeat(np.arange(n), np.diff(out_offsets))
+    targets = np.asarray(G.out_targets)
+    weights = np.asarray(G.edge_weights, dtype=np.float64)
+    is_share = np.asarray(G.edge_relationships) == SHAREHOLDER
+    sources, targets, weights = sources[is_share], targets[is_share], weights[is_share]
+
+    # A holder listed twice for a company is one holding, not two
+    _, first = np.unique(sources * n_entities + targets, return_index=True)
+    holdings = sp.csc_matrix(
+        (weights[first], (sources[first], targets[first])), shape=(n, n_entities)
+    )
+    # Companies without share counts give every holder a weight of 1
+    totals = np.asarray(holdings.sum(axis=0)).ravel()
+    scale = 1 / np.maximum(totals, 1)
+    return (holdings @ sp.diags(scale)).tocsr()
+
+
+def _prune(matrix, threshold):
+    matrix.data[matrix.data < threshold] = 0
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def compute_ownership(
+    G: CSRGraph, threshold=DEFAULT_THRESHOLD, max_depth=DEFAULT_MAX_DEPTH
+):
+    """Return the individuals-by-companies sparse matrix of effective ownership.
+
+    Row `i` is the individual at graph index `G.n_entities + i` and column `c`
+    the company at graph index `c`. Stakes below `threshold` are left out.
+    """
+    holdings = _holding_matrix(G)
+    companies = holdings[: G.n_entities]
+    # Treasury shares do not pass ownership on
+    companies = companies - sp.diags(companies.diagonal())
+    tolerance = threshold / 100
+    term = _prune(holdings[G.n_entities :].copy(), tolerance)
+    total = term.copy()
+    for _ in range(max_depth - 1):
+        term = _prune(term @ companies, tolerance)
+        if not term.nnz:
+            break
+        total += term
+    total.data = np.minimum(total.data, 1)
+    return _prune(total.tocoo(), threshold)
+
+
+def ownership_rows(G: CSRGraph, ownership):
+    """Yield (company_id, individual_id, ownership) rows for the graph db."""
+    ids = np.asarray(G.ids)
+    company_ids = ids[ownership.col]
+    individual_ids = ids[G.n_entities + ownership.row]
+    return zip(
+        company_ids.tolist(),
+        individual_ids.tolist(),
+        ownership.data.tolist(),
+        strict=True,
+    )
@@ -0,0 +1,179 @@
+"""Shortest connections between two nodes of the graph.
+
+Paths ignore edge direction and are found by a bidirectional BFS that always
+grows the frontier with fewer edges to scan, so the search stays small even
+when one end is a hub. The next shortest paths are found with Yen's algorithm
+on top of it.
+"""
+import heapq
+from itertools import pairwise
+import time
+
+from app.csr import CSRGraph
+from app.graph import cytoscape_elements
+
+
+class PathTimeout(Exception):
+    pass
+
+
+def _edge(a, b):
+    return (a, b) if a < b else (b, a)
+
+
+def _grow(G, frontier, visited, other, blocked_nodes, blocked_edges, deadline):
+    """Expand one BFS layer.
+
+    Returns the next frontier, its total degree and the node where the search
+    met the other side, if any.
+    """
+    next_frontier = []
+    cost = 0
+    for count, node in enumerate(frontier):
+        if count % 256 == 0 and time.monotonic() > deadline:
+            raise PathTimeout
+        for neighbor in G.neighbors(node):
+            if neighbor in visited or neighbor in blocked_nodes:
+                continue
+            if blocked_edges and _edge(node, neighbor) in blocked_edges:
+                continue
+            visited[neighbor] = node
+            if neighbor in other:
+                return next_frontier, cost, neighbor
+            next_frontier.append(neighbor)
+            cost += G.degree(neighbor)
+    return next_frontier, cost, None
+
+
+def shortest_path(
+    G: CSRGraph,
+    source,
+    target,
+    max_depth,
+    deadline,
+    blocked_nodes=frozenset(),
+    blocked_edges=frozenset(),
+):
+    """Return a shortest list of node indices from `source` to `target`.
+
+    Returns None when there is no path of at most `max_depth` hops that avoids
+    `blocked_nodes` and `blocked_edges`. Raises `PathTimeout` once `deadline`
+    (a `time.monotonic()` value) has passed.
+    """
+    if source == target:
+        return [source]
+    forward, backward = {source: None}, {target: None}
+    forward_frontier, backward_frontier = [source], [target]
+    # Grow the side with fewer edges to scan, which keeps hubs for last
+    forward_cost, backward_cost = G.degree(source), G.degree(target)
+    for _ in range(max_depth):
+        if forward_cost <= backward_cost:
+            forward_frontier, forward_cost, meet = _grow(
+                G,
+                forward_frontier,
+                forward,
+                backward,
+                blocked_nodes,
+                blocked_edges,
+                deadline,
+            )
+        else:
+            backward_frontier, backward_cost, meet = _grow(
+                G,
+                backward_frontier,
+                backward,
+                forward,
+                blocked_nodes,
+                blocked_edges,
+                deadline,
+            )
+        if meet is not None:
+            return _join(forward, backward, meet)
+        if not forward_frontier or not backward_frontier:
+            return None
+    return None
+
+
+def _join(forward, backward, meet):
+    path = []
+    node = meet
+    while node is not None:
+        path.append(node)
+        node = forward[node]
+    path.reverse()
+    node = backward[meet]
+    while node is not None:
+        path.append(node)
+        node = backward[node]
+    return path
+
+
+def k_shortest_paths(G: CSRGraph, source, target, k, max_depth, time_limit):
+    """Return up to `k` shortest loopless paths and whether the search timed out.
+
+    Uses Yen's algorithm with `shortest_path` for the spur searches. When the
+    `time_limit` in seconds runs out the paths found so far are returned.
+    """
+    deadline = time.monotonic() + time_limit
+    paths = []
+    try:
+        path = shortest_path(G, source, target, max_depth, deadline)
+        if path is None:
+            return paths, False
+        paths.append(path)
+        candidates = []
+        seen = {tuple(path)}
+        while len(paths) < k:
+            previous = paths[-1]
+            for i in range(len(previous) - 1):
+                root = previous[: i + 1]
+                blocked_edges = {
+                    _edge(p[i], p[i + 1])
+                    for p in paths
+                    if len(p) > i + 1 and p[: i + 1] == root
+                }
+                spur = shortest_path(
+                    G,
+                    previous[i],
+                    target,
+                    max_depth - i,
+                    deadline,
+                    blocked_nodes=frozenset(root[:-1]),
+                    blocked_edges=blocked_edges,
+                )
+                if spur is not None:
+                    candidate = root[:-1] + spur
+                    if tuple(candidate) not in seen:
+                        seen.add(tuple(candidate))
+                        heapq.heappush(candidates, (len(candidate), candidate))
+            if not candidates:
+                break
+            paths.append(heapq.heappop(candidates)[1])
+    except PathTimeout:
+        return paths, True
+    return paths, False
+
+
+def path_elements(G: CSRGraph, paths):
+    """Return the nodes and edges along `paths` as Cytoscape elements."""
+    nodes = {}
+    edges = {}
+    for path in paths:
+        for index in path:
+            nodes[index] = G.node_data(index)
+        for pair in pairwise(path):
+            # Look the edges up from the end with the lower degree
+            a, b = sorted(pair, key=G.degree)
+            for neighbor, edge in G.out_edges(a):
+                if neighbor == b:
+                    edges[edge] = (a, b)
+            for neighbor, edge in G.incoming_edges(a):
+                if neighbor == b:
+                    edges[edge] = (b, a)
+    return cytoscape_elements(
+        ((G.key(index), data) for index, data in nodes.items()),
+        (
+            (G.key(source), G.key(target), G.edge_data(edge))
+            for edge, (source, target) in edges.items()
+        ),
+    )
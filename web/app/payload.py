@@ -0,0 +1,85 @@
+"""Compact columnar encoding of the graph shown on the /graph page.
+
+Instead of one `{"data": {...}}` object per node and edge, the payload holds
+parallel arrays. Node names go through a string table, and node types,
+statuses and edge relationships are integer codes into small tables. Edges
+refer to nodes by their position in the node arrays, and nodes are keyed by
+their database id, so no node key is repeated. `decodeGraph` in graph.js
+turns the payload back into Cytoscape elements.
+
+    {
+        "types": ["entity", "individual", "more"],
+        "statuses": [null, "Registered", ...],
+        "relationships": ["director", "shareholder", "more"],
+        "strings": ["Company X", ...],
+        "nodes": {"id": [...], "name": [...], "type": [...], "status": [...],
+                  "anchor": [...], "x": [...], "y": [...]},
+        "edges": {"source": [...], "target": [...], "relationship": [...]}
+    }
+
+A "more" node has no id of its own; its key is derived from its anchor.
+"""
+import orjson
+
+from app.csr import NODE_TYPES, RELATIONSHIPS
+
+PAYLOAD_NODE_TYPES = (*NODE_TYPES, "more")
+PAYLOAD_RELATIONSHIPS = (*RELATIONSHIPS, "more")
+
+
+class _Table:
+    """Strings in the order first seen, coded by their position."""
+
+    def __init__(self, values=()):
+        self.entries = list(values)
+        self.codes = {value: code for code, value in enumerate(self.entries)}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.entries)
+            self.entries.append(value)
+        return code
+
+
+def compact_elements(nodes, edges):
+    """Return (node, data) and (source, target, data) pairs as a columnar payload."""
+    nodes = list(nodes)
+    index = {node: i for i, (node, _) in enumerate(nodes)}
+    strings, statuses = _Table(), _Table([None])
+    types, relationships = _Table(PAYLOAD_NODE_TYPES), _Table(PAYLOAD_RELATIONSHIPS)
+
+    columns = {"id": [], "name": [], "type": [], "status": [], "anchor": []}
+    for node, data in nodes:
+        anchor = data.get("anchor")
+        columns["id"].append(None if anchor else int(node.split("-", 1)[1]))
+        columns["name"].append(strings.code(data["label"]))
+        columns["type"].append(types.code(data["type"]))
+        columns["status"].append(statuses.code(data["status"]))
+        columns["anchor"].append(index[anchor] if anchor else None)
+
+    edge_columns = {"source": [], "target": [], "relationship": []}
+    for source, target, data in edges:
+        edge_columns["source"].append(index[source])
+        edge_columns["target"].append(index[target])
+        edge_columns["relationship"].append(relationships.code(data["relationship"]))
+
+    return {
+        "types": types.entries,
+        "statuses": statuses.entries,
+        "relationships": relationships.entries,
+        "strings": strings.entries,
+        "nodes": columns,
+        "edges": edge_columns,
+    }
+
+
+def subgraph_payload(subgraph):
+    """Return the nodes and edges of a subgraph as a columnar payload."""
+    return compact_elements(subgraph.nodes(data=True), subgraph.edges(data=True))
+
+
+def dumps(payload) -> str:
+    """Serialize a payload for embedding in a page's <script> block."""
+    # "</" would end the script block early if it appeared in a name
+    return orjson.dumps(payload).replace(b"</", b"<\\/").decode()
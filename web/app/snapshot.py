@@ -0,0 +1,143 @@
+"""Binary snapshots of graph arrays that can be memory-mapped by workers.
+
+Layout: an 8 byte magic, a 4 byte little-endian header length, a JSON header
+describing each section, then the raw array sections each aligned to 8 bytes.
+Sections are written in native byte order and loaded as `memoryview` casts
+over a read-only `mmap`, so loading does no parsing of the graph data and the
+pages are shared between every process that maps the same file.
+"""
+import json
+import mmap
+from pathlib import Path
+import struct
+import sys
+
+from loguru import logger
+
+from app.csr import CSRGraph
+
+MAGIC = b"VFSCCSR1"
+ALIGNMENT = 8
+GRAPH_SECTIONS = (
+    "ids",
+    "statuses",
+    "label_offsets",
+    "label_data",
+    "out_offsets",
+    "out_targets",
+    "edge_relationships",
+    "edge_weights",
+    "in_offsets",
+    "in_sources",
+    "in_edges",
+)
+
+
+def _typecode(buffer):
+    return getattr(buffer, "typecode", None) or getattr(buffer, "format", "B")
+
+
+def write_arrays(path, arrays: dict, source_version: str, **header):
+    """Write named arrays to `path`, replacing any existing file atomically."""
+    path = Path(path)
+    sections = {}
+    offset = 0
+    for name, buffer in arrays.items():
+        view = memoryview(buffer)
+        sections[name] = [offset, _typecode(view), view.nbytes]
+        offset += -(-view.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps(
+        {
+            **header,
+            "source_version": source_version,
+            "byteorder": sys.byteorder,
+            "sections": sections,
+        }
+    ).encode()
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % ALIGNMENT)
+
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with tmp_path.open("wb") as fp:
+        fp.write(MAGIC)
+        fp.write(struct.pack("<I", len(header)))
+        fp.write(header)
+        for buffer in arrays.values():
+            data = memoryview(buffer).cast("B")
+            fp.write(data)
+            fp.write(bytes(-data.nbytes % ALIGNMENT))
+    tmp_path.replace(path)
+    return path
+
+
+def read_header(path):
+    """Return the header of a file written by `write_arrays`, or None if missing.
+
+    Reads only the start of the file, to check which graph db it was
+    compiled from without mapping it.
+    """
+    try:
+        with Path(path).open("rb") as fp:
+            prefix = fp.read(len(MAGIC) + 4)
+            if len(prefix) < len(MAGIC) + 4 or prefix[: len(MAGIC)] != MAGIC:
+                return None
+            (header_length,) = struct.unpack_from("<I", prefix, len(MAGIC))
+            return json.loads(fp.read(header_length))
+    except FileNotFoundError:
+        return None
+
+
+def read_arrays(path, source_version: str):
+    """Return (header, arrays) from a memory-mapped file written by `write_arrays`.
+
+    Returns None when the file is missing, unreadable or was compiled from a
+    different version of the graph database.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    with path.open("rb") as fp:
+        mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    if bytes(view[: len(MAGIC)]) != MAGIC:
+        logger.warning(f"Ignoring {path} with unknown format")
+        return None
+    (header_length,) = struct.unpack_from("<I", view, len(MAGIC))
+    data_start = len(MAGIC) + 4 + header_length
+    header = json.loads(bytes(view[len(MAGIC) + 4 : data_start]))
+    if header["byteorder"] != sys.byteorder:
+        logger.warning(f"Ignoring {path} with foreign byte order")
+        return None
+    if header["source_version"] != source_version:
+        logger.warning(f"Ignoring {path} compiled from another graph db")
+        return None
+
+    arrays = {}
+    for name, (offset, typecode, nbytes) in header["sections"].items():
+        start = data_start + offset
+        arrays[name] = view[start : start + nbytes].cast(typecode)
+    return header, arrays
+
+
+def write_snapshot(G: CSRGraph, path, source_version: str):
+    """Write the graph arrays to a snapshot file."""
+    arrays = {name: getattr(G, name) for name in GRAPH_SECTIONS}
+    return write_arrays(
+        path,
+        arrays,
+        source_version,
+        n_entities=G.n_entities,
+        status_table=G.status_table,
+    )
+
+
+def load_snapshot(path, source_version: str):
+    """Return a `CSRGraph` backed by a memory-mapped snapshot, or None."""
+    snapshot = read_arrays(path, source_version)
+    if snapshot is None:
+        return None
+    header, arrays = snapshot
+    return CSRGraph(
+        n_entities=header["n_entities"],
+        status_table=header["status_table"],
+        **arrays,
+    )
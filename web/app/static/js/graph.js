@@ -37,10 +37,56 @@ const bilkentLayoutOptions = {
   nodeDimensionsIncludeLabels: true
 }
 
+// Positions computed by the server, so the browser does no layout work
+const presetLayoutOptions = {
+  name: 'preset',
+  fit: true,
+  padding: 30,
+}
+
+const nodeKeyPrefixes = {
+  'entity': 'e',
+  'individual': 'i',
+}
+
+// Rebuild Cytoscape elements from the columnar payload built by app/payload.py
+function decodeGraph(payload) {
+  const { nodes, edges } = payload;
+  const types = nodes.type.map(code => payload.types[code]);
+  const ids = nodes.id.map((id, i) => `${nodeKeyPrefixes[types[i]]}-${id}`);
+  // "more" nodes are keyed after the node they hang off
+  nodes.anchor.forEach((anchor, i) => {
+    if (anchor !== null) {
+      ids[i] = `more-${ids[anchor]}`;
+    }
+  });
+
+  return {
+    nodes: ids.map((id, i) => ({
+      data: {
+        id: id,
+        name: payload.strings[nodes.name[i]],
+        type: types[i],
+        status: payload.statuses[nodes.status[i]],
+        anchor: nodes.anchor[i] === null ? null : ids[nodes.anchor[i]],
+      },
+      ...(nodes.x && { position: { x: nodes.x[i], y: nodes.y[i] } }),
+    })),
+    edges: edges.source.map((source, i) => ({
+      data: {
+        source: ids[source],
+        target: ids[edges.target[i]],
+        relationship: payload.relationships[edges.relationship[i]],
+      },
+    })),
+  };
+}
+
 document.addEventListener('DOMContentLoaded', function () {
+  const elements = decodeGraph(graphData);
   const cy = cytoscape({
     container: document.getElementById('cy'),
-    elements: graphData,
+    elements: elements,
     // interaction elements
     zoomingEnabled: true,
     userZoomingEnabled: false,
@@ -94,6 +140,17 @@ document.addEventListener('DOMContentLoaded', function () {
           'border-color': nodeStatusColors.registered,
         }
       },
+      {
+        selector: 'node[type="more"]',
+        style: {
+          'shape': 'ellipse',
+          'background-color': '#fff',
+          'border-style': 'dashed',
+          'border-color': '#999',
+          'color': '#666',
+          'font-style': 'italic',
+        }
+      },
       {
         selector: 'edge',
         style: {
@@ -113,6 +170,14 @@ document.addEventListener('DOMContentLoaded', function () {
           'text-background-border': '2px'
         }
       },
+      {
+        selector: 'edge[relationship="more"]',
+        style: {
+          'line-style': 'dashed',
+          'target-arrow-shape': 'none',
+          'label': '',
+        }
+      },
       {
         selector: 'edge[relationship="director"]',
         style: {
@@ -122,7 +187,9 @@ document.addEventListener('DOMContentLoaded', function () {
         }
       }
     ],
-    layout: bilkentLayoutOptions,
+    layout: elements.nodes.every(node => node.position)
+      ? presetLayoutOptions
+      : bilkentLayoutOptions,
   })
 
   function setLayout(layoutName) {
@@ -180,9 +247,6 @@ document.addEventListener('DOMContentLoaded', function () {
     setLayout('cose-bilkent');
   }
 
-  // Set initial layout
-  setLayout('cose-bilkent');
-
   // Add event listeners to layout buttons
   document.getElementById('concentricBtn').addEventListener('click', function () {
     setLayout('concentric');
@@ -228,16 +292,30 @@ document.addEventListener('DOMContentLoaded', function () {
   }
 
   // Update URL to selected node
-  function constructNewUrl(nodeId) {
+  function constructNewUrl(nodeId, maxNodes) {
     const url = new URL(window.location.href);
+    url.pathname = '/graph';
     url.searchParams.set('nodeId', nodeId);
+    if (maxNodes) {
+      url.searchParams.set('maxNodes', maxNodes);
+    } else {
+      url.searchParams.delete('maxNodes');
+    }
     return url.toString();
   }
 
   updateUrlBtn.addEventListener('click', function () {
     const nodeId = nodeCard.dataset.nodeId;
     if (nodeId) {
-      const newUrl = constructNewUrl(nodeId);
+      const node = cy.getElementById(nodeId);
+      let newUrl;
+      if (node.data('type') === 'more') {
+        // Show the hidden neighbors by graphing the node they hang off with a larger budget
+        const maxNodes = Math.min(graphMaxNodes * 2, graphMaxNodesLimit);
+        newUrl = constructNewUrl(node.data('anchor'), maxNodes);
+      } else {
+        newUrl = constructNewUrl(nodeId);
+      }
       window.location.href = newUrl;
     }
   });
@@ -294,7 +372,39 @@ document.addEventListener('DOMContentLoaded', function () {
       duation: 200,
     })
   })
+  // Expand a node in place by merging in only the neighbors not yet shown
+  async function expandNode(nodeId) {
+    const exclude = cy.nodes('[type != "more"]').map(node => node.id());
+    const response = await fetch('/api/expand', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ nodeId: nodeId, exclude: exclude, maxNodes: graphMaxNodes }),
+    });
+    if (!response.ok) {
+      return;
+    }
+    const delta = await response.json();
+    // The delta carries an up to date "more" node for the expanded node
+    cy.getElementById(`more-${nodeId}`).remove();
+    const position = cy.getElementById(nodeId).position();
+    const added = cy.add([
+      ...delta.nodes.map(node => ({ ...node, position: { ...position } })),
+      ...delta.edges,
+    ]);
+    if (added.nonempty()) {
+      cy.layout({ ...bilkentLayoutOptions, randomize: false }).run();
+    }
+  }
+
+  cy.on("dblclick", "node", function (e) {
+    const node = e.target;
+    expandNode(node.data('type') === 'more' ? node.data('anchor') : node.id());
+  });
+
   cy.on("dblclick", function (e) {
+    if (e.target !== cy) {
+      return;
+    }
     let zoomLevel = cy.zoom()
     cy.animate({
       zoom: {
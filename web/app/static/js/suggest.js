@@ -0,0 +1,71 @@
+/**
+ * Autocomplete for search boxes with a `data-suggest-url` attribute.
+ *
+ * Typing asks /api/suggest for names starting with the text and lists them
+ * under the box as links to their graph. A request still in flight when the
+ * text changes is cancelled, so the list always matches the box.
+ */
+(function () {
+  "use strict";
+
+  // Milliseconds without typing before asking for suggestions
+  const DELAY = 80;
+
+  function attach(input) {
+    const form = input.form;
+    const list = document.createElement('div');
+    list.className = 'list-group position-absolute w-100 shadow';
+    list.style.top = '100%';
+    list.style.zIndex = 1000;
+    form.classList.add('position-relative');
+    form.appendChild(list);
+    input.setAttribute('autocomplete', 'off');
+
+    let timeout = null;
+    let controller = null;
+
+    function show(suggestions) {
+      list.replaceChildren(...suggestions.map(suggestion => {
+        const link = document.createElement('a');
+        link.className = 'list-group-item list-group-item-action';
+        link.href = `${input.dataset.graphUrl}?nodeId=${encodeURIComponent(suggestion.id)}`;
+        link.textContent = suggestion.name;
+        const type = document.createElement('small');
+        type.className = 'text-muted ms-2';
+        type.textContent = suggestion.type === 'entity' ? 'company' : 'individual';
+        link.appendChild(type);
+        return link;
+      }));
+    }
+
+    async function update() {
+      if (controller) controller.abort();
+      const q = input.value.trim();
+      if (!q) {
+        show([]);
+        return;
+      }
+      controller = new AbortController();
+      try {
+        const url = `${input.dataset.suggestUrl}?q=${encodeURIComponent(q)}`;
+        const response = await fetch(url, { signal: controller.signal });
+        if (response.ok) show((await response.json()).suggestions);
+      } catch (error) {
+        if (error.name !== 'AbortError') throw error;
+      }
+    }
+
+    input.addEventListener('input', () => {
+      clearTimeout(timeout);
+      timeout = setTimeout(update, DELAY);
+    });
+    input.addEventListener('keydown', event => {
+      if (event.key === 'Escape') show([]);
+    });
+    document.addEventListener('click', event => {
+      if (!form.contains(event.target)) show([]);
+    });
+  }
+
+  document.querySelectorAll('input[data-suggest-url]').forEach(attach);
+})();
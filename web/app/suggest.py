@@ -0,0 +1,125 @@
+"""Prefix index of node names for search box suggestions.
+
+Every word of a normalized name starts an entry, so "pacific timber limited"
+is found by typing "pac", "timber l" or "lim". The entries are sorted by the
+text from their word to the end of the name, and the entries starting with a
+prefix are the slice found by two binary searches.
+
+Suggestions are the best connected nodes in that slice. A short prefix can
+match most of the index, so the entries are split into blocks with each
+block's best entries kept aside; a lookup ranks the best of the blocks that
+lie wholly inside the slice and scans only the two partial blocks at its
+ends.
+
+The index is built in memory the first time a graph is asked for
+suggestions and lives as long as that graph, so each graph version has its
+own.
+"""
+from bisect import bisect_left, bisect_right
+import threading
+
+import numpy as np
+
+from app.csr import CSRGraph
+from app.trigrams import name_words
+
+BLOCK_SIZE = 1024
+MAX_LIMIT = 20
+
+_lock = threading.Lock()
+
+
+def normalize(name):
+    """Return a name lowercased, without accents or punctuation, as UTF-8."""
+    return " ".join(name_words(name)).encode()
+
+
+class SuggestionIndex:
+    def __init__(self, names, offsets, nodes, starts, scores):
+        # Normalized names of all nodes packed in one buffer
+        self.names = names
+        self.offsets = offsets
+        # Entry i is the name of `nodes[i]` from byte `starts[i]` onwards
+        self.nodes = nodes
+        self.starts = starts
+        self.scores = scores
+        self.entries = range(len(nodes))
+
+        n_blocks = -(-len(nodes) // BLOCK_SIZE)
+        padded = np.full(n_blocks * BLOCK_SIZE, -1, dtype=np.int64)
+        padded[: len(nodes)] = scores
+        blocks = padded.reshape(n_blocks, BLOCK_SIZE)
+        top = np.argsort(-blocks, axis=1, kind="stable")[:, :MAX_LIMIT]
+        top += np.arange(n_blocks)[:, None] * BLOCK_SIZE
+        is_entry = padded[top] >= 0
+        # Positions of the best entries of each block, in CSR form
+        self.block_top = top[is_entry]
+        self.block_top_offsets = np.r_[0, np.cumsum(is_entry.sum(axis=1))]
+
+    @classmethod
+    def build(cls, G: CSRGraph):
+        names = [normalize(G.label(index) or "") for index in range(len(G))]
+        offsets = np.r_[0, np.cumsum([len(name) for name in names])]
+
+        entries = [
+            (name[start:], index, start)
+            for index, name in enumerate(names)
+            for start in (0, *(i + 1 for i, byte in enumerate(name) if byte == 32))
+            if name
+        ]
+        entries.sort()
+        nodes = np.array([index for _, index, _ in entries], dtype=np.uint32)
+        starts = np.array([start for _, _, start in entries], dtype=np.uint16)
+
+        degrees = np.diff(np.asarray(G.out_offsets, dtype=np.int64)) + np.diff(
+            np.asarray(G.in_offsets, dtype=np.int64)
+        )
+        return cls(b"".join(names), offsets, nodes, starts, degrees[nodes])
+
+    def _key(self, entry, length):
+        start = self.offsets[self.nodes[entry]] + self.starts[entry]
+        end = self.offsets[self.nodes[entry] + 1]
+        return self.names[start : min(start + length, end)]
+
+    def suggest(self, q: str, limit=10):
+        """Return the indices of the best connected nodes with a word starting `q`."""
+        prefix = normalize(q)
+        if not prefix:
+            return []
+
+        def key(entry):
+            return self._key(entry, len(prefix))
+
+        lo = bisect_left(self.entries, prefix, key=key)
+        hi = bisect_right(self.entries, prefix, lo, key=key)
+
+        first_block = -(-lo // BLOCK_SIZE)
+        last_block = hi // BLOCK_SIZE
+        if first_block >= last_block:
+            candidates = np.arange(lo, hi)
+        else:
+            tops = self.block_top_offsets
+            candidates = np.concatenate(
+                [
+                    np.arange(lo, first_block * BLOCK_SIZE),
+                    self.block_top[tops[first_block] : tops[last_block]],
+                    np.arange(last_block * BLOCK_SIZE, hi),
+                ]
+            )
+
+        # Best connected first, then in name order; a node is suggested once
+        order = candidates[np.lexsort((candidates, -self.scores[candidates]))]
+        _, first = np.unique(self.nodes[order], return_index=True)
+        best = order[np.sort(first)][: min(limit, MAX_LIMIT)]
+        return self.nodes[best].tolist()
+
+
+def suggestion_index(G: CSRGraph):
+    """Return the suggestion index of a graph, building it on first use."""
+    index = G.suggestions
+    if index is None:
+        with _lock:
+            index = G.suggestions
+            if index is None:
+                index = G.suggestions = SuggestionIndex.build(G)
+    return index
@@ -0,0 +1,147 @@
+"""Trigram index of node names for typo-tolerant search.
+
+A name is split into words and every word, padded with two spaces in front
+and one behind, into its three character sequences, as PostgreSQL's pg_trgm
+does: "Tom" becomes "  t", " to", "tom" and "om ". Two spellings of a name
+share most of their trigrams, so the similarity of a name to a query is the
+number of trigrams they share over the number either of them has.
+
+The index maps each trigram to the sorted indices of the nodes whose names
+contain it, in CSR form. A search counts shared trigrams for every node with
+one `bincount` over the posting lists of the query's trigrams, so no name is
+compared character by character.
+"""
+from array import array
+import re
+import unicodedata
+
+import numpy as np
+
+from app.csr import NODE_TYPES, CSRGraph
+from app.snapshot import read_arrays, write_arrays
+
+# Matches less similar than this are not returned, the pg_trgm default
+DEFAULT_THRESHOLD = 0.3
+DEFAULT_LIMIT = 10
+
+
+def name_words(name):
+    """Return the lowercase words of a name with accents removed."""
+    text = unicodedata.normalize("NFKD", name.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.findall(r"[^\W_]+", text)
+
+
+def trigrams(name):
+    """Return the set of trigram codes of a name.
+
+    A code packs the three code points of a trigram into one 63-bit integer.
+    """
+    codes = set()
+    for word in name_words(name):
+        points = [32, 32, *map(ord, word), 32]
+        codes.update(
+            a << 42 | b << 21 | c
+            for a, b, c in zip(points, points[1:], points[2:], strict=False)
+        )
+    return codes
+
+
+class TrigramIndex:
+    def __init__(self, codes, offsets, nodes, sizes):
+        # Trigram codes in ascending order
+        self.codes = np.asarray(codes)
+        # Nodes with the trigram `codes[i]` are `nodes[offsets[i]:offsets[i+1]]`
+        self.offsets = np.asarray(offsets)
+        self.nodes = np.asarray(nodes)
+        # Number of distinct trigrams in each node's name
+        self.sizes = np.asarray(sizes)
+
+    @classmethod
+    def build(cls, G: CSRGraph):
+        codes, nodes, sizes = array("q"), array("I"), array("I")
+        for index in range(len(G)):
+            name_codes = trigrams(G.label(index) or "")
+            codes.extend(name_codes)
+            nodes.extend([index] * len(name_codes))
+            sizes.append(len(name_codes))
+
+        codes = np.frombuffer(codes, dtype=np.int64)
+        # Stable, so each posting list stays sorted by node
+        order = np.argsort(codes, kind="stable")
+        unique, starts = np.unique(codes[order], return_index=True)
+        return cls(
+            unique,
+            np.append(starts, len(order)).astype(np.int64),
+            np.frombuffer(nodes, dtype=np.uint32)[order],
+            np.frombuffer(sizes, dtype=np.uint32),
+        )
+
+    def similar(self, q: str, threshold=DEFAULT_THRESHOLD):
+        """Return the nodes at least `threshold` similar to `q` and their scores."""
+        query = np.fromiter(trigrams(q), dtype=np.int64)
+        positions = np.searchsorted(self.codes, query)
+        found = positions < len(self.codes)
+        found[found] = self.codes[positions[found]] == query[found]
+        positions = positions[found]
+        if not len(positions):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        postings = np.concatenate(
+            [self.nodes[self.offsets[p] : self.offsets[p + 1]] for p in positions]
+        )
+        shared = np.bincount(postings, minlength=len(self.sizes))
+        # shared / (len(query) + size - shared) >= threshold, without dividing
+        nodes = np.flatnonzero(
+            shared * (1 + threshold) >= threshold * (len(query) + self.sizes)
+        )
+        shared = shared[nodes]
+        return nodes, shared / (len(query) + self.sizes[nodes] - shared)
+
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.codes, self.offsets, self.nodes, self.sizes))
+
+    def write(self, path, source_version: str):
+        arrays = {
+            "codes": self.codes,
+            "offsets": self.offsets,
+            "nodes": self.nodes,
+            "sizes": self.sizes,
+        }
+        return write_arrays(path, arrays, source_version)
+
+    @classmethod
+    def load(cls, path, source_version: str):
+        """Return the index backed by a memory-mapped file, or None."""
+        index = read_arrays(path, source_version)
+        if index is None:
+            return None
+        _, arrays = index
+        return cls(**arrays)
+
+
+def fuzzy_search(G: CSRGraph, q: str, limit=DEFAULT_LIMIT, threshold=DEFAULT_THRESHOLD):
+    """Return the names most similar to `q` for each node type.
+
+    Maps "entity" and "individual" to at most `limit` (index, similarity)
+    pairs, most similar first. Requires `G.trigrams`.
+    """
+    nodes, scores = G.trigrams.similar(q, threshold)
+    # Nodes come sorted, so companies are a prefix of the matches
+    split = np.searchsorted(nodes, G.n_entities)
+    results = {}
+    for node_type, part in zip(
+        NODE_TYPES, (slice(None, split), slice(split, None)), strict=True
+    ):
+        type_nodes, type_scores = nodes[part], scores[part]
+        if len(type_nodes) > limit:
+            # Keep everything tied with the last place before sorting
+            cutoff = -np.partition(-type_scores, limit - 1)[limit - 1]
+            top = type_scores >= cutoff
+            type_nodes, type_scores = type_nodes[top], type_scores[top]
+        # Ties go to the lower index, the older record
+        order = np.lexsort((type_nodes, -type_scores))[:limit]
+        results[node_type] = list(
+            zip(type_nodes[order].tolist(), type_scores[order].tolist(), strict=True)
+        )
+    return results
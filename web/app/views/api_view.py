@@ -0,0 +1,242 @@
+from app.db.graph_db import get_ultimate_owners
+from app.export import (
+    EXPORT_FORMATS,
+    collect_nodes,
+    ensure_export,
+    json_document,
+    ndjson_lines,
+)
+from app.graph import DEFAULT_MAX_NODES, expand_node, load_graph, subgraph_elements
+from app.graph_store import graph_store
+from app.paths import k_shortest_paths, path_elements
+from app.suggest import MAX_LIMIT, suggestion_index
+from app.trigrams import DEFAULT_LIMIT, fuzzy_search
+from app.utils import timer
+from app.views.graph_view import MAX_NODES
+from flask import Blueprint, Response, current_app, jsonify, request, send_file
+
+api_bp = Blueprint("api", __name__, url_prefix="/api")
+
+# Largest client graph accepted in `exclude`
+MAX_EXCLUDE = 20_000
+MAX_PATH_DEPTH = 10
+MAX_PATHS = 10
+MAX_EXPORT_DEPTH = 10
+MAX_FUZZY_LIMIT = 50
+
+
+def _params():
+    """Return request parameters from the JSON body or the query string."""
+    if request.method == "POST":
+        return request.get_json(silent=True) or {}
+    params = request.args.to_dict()
+    if "exclude" in params:
+        params["exclude"] = [e for e in params["exclude"].split(",") if e]
+    return params
+
+
+def _error(message, status):
+    return jsonify({"error": message}), status
+
+
+@api_bp.route("/expand", methods=["GET", "POST"])
+@timer
+def expand():
+    """Return the neighbors of `nodeId` that the client does not have yet.
+
+    Accepts `nodeId`, `exclude` (a list, or comma separated in the query string)
+    and `maxNodes`. Clients with large graphs should POST them as JSON since
+    the query string length is limited.
+    """
+    params = _params()
+    node_id = params.get("nodeId")
+    exclude = params.get("exclude", [])
+    if not node_id:
+        return _error("nodeId is required", 400)
+    if not isinstance(exclude, list) or len(exclude) > MAX_EXCLUDE:
+        return _error(f"exclude must be a list of at most {MAX_EXCLUDE} IDs", 400)
+    try:
+        max_nodes = min(
+            max(int(params.get("maxNodes", DEFAULT_MAX_NODES)), 1), MAX_NODES
+        )
+    except (TypeError, ValueError):
+        return _error("maxNodes must be an integer", 400)
+
+    try:
+        delta = expand_node(load_graph(), node_id, exclude, max_nodes)
+    except ValueError as e:
+        return _error(str(e), 404)
+    return jsonify(subgraph_elements(delta))
+
+
+@api_bp.route("/path")
+@timer
+def path():
+    """Return up to `k` shortest paths between `from` and `to`, ignoring direction.
+
+    Paths are at most `maxDepth` hops long. If the search runs out of time the
+    paths found so far are returned with `timedOut` set.
+    """
+    max_depth = min(max(request.args.get("maxDepth", 6, type=int), 1), MAX_PATH_DEPTH)
+    k = min(max(request.args.get("k", 1, type=int), 1), MAX_PATHS)
+    source_id, target_id = request.args.get("from"), request.args.get("to")
+    if not source_id or not target_id:
+        return _error("from and to are required", 400)
+
+    G = load_graph()
+    source, target = G.index(source_id), G.index(target_id)
+    for node_id, index in ((source_id, source), (target_id, target)):
+        if index is None:
+            return _error(f"Node {node_id} not found in the graph", 404)
+
+    paths, timed_out = k_shortest_paths(
+        G, source, target, k, max_depth, current_app.config["PATH_TIME_LIMIT"]
+    )
+    return jsonify(
+        {
+            "paths": [[G.key(index) for index in path] for path in paths],
+            "timedOut": timed_out,
+            **path_elements(G, paths),
+        }
+    )
+
+
+@api_bp.route("/owners")
+@timer
+def owners():
+    """Return the individuals who ultimately own the company `nodeId`."""
+    node_id = request.args.get("nodeId", "")
+    if not node_id.startswith("e-"):
+        return _error("nodeId must be a company like e-123", 400)
+    if load_graph().index(node_id) is None:
+        return _error(f"Node {node_id} not found in the graph", 404)
+
+    owners = get_ultimate_owners(int(node_id.split("-", 1)[1]))
+    if owners is None:
+        return _error("Ownership has not been computed", 503)
+    return jsonify(
+        {
+            "nodeId": node_id,
+            "owners": [{**owner, "id": f"i-{owner['id']}"} for owner in owners],
+        }
+    )
+
+
+def _export(encode, mimetype):
+    """Stream the subgraph around `nodeId` in one of the export formats.
+
+    Exports `depth` hops around the node, or its whole connected component
+    with `scope=component`, as long as it has at most `EXPORT_MAX_NODES` nodes.
+    """
+    node_id = request.args.get("nodeId")
+    if not node_id:
+        return _error("nodeId is required", 400)
+    if request.args.get("scope", "neighborhood") == "component":
+        depth = None
+    else:
+        depth = min(max(request.args.get("depth", 1, type=int), 1), MAX_EXPORT_DEPTH)
+
+    G = load_graph()
+    index = G.index(node_id)
+    if index is None:
+        return _error(f"Node {node_id} not found in the graph", 404)
+    limit = current_app.config["EXPORT_MAX_NODES"]
+    nodes = collect_nodes(G, index, depth, limit)
+    if nodes is None:
+        return _error(f"The subgraph has more than {limit} nodes", 400)
+
+    return Response(encode(G.subgraph(nodes)), mimetype=mimetype)
+
+
+@api_bp.route("/subgraph.ndjson")
+@timer
+def subgraph_ndjson():
+    """Stream the subgraph around `nodeId` as one JSON element per line."""
+    return _export(ndjson_lines, "application/x-ndjson")
+
+
+@api_bp.route("/subgraph.json")
+@timer
+def subgraph_json():
+    """Stream the subgraph around `nodeId` as a JSON document."""
+    return _export(json_document, "application/json")
+
+
+@api_bp.route("/export/<fmt>")
+@timer
+def export(fmt):
+    """Download the full graph as gzip-compressed GraphML, GEXF or CSV.
+
+    The file for the current graph version is written in another process after
+    the first request, and requests get a 503 until it is ready; byte ranges
+    are supported so large downloads can be resumed.
+    """
+    if fmt not in EXPORT_FORMATS:
+        return _error(f"Format must be one of {', '.join(EXPORT_FORMATS)}", 404)
+
+    # Loads the graph on first use, which pins its version for the request
+    load_graph()
+    version = graph_store.db_version
+    path = ensure_export(version, fmt, current_app.config["GRAPH_EXPORTS"])
+    if path is None:
+        response, status = _error("The export is being generated", 503)
+        response.headers["Retry-After"] = "60"
+        return response, status
+
+    return send_file(
+        path,
+        mimetype="application/gzip",
+        as_attachment=True,
+        download_name=f"vfsc-graph.{fmt}.gz",
+        conditional=True,
+        etag=version,
+    )
+
+
+@api_bp.route("/fuzzy-search")
+@timer
+def fuzzy():
+    """Return the companies and individuals with names most similar to `q`.
+
+    Finds names spelled differently from the query, ranked by trigram
+    similarity; `limit` is the most matches returned of each type.
+    """
+    q = request.args.get("q", "").strip()
+    if not q:
+        return _error("q is required", 400)
+    limit = min(
+        max(request.args.get("limit", DEFAULT_LIMIT, type=int), 1), MAX_FUZZY_LIMIT
+    )
+
+    G = load_graph()
+    if G.trigrams is None:
+        return _error("The trigram index has not been built", 503)
+    matches = fuzzy_search(G, q, limit)
+
+    def encode(node_type):
+        return [
+            {"id": G.key(index), "name": G.label(index), "similarity": round(score, 3)}
+            for index, score in matches[node_type]
+        ]
+
+    return jsonify(
+        {"query": q, "companies": encode("entity"), "individuals": encode("individual")}
+    )
+
+
+@api_bp.route("/suggest")
+def suggest():
+    """Return names with a word starting with `q` for the search box.
+
+    The best connected companies and individuals come first; `limit` is the
+    most suggestions returned.
+    """
+    q = request.args.get("q", "")
+    limit = min(max(request.args.get("limit", 10, type=int), 1), MAX_LIMIT)
+
+    G = load_graph()
+    suggestions = [
+        {"id": G.key(index), "name": G.label(index), "type": G.node_type(index)}
+        for index in suggestion_index(G).suggest(q, limit)
+    ]
+    return jsonify({"query": q, "suggestions": suggestions})
@@ -1,16 +1,20 @@
-import asyncio
 from functools import wraps
-import json
 
 from app.db.graph_db import (
+    get_community_members,
     get_company_by_id,
     get_individual_by_id,
+    get_node_community,
     get_random_company_id,
     search_company_names,
     search_individual_names,
 )
 from app.extensions import cache
-from app.graph import extract_subgraph, load_graph
+from app.graph import DEFAULT_MAX_NODES, extract_budgeted_subgraph, load_graph
+from app.graph_store import versioned_name, versioned_view_key
+from app.layout import add_positions
+from app.payload import dumps, subgraph_payload
+from app.trigrams import fuzzy_search
 from app.utils import get_or_create_device_id, set_device_id_cookie, timer
 from flask import (
     Blueprint,
@@ -25,6 +29,15 @@ from loguru import logger
 
 graph_bp = Blueprint("graph", __name__)
 
+MAX_DEPTH = 3
+MAX_NODES = 2000
+SEARCH_PAGE_SIZE = 20
+
+
+def _bounded_arg(name, default, maximum):
+    value = request.args.get(name, default=default, type=int)
+    return min(max(value, 1), maximum)
+
 
 def cache_with_node_id():
     def decorator(f):
@@ -33,7 +46,9 @@ def cache_with_node_id():
             device_id = get_or_create_device_id()
 
             node_id = request.args.get("nodeId")
-            cache_key = f"{request.path}:{node_id}"
+            depth = _bounded_arg("depth", 1, MAX_DEPTH)
+            max_nodes = _bounded_arg("maxNodes", DEFAULT_MAX_NODES, MAX_NODES)
+            cache_key = versioned_name(f"{request.path}:{node_id}:{depth}:{max_nodes}")
 
             cached_response = cache.get(cache_key)
             logger.info(f"Got cached: {bool(cached_response)}")
@@ -52,20 +67,28 @@ def cache_with_node_id():
             if not isinstance(response, current_app.response_class):
                 response = make_response(response)
 
-            response = set_device_id_cookie(response, device_id)
-
-            return response
+            return set_device_id_cookie(response, device_id)
 
         return decorated_function
 
     return decorator
 
 
+@cache.memoize(make_name=versioned_name)
+def neighborhood_payload(node_id, depth, max_nodes):
+    """Return the laid out graph payload of a node's budgeted neighborhood."""
+    G = load_graph()
+    subgraph = extract_budgeted_subgraph(G, node_id, depth=depth, max_nodes=max_nodes)
+    return add_positions(subgraph_payload(subgraph))
+
+
 @graph_bp.route("/graph")
 @timer
 @cache_with_node_id()
 def graph():
     node_id = request.args.get("nodeId", default="e-1")
+    # The payload is built from this same graph, see `GraphStore.pinned`
+    G = load_graph()
     company, individual = None, None
     if node_id.startswith("e-"):
         company_id = node_id.split("-", 1)[1]
@@ -76,43 +99,58 @@ def graph():
     else:
         return render_template("error.html", message="The node ID is not valid")
 
+    depth = _bounded_arg("depth", 1, MAX_DEPTH)
+    max_nodes = _bounded_arg("maxNodes", DEFAULT_MAX_NODES, MAX_NODES)
     try:
-        G = load_graph()
-        complete_subgraph = extract_subgraph(G, node_id)
+        payload = neighborhood_payload(node_id, depth, max_nodes)
     except ValueError as e:
         return render_template("error.html", message=str(e))
 
-    nodes = []
-    edges = []
-
-    for node, data in complete_subgraph.nodes(data=True):
-        nodes.append(
-            {
-                "data": {
-                    "id": node,
-                    "name": data["label"],
-                    "type": data["type"],
-                    "status": data["status"],
-                }
-            }
-        )
-
-    for source, target, data in complete_subgraph.edges(data=True):
-        edges.append(
-            {
-                "data": {
-                    "source": source,
-                    "target": target,
-                    "relationship": data["relationship"],
-                }
-            }
-        )
-
-    graph_data = json.dumps({"nodes": nodes, "edges": edges})
+    graph_data = dumps(payload)
     return render_template(
         "graph.html",
         center_node=company or individual,
+        cluster_id=get_node_community(G.node_type(G.index(node_id)), int(node_id[2:])),
         graph_data=graph_data,
+        depth=depth,
+        max_nodes=max_nodes,
+        max_nodes_limit=MAX_NODES,
+    )
+
+
+def cluster_key(*args, **kwargs):
+    """Return the cache key of a cluster page showing at most maxNodes nodes."""
+    max_nodes = _bounded_arg("maxNodes", MAX_NODES, MAX_NODES)
+    return versioned_name(f"view/{request.path}?maxNodes={max_nodes}")
+
+
+@graph_bp.route("/cluster/<int:id>")
+@timer
+@cache.cached(make_cache_key=cluster_key)
+def cluster(id):
+    members = get_community_members(id)
+    if not members:
+        return render_template("error.html", message=f"Corporate group {id} not found")
+
+    G = load_graph()
+    nodes = [G.index(f"{node_type[0]}-{node_id}") for node_type, node_id in members]
+    nodes = [index for index in nodes if index is not None]
+    max_nodes = _bounded_arg("maxNodes", MAX_NODES, MAX_NODES)
+    if len(nodes) > max_nodes:
+        nodes = sorted(nodes, key=G.degree, reverse=True)[:max_nodes]
+    subgraph = G.subgraph(nodes, max_edges=4 * max_nodes)
+
+    return render_template(
+        "graph.html",
+        center_node={
+            "name": f"Corporate group {id}",
+            "type": "cluster",
+            "size": len(members),
+        },
+        graph_data=dumps(add_positions(subgraph_payload(subgraph))),
+        depth=1,
+        max_nodes=max_nodes,
+        max_nodes_limit=MAX_NODES,
     )
 
 
@@ -136,7 +174,7 @@ def cache_with_search_query():
             device_id = get_or_create_device_id()
 
             query = request.form.get("query", None)
-            cache_key = f"{request.path}:{query}"
+            cache_key = versioned_name(f"{request.path}:{query}")
 
             cached_response = cache.get(cache_key)
             logger.info(f"Got cached: {bool(cached_response)}")
@@ -156,15 +194,66 @@ def cache_with_search_query():
             if not isinstance(response, current_app.response_class):
                 response = make_response(response)
 
-            response = set_device_id_cookie(response, device_id)
-
-            return response
+            return set_device_id_cookie(response, device_id)
 
         return decorated_function
 
     return decorator
 
 
+def similar_names(query, companies, individuals):
+    """Return fuzzy matches for `query` not already among the search results.
+
+    Returns (companies, individuals) lists of template items, or (None, None)
+    when the trigram index has not been built.
+    """
+    G = load_graph()
+    if G.trigrams is None:
+        return None, None
+    found = {f"e-{item['id']}" for item in companies} | {
+        f"i-{item['id']}" for item in individuals
+    }
+    matches = fuzzy_search(G, query)
+    similar = [
+        [
+            {"id": G.ids[index], "name": G.label(index), "status": G.status(index)}
+            for index, _ in matches[node_type]
+            if G.key(index) not in found
+        ]
+        for node_type in ("entity", "individual")
+    ]
+    return tuple(similar)
+
+
+SEARCHES = {"companies": search_company_names, "individuals": search_individual_names}
+
+
+def _search_page(search, query, after=None):
+    """Return a page of search results and the `after` cursor of the next page.
+
+    The cursor is the "rank,id" of the last result, or None on the last page.
+    """
+    items = search(query, limit=SEARCH_PAGE_SIZE + 1, after=after)
+    if len(items) <= SEARCH_PAGE_SIZE:
+        return items, None
+    items = items[:SEARCH_PAGE_SIZE]
+    return items, f"{items[-1]['rank']!r},{items[-1]['id']}"
+
+
+def _parse_cursor(value):
+    """Return the (rank, id) pair of an `after` cursor, or None if it is invalid."""
+    try:
+        rank, id = value.split(",")
+        return float(rank), int(id)
+    except ValueError:
+        return None
+
+
+def search_results_key(*args, **kwargs):
+    """Return the cache key of one page of search results."""
+    return versioned_name(f"view/{request.full_path}")
+
+
 @graph_bp.route("/search", methods=["GET", "POST"])
 @timer
 @cache_with_search_query()
@@ -175,23 +264,63 @@ def search():
             return redirect(url_for("graph.search"))
 
         query = request.form.get("query")
-        company_results = search_company_names(query)
-        individual_results = search_individual_names(query)
+        company_results, more_companies = _search_page(search_company_names, query)
+        individual_results, more_individuals = _search_page(
+            search_individual_names, query
+        )
+        similar_companies, similar_individuals = similar_names(
+            query, company_results, individual_results
+        )
     else:
         query = ""
         company_results = None
         individual_results = None
+        similar_companies = similar_individuals = None
+        more_companies = more_individuals = None
 
     return render_template(
         "search.html",
         query=query,
         companies=company_results,
         individuals=individual_results,
+        similar_companies=similar_companies,
+        similar_individuals=similar_individuals,
+        more_companies=more_companies,
+        more_individuals=more_individuals,
+    )
+
+
+@graph_bp.route("/search/<kind>")
+@timer
+@cache.cached(make_cache_key=search_results_key)
+def search_results(kind):
+    """Show one page of the companies or individuals matching `q`.
+
+    Pages are keyset paginated: `after` is the cursor of the previous page's
+    last result, so a page costs the same however deep it is.
+    """
+    if kind not in SEARCHES:
+        return render_template("error.html", message=f"Cannot search {kind}")
+    query = request.args.get("q", "").strip()
+    if not query:
+        return redirect(url_for("graph.search"))
+    after = request.args.get("after")
+    cursor = _parse_cursor(after) if after else None
+    if after and cursor is None:
+        return render_template("error.html", message="The page is not valid")
+
+    items, next_after = _search_page(SEARCHES[kind], query, cursor)
+    return render_template(
+        "search_results.html",
+        kind=kind,
+        query=query,
+        items=items,
+        next_after=next_after,
     )
 
 
 @graph_bp.route("/random")
-@cache.cached(timeout=20)
+@cache.cached(timeout=20, key_prefix=versioned_view_key)
 def random_company():
     company_id = get_random_company_id()
     return redirect(url_for("graph.company", id=company_id))
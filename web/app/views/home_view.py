@@ -6,36 +6,30 @@ from flask import render_template
 from app.db.app_db import get_history, get_popular_nodes
 from app.db.graph_db import (
     get_latest_registered_companies,
-    get_company_by_id,
     get_db_counter_stats,
-    get_individual_by_id,
+    get_nodes_by_ids,
     get_latest_updated_companies,
     get_oldest_registered_companies,
+    get_ownership_cycles,
+    get_significant_nodes,
+    SIGNIFICANCE_METRICS,
 )
 from app.utils import render_md_template
 from app.extensions import cache
+from app.graph_store import versioned_view_key
 
 
 home_bp = Blueprint("home", __name__)
 
 
 @home_bp.route("/")
-@cache.cached()
+@cache.cached(key_prefix=versioned_view_key)
 def index():
     # Get counter stats
     counts = get_db_counter_stats()
 
     # Get popular nodes
-    nodeIds = get_popular_nodes()
-    popular = []
-    for nodeId in nodeIds:
-        node_type, node_id = nodeId["node_id"].split("-", 1)
-        if node_type == "e":
-            entity = get_company_by_id(node_id)
-            popular.append(entity)
-        elif node_type == "i":
-            individual = get_individual_by_id(node_id)
-            popular.append(individual)
+    popular = get_nodes_by_ids([node["node_id"] for node in get_popular_nodes()])
 
     faq = [
         {
@@ -160,50 +154,40 @@ def index():
 
 
 @home_bp.route("/terms-and-conditions")
-@cache.cached()
+@cache.cached(key_prefix=versioned_view_key)
 def terms():
     return render_md_template("terms-and-conditions.md", title="Terms & Conditions")
 
 
 @home_bp.route("/privacy-policy")
-@cache.cached()
+@cache.cached(key_prefix=versioned_view_key)
 def privacy():
     return render_md_template("privacy-policy.md", title="Privacy Policy")
 
 
 @home_bp.route("/list/popular")
-@cache.cached()
+@cache.cached(key_prefix=versioned_view_key)
 def list_popular():
-    nodeIds = get_popular_nodes()
-    popular = []
-    for nodeId in nodeIds:
-        node_type, node_id = nodeId["node_id"].split("-", 1)
-        if node_type == "e":
-            entity = get_company_by_id(node_id)
-            popular.append(entity)
-        elif node_type == "i":
-            individual = get_individual_by_id(node_id)
-            popular.append(individual)
-
+    popular = get_nodes_by_ids([node["node_id"] for node in get_popular_nodes()])
     return render_template("list.html", title="Most Popular", items=popular)
 
 
 @home_bp.route("/list/recently-updated")
-@cache.cached()
+@cache.cached(key_prefix=versioned_view_key)
 def list_updated():
     items = get_latest_updated_companies()
     return render_template("list.html", title="Recently Updated Companies", items=items)
 
 
 @home_bp.route("/list/newly-registered")
-@cache.cached()
+@cache.cached(key_prefix=versioned_view_key)
 def list_new():
     items = get_latest_registered_companies()
     return render_template("list.html", title="Newly Registered Companies", items=items)
 
 
 @home_bp.route("/list/oldest-registered")
-@cache.cached()
+@cache.cached(key_prefix=versioned_view_key)
 def list_oldest():
     items = get_oldest_registered_companies()
     return render_template(
@@ -211,18 +195,36 @@ def list_oldest():
     )
 
 
+SIGNIFICANCE_TITLES = {
+    "pagerank": "Most Influential",
+    "betweenness": "Most Connecting",
+    "degree": "Most Connected",
+    "weighted_in_degree": "Most Held",
+}
+
+
+@home_bp.route("/list/significant", defaults={"metric": "pagerank"})
+@home_bp.route("/list/significant/<metric>")
+@cache.cached(key_prefix=versioned_view_key)
+def list_significant(metric):
+    if metric not in SIGNIFICANCE_METRICS:
+        message = f"There is no list of nodes by {metric}"
+        return render_template("error.html", message=message), 404
+    items = get_significant_nodes(metric) or []
+    return render_template("list.html", title=SIGNIFICANCE_TITLES[metric], items=items)
+
+
+@home_bp.route("/list/circular-ownership")
+@cache.cached(key_prefix=versioned_view_key)
+def list_circular_ownership():
+    cycles = get_ownership_cycles() or []
+    return render_template(
+        "circular_ownership.html", title="Circular Ownership", cycles=cycles
+    )
+
+
 @home_bp.route("/list/recently-visited")
-@cache.cached(timeout=15)
+@cache.cached(timeout=15, key_prefix=versioned_view_key)
 def list_recent():
-    nodeIds = get_history()
-    items = []
-    for nodeId in nodeIds:
-        node_type, node_id = nodeId["node_id"].split("-", 1)
-        if node_type == "e":
-            entity = get_company_by_id(node_id)
-            items.append(entity)
-        elif node_type == "i":
-            individual = get_individual_by_id(node_id)
-            items.append(individual)
-
+    items = get_nodes_by_ids([node["node_id"] for node in get_history()])
     return render_template("list.html", title="Recently Visited", items=items)
@@ -0,0 +1,49 @@
+"""Time the `build-clusters` job on a synthetic graph.
+
+Runs on a copy of the synthetic database since the job writes to it.
+
+Usage:
+    python -m benchmarks.bench_clusters --companies 250000 --edges 1000000
+"""
+import argparse
+from pathlib import Path
+import shutil
+import tempfile
+
+from benchmarks.common import create_benchmark_app, get_graph_db, measure
+import numpy as np
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=250_000)
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    graph_db = Path(tempfile.mkdtemp(prefix="vfsc-clusters-")) / "graph.db"
+    shutil.copy(get_graph_db(args.companies, args.edges), graph_db)
+    app = create_benchmark_app(graph_db)
+
+    from app.clusters import communities, components
+    from app.commands import build_clusters_command
+    from app.graph import load_graph
+
+    with app.app_context():
+        G = load_graph()
+    print(f"{G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
+
+    for name, func in [("components", components), ("communities", communities)]:
+        (timing,) = measure(func, G)
+        sizes = np.bincount(func(G))
+        print(
+            f"{name:>11}: {timing / 1000:6.2f} s | {len(sizes)} labels, "
+            f"largest {sizes[0]}, {np.count_nonzero(sizes == 1)} singletons"
+        )
+
+    runner = app.test_cli_runner()
+    (timing,) = measure(runner.invoke, build_clusters_command, catch_exceptions=False)
+    print(f"build-clusters: {timing / 1000:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
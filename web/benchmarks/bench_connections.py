@@ -0,0 +1,96 @@
+"""Compare request latency with per-thread and per-request graph db connections.
+
+The per-request model is the one graph_db used before: a new read-only
+connection in every request context, closed on teardown. Runs on a copy of
+the synthetic database since the search index is written to it.
+
+Usage:
+    python -m benchmarks.bench_connections --companies 250000 --edges 1000000
+"""
+import argparse
+from pathlib import Path
+import random
+import shutil
+import sqlite3
+import tempfile
+
+from benchmarks.common import create_benchmark_app, get_graph_db, measure, summarize
+from flask import current_app, g
+
+
+def connect_per_request():
+    db = getattr(g, "_per_request_db", None)
+    if db is None:
+        uri = f"file:{current_app.config['GRAPH_DB']}?mode=ro"
+        db = g._per_request_db = sqlite3.connect(uri, uri=True)
+        db.row_factory = sqlite3.Row
+    return db
+
+
+def close_per_request(_exception=None):
+    db = g.pop("_per_request_db", None)
+    if db is not None:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=250_000)
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    graph_db = Path(tempfile.mkdtemp(prefix="vfsc-connections-")) / "graph.db"
+    shutil.copy(get_graph_db(args.companies, args.edges), graph_db)
+    app = create_benchmark_app(graph_db)
+    app.teardown_appcontext(close_per_request)
+
+    from app.commands import build_search_index_command
+    from app.db import graph_db as graph_db_module
+    from app.db.graph_db import get_company_by_id, get_nodes_by_ids
+    from app.extensions import cache
+
+    app.test_cli_runner().invoke(build_search_index_command, catch_exceptions=False)
+    client = app.test_client()
+    pooled_get_db = graph_db_module.get_db
+
+    def list_page(rng):
+        keys = [f"e-{rng.randint(1, args.companies)}" for _ in range(10)]
+        with app.test_request_context():
+            get_nodes_by_ids(keys)
+
+    def node_page(rng):
+        with app.test_request_context():
+            get_company_by_id(rng.randint(1, args.companies))
+
+    def search_page(rng):
+        # A new query each time so the page cache is never hit
+        q = f"person {rng.randint(1, args.companies)}"
+        client.get("/search/individuals", query_string={"q": q})
+
+    workloads = {
+        "list page (10 nodes)": list_page,
+        "node lookup": node_page,
+        "GET /search/individuals": search_page,
+    }
+    for name, workload in workloads.items():
+        print(name)
+        for model, get_db in [
+            ("per request", connect_per_request),
+            ("per thread", pooled_get_db),
+        ]:
+            graph_db_module.get_db = get_db
+            # Both models run the same queries, so start from an empty cache
+            with app.app_context():
+                cache.clear()
+            rng = random.Random(0)
+            workload(rng)  # Warm up
+            timings = []
+            for _ in range(args.requests):
+                timings += measure(workload, rng)
+            print(f"  {model:>11}: {summarize(timings)}")
+    graph_db_module.get_db = pooled_get_db
+
+
+if __name__ == "__main__":
+    main()
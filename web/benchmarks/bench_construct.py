@@ -0,0 +1,35 @@
+"""Measure how graph construction time scales with the number of edges.
+
+Usage:
+    python -m benchmarks.bench_construct --sizes 10000 100000 1000000
+"""
+import argparse
+
+from app.graph import _construct_csr_graph, _construct_graph
+from benchmarks.common import measure
+from benchmarks.synthetic import generate_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    args = parser.parse_args()
+
+    print(f"{'edges':>9} | {'builder':>8} | {'total':>10} | {'per edge':>9}")
+    for edges in args.sizes:
+        rows = generate_rows(companies=edges // 4, edges=edges)
+        for name, builder in [
+            ("networkx", _construct_graph),
+            ("csr", _construct_csr_graph),
+        ]:
+            (elapsed,) = measure(builder, *rows)
+            print(
+                f"{edges:>9} | {name:>8} | {elapsed:>7.0f} ms "
+                f"| {elapsed * 1000 / edges:>6.2f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compare memory and subgraph latency of the CSR graph against NetworkX.
+
+Usage:
+    python -m benchmarks.bench_csr --companies 50000 --edges 200000
+"""
+import argparse
+import random
+import tracemalloc
+
+from app.graph import _construct_csr_graph, _construct_graph, extract_subgraph
+from benchmarks.common import measure, summarize
+from benchmarks.synthetic import generate_rows
+import networkx as nx
+
+
+def networkx_subgraph(G, node_id, depth=1):
+    nodes = set(nx.bfs_tree(G, node_id, depth_limit=depth)) | set(
+        nx.bfs_tree(G, node_id, depth_limit=depth, reverse=True)
+    )
+    return G.subgraph(nodes)
+
+
+def serialize(subgraph):
+    """Walk the subgraph the same way `graph_view.graph` does."""
+    nodes = [(node, data["label"]) for node, data in subgraph.nodes(data=True)]
+    edges = [(s, t, d["relationship"]) for s, t, d in subgraph.edges(data=True)]
+    return nodes, edges
+
+
+def build(builder, rows):
+    tracemalloc.start()
+    graph = builder(*rows)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return graph, size / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=50_000)
+    parser.add_argument("--edges", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = generate_rows(args.companies, edges=args.edges)
+    rng = random.Random(0)
+    node_ids = [
+        f"{rng.choice('ei')}-{rng.randint(1, args.companies)}"
+        for _ in range(args.requests)
+    ]
+
+    for name, builder, extract in [
+        ("networkx", _construct_graph, networkx_subgraph),
+        ("csr", _construct_csr_graph, extract_subgraph),
+    ]:
+        graph, size = build(builder, rows)
+        timings = [
+            measure(lambda n, g=graph, f=extract: serialize(f(g, n)), node_id)[0]
+            for node_id in node_ids
+        ]
+        print(f"{name:>9}: {size:8.1f} MiB | subgraph {summarize(timings)}")
+
+
+if __name__ == "__main__":
+    main()
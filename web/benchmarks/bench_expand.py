@@ -0,0 +1,60 @@
+"""Compare a navigation step by full /graph reload against /api/expand.
+
+Walks from random nodes to one of their neighbors and measures the bytes and
+time of rendering the neighbor's page against expanding it in place.
+
+Usage:
+    python -m benchmarks.bench_expand --companies 50000 --edges 200000
+"""
+import argparse
+import random
+
+from benchmarks.common import create_benchmark_app, get_graph_db, measure, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=50_000)
+    parser.add_argument("--edges", type=int, default=200_000)
+    parser.add_argument("--steps", type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_benchmark_app(get_graph_db(args.companies, args.edges))
+    app.config["CACHE_TYPE"] = "NullCache"
+
+    from app.extensions import cache
+    from app.graph import load_graph
+
+    cache.init_app(app)
+    with app.app_context():
+        G = load_graph()
+
+    rng = random.Random(0)
+    client = app.test_client()
+    sizes = {"reload": [], "expand": []}
+    timings = {"reload": [], "expand": []}
+    for _ in range(args.steps):
+        start = G.key(rng.randrange(len(G)))
+        page = client.get(f"/api/expand?nodeId={start}").get_json()
+        shown = [n["data"]["id"] for n in page["nodes"] if n["data"]["type"] != "more"]
+        if len(shown) < 2:
+            continue
+        target = rng.choice(shown[1:])
+
+        def reload(target=target):
+            sizes["reload"].append(len(client.get(f"/graph?nodeId={target}").data))
+
+        def expand(target=target, shown=shown):
+            body = {"nodeId": target, "exclude": shown}
+            sizes["expand"].append(len(client.post("/api/expand", json=body).data))
+
+        timings["reload"] += measure(reload)
+        timings["expand"] += measure(expand)
+
+    for name in ("reload", "expand"):
+        average = sum(sizes[name]) / len(sizes[name]) / 1024
+        print(f"{name:>6}: {summarize(timings[name])} | {average:6.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
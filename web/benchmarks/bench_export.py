@@ -0,0 +1,76 @@
+"""Compare peak memory of streamed /api/subgraph exports with building them in memory.
+
+Usage:
+    python -m benchmarks.bench_export --companies 250000 --edges 1000000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from benchmarks.common import create_benchmark_app, get_graph_db
+
+
+def _peak(func):
+    """Return the result, seconds taken and peak MiB allocated by `func`."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=250_000)
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    parser.add_argument("--depth", type=int, default=2)
+    args = parser.parse_args()
+
+    app = create_benchmark_app(get_graph_db(args.companies, args.edges))
+    # Every company and individual of the synthetic graph
+    app.config["EXPORT_MAX_NODES"] = 2 * args.companies
+
+    from app.export import collect_nodes
+    from app.graph import load_graph, subgraph_elements
+
+    with app.app_context():
+        G = load_graph()
+    hub = max(range(len(G)), key=G.degree)
+    node_id = G.key(hub)
+    subgraph = G.subgraph(collect_nodes(G, hub, args.depth, len(G)))
+    print(
+        f"{node_id} depth {args.depth}: {subgraph.number_of_nodes()} nodes, "
+        f"{subgraph.number_of_edges()} edges"
+    )
+
+    def in_memory():
+        return len(json.dumps(subgraph_elements(subgraph)).encode())
+
+    client = app.test_client()
+
+    def streamed(fmt):
+        response = client.get(
+            f"/api/subgraph.{fmt}?nodeId={node_id}&depth={args.depth}",
+            buffered=False,
+        )
+        size = sum(len(chunk) for chunk in response.response)
+        response.close()
+        return size
+
+    for name, func in [
+        ("in memory", in_memory),
+        ("ndjson", lambda: streamed("ndjson")),
+        ("json", lambda: streamed("json")),
+    ]:
+        size, elapsed, peak = _peak(func)
+        print(
+            f"{name:>9}: {elapsed:6.2f} s | {size / 2**20:6.1f} MiB out | "
+            f"peak {peak:6.1f} MiB allocated"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Time writing the full graph downloads of `flask export-graph` in each format.
+
+Usage:
+    python -m benchmarks.bench_graph_export --companies 250000 --edges 1000000
+"""
+import argparse
+from pathlib import Path
+import tempfile
+import tracemalloc
+
+from benchmarks.common import create_benchmark_app, get_graph_db, measure
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=250_000)
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    app = create_benchmark_app(get_graph_db(args.companies, args.edges))
+
+    from app.export import EXPORT_FORMATS, write_export
+    from app.graph import load_graph
+
+    with app.app_context():
+        G = load_graph()
+    print(f"{G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
+
+    directory = Path(tempfile.mkdtemp(prefix="vfsc-export-"))
+    for fmt in EXPORT_FORMATS:
+        path = directory / f"graph.{fmt}.gz"
+        tracemalloc.start()
+        (timing,) = measure(write_export, G, fmt, path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{fmt:>7}: {timing / 1000:6.1f} s | "
+            f"{path.stat().st_size / 2**20:6.1f} MiB gzipped | "
+            f"peak {peak / 2**20:5.1f} MiB allocated"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Compare per-request graph access through FileSystemCache against the graph store.
+
+Before: `load_graph` was memoized with FileSystemCache so every request read the
+pickled graph back from disk. After: the graph is held in process memory.
+
+Usage:
+    python -m benchmarks.bench_graph_store --companies 50000 --edges 200000
+"""
+import argparse
+import random
+
+from benchmarks.common import create_benchmark_app, get_graph_db, measure, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=50_000)
+    parser.add_argument("--edges", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    app = create_benchmark_app(get_graph_db(args.companies, args.edges))
+
+    from app.extensions import cache
+    from app.graph import _build_graph, extract_subgraph, load_graph
+
+    pickled_load_graph = cache.memoize()(_build_graph)
+    rng = random.Random(0)
+    node_ids = [f"e-{rng.randint(1, args.companies)}" for _ in range(args.requests)]
+
+    def request(loader, node_id):
+        with app.test_request_context():
+            extract_subgraph(loader(), node_id)
+
+    with app.app_context():
+        build = measure(load_graph)
+        pickled_load_graph()  # warm the FileSystemCache
+
+    print(f"graph build (once per worker): {build[0]:.1f} ms")
+    for name, loader in [
+        ("FileSystemCache", pickled_load_graph),
+        ("graph store", load_graph),
+    ]:
+        timings = [measure(request, loader, node_id)[0] for node_id in node_ids]
+        print(f"{name:>16}: {summarize(timings)}")
+
+
+if __name__ == "__main__":
+    main()
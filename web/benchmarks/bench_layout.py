@@ -0,0 +1,48 @@
+"""Time the server-side layout of /graph neighborhoods at different budgets.
+
+Neighborhoods of more than MAX_LAYOUT_NODES nodes are not laid out.
+
+Usage:
+    python -m benchmarks.bench_layout --companies 50000 --edges 200000
+"""
+import argparse
+import random
+
+from benchmarks.common import create_benchmark_app, get_graph_db, measure, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=50_000)
+    parser.add_argument("--edges", type=int, default=200_000)
+    parser.add_argument("--nodes", type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_benchmark_app(get_graph_db(args.companies, args.edges))
+
+    from app.graph import extract_budgeted_subgraph, load_graph
+    from app.layout import MAX_LAYOUT_NODES, add_positions
+    from app.payload import subgraph_payload
+
+    with app.app_context():
+        G = load_graph()
+    rng = random.Random(0)
+    hubs = sorted(range(len(G)), key=G.degree, reverse=True)[: args.nodes // 2]
+    nodes = hubs + rng.sample(range(len(G)), args.nodes - len(hubs))
+
+    for depth, max_nodes in [(1, 250), (2, 250), (2, 1000), (3, 2000)]:
+        sizes, timings = [], []
+        for index in nodes:
+            subgraph = extract_budgeted_subgraph(G, G.key(index), depth, max_nodes)
+            payload = subgraph_payload(subgraph)
+            sizes.append(len(payload["nodes"]["id"]))
+            timings += measure(add_positions, payload)
+        print(
+            f"depth {depth}, maxNodes {max_nodes:>4}: {summarize(timings)} | "
+            f"up to {max(sizes)} nodes, "
+            f"{sum(size > MAX_LAYOUT_NODES for size in sizes)} left to the browser"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Compare /graph latency using the neighborhood index against a live BFS.
+
+Usage:
+    python -m benchmarks.bench_neighborhoods --companies 50000 --edges 200000
+"""
+import argparse
+import random
+
+from benchmarks.common import create_benchmark_app, get_graph_db, measure, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=50_000)
+    parser.add_argument("--edges", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_benchmark_app(get_graph_db(args.companies, args.edges))
+
+    from app.extensions import cache
+    from app.graph import extract_subgraph, load_graph
+    from app.neighborhoods import NeighborhoodIndex
+
+    with app.app_context():
+        G = load_graph()
+    (build,) = measure(lambda: NeighborhoodIndex.build(G))
+    index = NeighborhoodIndex.build(G)
+    print(f"index build {build:.0f} ms, {index.nbytes() / 2**20:.1f} MiB")
+
+    rng = random.Random(0)
+    node_ids = [
+        f"{rng.choice('ei')}-{rng.randint(1, args.companies)}"
+        for _ in range(args.requests)
+    ]
+    client = app.test_client()
+    for name, neighborhoods in [("live BFS", None), ("index", index)]:
+        G.neighborhoods = neighborhoods
+        with app.app_context():
+            cache.clear()
+        timings = [
+            measure(client.get, f"/graph?nodeId={node_id}")[0] for node_id in node_ids
+        ]
+        print(f"{name:>9}: /graph            {summarize(timings)}")
+        for depth in (1, 2):
+            timings = [
+                measure(extract_subgraph, G, node_id, depth)[0] for node_id in node_ids
+            ]
+            print(f"{name:>9}: subgraph depth {depth}  {summarize(timings)}")
+
+
+if __name__ == "__main__":
+    main()
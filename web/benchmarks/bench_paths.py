@@ -0,0 +1,46 @@
+"""Time /api/path searches between random nodes.
+
+Usage:
+    python -m benchmarks.bench_paths --companies 250000 --edges 1000000
+"""
+import argparse
+import random
+
+from benchmarks.common import create_benchmark_app, get_graph_db, measure, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=250_000)
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--max-depth", type=int, default=6)
+    args = parser.parse_args()
+
+    app = create_benchmark_app(get_graph_db(args.companies, args.edges))
+
+    from app.graph import load_graph
+
+    with app.app_context():
+        G = load_graph()
+    print(f"{G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
+
+    rng = random.Random(0)
+    pairs = [
+        (G.key(rng.randrange(len(G))), G.key(rng.randrange(len(G))))
+        for _ in range(args.requests)
+    ]
+    client = app.test_client()
+    for k in (1, 3):
+        found, timed_out, timings = 0, 0, []
+        for source, target in pairs:
+            url = f"/api/path?from={source}&to={target}&k={k}&maxDepth={args.max_depth}"
+            timings += measure(client.get, url)
+            data = client.get(url).get_json()
+            found += bool(data["paths"])
+            timed_out += data["timedOut"]
+        print(f"k={k}: {summarize(timings)} | {found} connected, {timed_out} timed out")
+
+
+if __name__ == "__main__":
+    main()
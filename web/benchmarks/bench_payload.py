@@ -0,0 +1,53 @@
+"""Compare the size and encode time of the Cytoscape and columnar /graph payloads.
+
+Usage:
+    python -m benchmarks.bench_payload --companies 50000 --edges 200000
+"""
+import argparse
+import gzip
+import json
+
+from benchmarks.common import create_benchmark_app, get_graph_db, measure, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=50_000)
+    parser.add_argument("--edges", type=int, default=200_000)
+    parser.add_argument("--hubs", type=int, default=10)
+    args = parser.parse_args()
+
+    app = create_benchmark_app(get_graph_db(args.companies, args.edges))
+
+    from app.graph import extract_budgeted_subgraph, load_graph, subgraph_elements
+    from app.payload import dumps, subgraph_payload
+
+    with app.app_context():
+        G = load_graph()
+    hubs = sorted(range(len(G)), key=G.degree, reverse=True)[: args.hubs]
+
+    encoders = [
+        ("cytoscape", lambda s: json.dumps(subgraph_elements(s))),
+        ("columnar", lambda s: dumps(subgraph_payload(s))),
+    ]
+    for depth, max_nodes in [(1, 250), (2, 250), (2, 2000), (3, 2000)]:
+        subgraphs = [
+            extract_budgeted_subgraph(G, G.key(index), depth, max_nodes)
+            for index in hubs
+        ]
+        print(f"hubs at depth {depth}, maxNodes {max_nodes}")
+        for name, encode in encoders:
+            timings, sizes, gzipped = [], [], []
+            for subgraph in subgraphs:
+                timings += measure(encode, subgraph, repeat=3)
+                data = encode(subgraph).encode()
+                sizes.append(len(data))
+                gzipped.append(len(gzip.compress(data)))
+            print(
+                f"  {name:>9}: {summarize(timings)} | "
+                f"{max(sizes) / 1024:7.1f} KiB, {max(gzipped) / 1024:6.1f} KiB gzipped"
+            )
+
+
+if __name__ == "__main__":
+    main()
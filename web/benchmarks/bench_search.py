@@ -0,0 +1,72 @@
+"""Compare /search name lookups with LIKE scans and with the FTS5 index.
+
+Runs on a copy of the synthetic database since the index is written to it.
+
+Usage:
+    python -m benchmarks.bench_search --companies 250000 --edges 1000000
+"""
+import argparse
+from pathlib import Path
+import random
+import shutil
+import tempfile
+
+from benchmarks.common import create_benchmark_app, get_graph_db, measure, summarize
+
+# The scans /search ran before the index, one per table
+LIKE_QUERIES = [
+    "SELECT id, company_name, company_number, company_type, entity_status, "
+    "registration_date FROM companies WHERE company_name LIKE ?",
+    "SELECT id, name FROM individuals WHERE name LIKE ?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=250_000)
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    graph_db = Path(tempfile.mkdtemp(prefix="vfsc-search-")) / "graph.db"
+    shutil.copy(get_graph_db(args.companies, args.edges), graph_db)
+    app = create_benchmark_app(graph_db)
+
+    from app.commands import build_search_index_command
+    from app.db.graph_db import get_db, search_company_names, search_individual_names
+
+    runner = app.test_cli_runner()
+    (timing,) = measure(
+        runner.invoke, build_search_index_command, catch_exceptions=False
+    )
+    print(f"build-search-index: {timing / 1000:.1f} s")
+
+    rng = random.Random(0)
+    queries = {
+        "full name": lambda: f"COMPANY {rng.randint(1, args.companies)} LIMITED",
+        "unfinished word": lambda: f"company {rng.randint(1, args.companies // 10)}",
+        "person": lambda: f"PERSON {rng.randint(1, args.companies)}",
+    }
+    with app.test_request_context():
+        db = get_db()
+        for name, make_query in queries.items():
+            words = [make_query() for _ in range(args.queries)]
+            like, fts, found = [], [], 0
+            for q in words:
+                like += measure(
+                    lambda q=q: [
+                        db.execute(query, (f"%{q}%",)).fetchall()
+                        for query in LIKE_QUERIES
+                    ]
+                )
+                fts += measure(
+                    lambda q=q: (search_company_names(q), search_individual_names(q))
+                )
+                found += bool(search_company_names(q) or search_individual_names(q))
+            print(f"{name} ({found}/{len(words)} found)")
+            print(f"  LIKE: {summarize(like)}")
+            print(f"  FTS5: {summarize(fts)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Measure worker startup time and memory with and without a graph snapshot.
+
+Each mode runs in a fresh interpreter that creates the app (which preloads the
+graph) and reports the elapsed time, its RSS and its proportional set size
+(PSS), which divides shared pages such as the mapped snapshot between the
+processes using them.
+
+Usage:
+    python -m benchmarks.bench_snapshot --companies 50000 --edges 200000
+"""
+import argparse
+import json
+from pathlib import Path
+import subprocess
+import sys
+import time
+
+
+def read_memory():
+    """Return (rss, pss) of the current process in MiB (Linux only)."""
+    fields = {}
+    for line in Path("/proc/self/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        fields[name] = int(value.split()[0])
+    return fields["Rss"] / 1024, fields["Pss"] / 1024
+
+
+def child(graph_db, use_snapshot):
+    from benchmarks.common import create_benchmark_app
+
+    baseline = read_memory()
+    start = time.perf_counter()
+    app = create_benchmark_app(graph_db)
+    if not use_snapshot:
+        assert not Path(app.config["GRAPH_SNAPSHOT"]).exists()
+    elapsed = (time.perf_counter() - start) * 1000
+    rss, pss = read_memory()
+    print(
+        json.dumps(
+            {
+                "startup_ms": elapsed,
+                "rss_mib": rss - baseline[0],
+                "pss_mib": pss - baseline[1],
+            }
+        )
+    )
+
+
+def compile_snapshot(graph_db):
+    from app.commands import compile_graph_command
+    from benchmarks.common import create_benchmark_app
+
+    app = create_benchmark_app(graph_db)
+    app.test_cli_runner().invoke(compile_graph_command)
+
+
+def run_child(graph_db, use_snapshot):
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_snapshot", "--child", str(graph_db)]
+        + (["--snapshot"] if use_snapshot else []),
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=50_000)
+    parser.add_argument("--edges", type=int, default=200_000)
+    parser.add_argument("--child")
+    parser.add_argument("--snapshot", action="store_true")
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.snapshot)
+        return
+
+    from benchmarks.common import get_graph_db
+
+    graph_db = get_graph_db(args.companies, args.edges)
+    snapshot = graph_db.with_name(f"{graph_db.name}.snapshot")
+    snapshot.unlink(missing_ok=True)
+    results = {"sql": run_child(graph_db, use_snapshot=False)}
+    compile_snapshot(graph_db)
+    results["snapshot"] = run_child(graph_db, use_snapshot=True)
+
+    for name, result in results.items():
+        print(
+            f"{name:>9}: startup {result['startup_ms']:8.1f} ms | "
+            f"RSS +{result['rss_mib']:6.1f} MiB | PSS +{result['pss_mib']:6.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Compare subgraph size and time on hub nodes with and without a node budget.
+
+Usage:
+    python -m benchmarks.bench_subgraph_budget --companies 50000 --edges 200000
+"""
+import argparse
+
+from benchmarks.common import create_benchmark_app, get_graph_db, measure, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=50_000)
+    parser.add_argument("--edges", type=int, default=200_000)
+    parser.add_argument("--hubs", type=int, default=5)
+    parser.add_argument("--max-nodes", type=int, default=250)
+    args = parser.parse_args()
+
+    app = create_benchmark_app(get_graph_db(args.companies, args.edges))
+
+    from app.graph import extract_budgeted_subgraph, extract_subgraph, load_graph
+
+    with app.app_context():
+        G = load_graph()
+    G.neighborhoods = None
+    hubs = sorted(range(len(G)), key=G.degree, reverse=True)[: args.hubs]
+
+    client = app.test_client()
+    for index in hubs:
+        node_id = G.key(index)
+        print(f"{node_id} (degree {G.degree(index)})")
+        for depth in (1, 2):
+            for name, extract, kwargs in [
+                ("full", extract_subgraph, {}),
+                ("budgeted", extract_budgeted_subgraph, {"max_nodes": args.max_nodes}),
+            ]:
+
+                def run(extract=extract, node_id=node_id, depth=depth, kwargs=kwargs):
+                    subgraph = extract(G, node_id, depth, **kwargs)
+                    list(subgraph.edges(data=True))
+                    return subgraph
+
+                timings = measure(run, repeat=3)
+                print(
+                    f"  depth {depth} {name:>8}: {summarize(timings)} | "
+                    f"{run().number_of_nodes():>7} nodes"
+                )
+        response = client.get(
+            f"/graph?nodeId={node_id}&depth=2&maxNodes={args.max_nodes}"
+        )
+        print(f"  /graph depth 2 page: {len(response.data) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Time building the suggestion index and /api/suggest lookups on a synthetic graph.
+
+Usage:
+    python -m benchmarks.bench_suggest --companies 250000 --edges 1000000
+"""
+import argparse
+import random
+
+from benchmarks.common import create_benchmark_app, get_graph_db, measure, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=250_000)
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_benchmark_app(get_graph_db(args.companies, args.edges))
+
+    from app.graph import load_graph
+    from app.suggest import SuggestionIndex
+
+    with app.app_context():
+        G = load_graph()
+    print(f"{G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
+
+    (timing,) = measure(SuggestionIndex.build, G)
+    print(f"build: {timing / 1000:.1f} s")
+    G.suggestions = SuggestionIndex.build(G)
+
+    rng = random.Random(0)
+    client = app.test_client()
+    # Every keystroke of a name, from one letter to the whole name
+    keystrokes = {
+        "first letters": lambda name: name[: rng.randint(1, 3)],
+        "word prefix": lambda name: name.split()[1][: rng.randint(1, 4)],
+        "whole name": lambda name: name,
+    }
+    for kind, make_query in keystrokes.items():
+        index_timings, api_timings = [], []
+        for _ in range(args.queries):
+            q = make_query(G.label(rng.randrange(len(G))))
+            index_timings += measure(G.suggestions.suggest, q)
+            api_timings += measure(client.get, "/api/suggest", query_string={"q": q})
+        print(f"{kind}")
+        print(f"  index: {summarize(index_timings)}")
+        print(f"  /api/suggest: {summarize(api_timings)}")
+
+
+if __name__ == "__main__":
+    main()
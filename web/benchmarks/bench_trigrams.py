@@ -0,0 +1,63 @@
+"""Time building the trigram index and fuzzy name searches on a synthetic graph.
+
+Usage:
+    python -m benchmarks.bench_trigrams --companies 250000 --edges 1000000
+"""
+import argparse
+from pathlib import Path
+import random
+import tempfile
+
+from benchmarks.common import create_benchmark_app, get_graph_db, measure, summarize
+
+
+def misspell(name, rng):
+    """Drop one letter from every word of `name`, leaving numbers alone."""
+    words = []
+    for word in name.split():
+        i = rng.randrange(len(word))
+        words.append(word[:i] + word[i + 1 :] if word.isalpha() else word)
+    return " ".join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=250_000)
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    app = create_benchmark_app(get_graph_db(args.companies, args.edges))
+
+    from app.graph import load_graph
+    from app.trigrams import TrigramIndex, fuzzy_search
+
+    with app.app_context():
+        G = load_graph()
+    print(f"{G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
+
+    (timing,) = measure(TrigramIndex.build, G)
+    index = TrigramIndex.build(G)
+    print(f"build: {timing / 1000:.1f} s, {index.nbytes() / 2**20:.1f} MiB")
+
+    path = Path(tempfile.mkdtemp(prefix="vfsc-trigrams-")) / "graph.db.trigrams"
+    index.write(path, "bench")
+    G.trigrams = TrigramIndex.load(path, "bench")
+
+    rng = random.Random(0)
+    for name, nodes in [
+        ("company", range(G.n_entities)),
+        ("individual", range(G.n_entities, len(G))),
+    ]:
+        timings, found = [], 0
+        for _ in range(args.queries):
+            index = rng.choice(nodes)
+            q = misspell(G.label(index), rng)
+            timings += measure(fuzzy_search, G, q)
+            matches = fuzzy_search(G, q)[G.node_type(index)]
+            found += index in [match for match, _ in matches]
+        print(f"misspelled {name} ({found}/{args.queries} found): {summarize(timings)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import os
+from pathlib import Path
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic import create_database
+from loguru import logger
+
+
+def get_graph_db(companies=50_000, edges=200_000, path=None):
+    """Return the path to a synthetic graph database, creating it if missing."""
+    path = Path(
+        path or Path(tempfile.gettempdir()) / f"vfsc-bench-{companies}-{edges}.db"
+    )
+    if not path.exists():
+        create_database(path, companies=companies, edges=edges)
+    return path
+
+
+def create_benchmark_app(graph_db):
+    """Create the Flask app configured against the given graph database.
+
+    Cache, logs and the app database are placed in a fresh temporary directory.
+    """
+    graph_db = Path(graph_db)
+    workdir = Path(tempfile.mkdtemp(prefix="vfsc-bench-"))
+    os.environ.update(
+        {
+            "CACHE_DIR": str(workdir / "cache"),
+            "LOGS_DIR": str(workdir / "logs"),
+            "DATA_DIR": str(graph_db.parent),
+            "APP_DB_FILE": f"{workdir.name}-app.db",
+            "GRAPH_DB_FILE": graph_db.name,
+        }
+    )
+    from app.main import create_app
+
+    app = create_app()
+    logger.remove()
+    return app
+
+
+def measure(func, *args, repeat=1, **kwargs):
+    """Return the wall time in milliseconds of each call to `func`."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    return f"p50 {statistics.median(timings):9.3f} ms | p99 {p99:9.3f} ms"
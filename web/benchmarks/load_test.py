@@ -0,0 +1,134 @@
+"""Measure /graph throughput as the number of gunicorn workers grows.
+
+Starts gunicorn with `gunicorn_conf.py` for each worker count against a
+synthetic graph database and hammers random `/graph?nodeId=` pages from
+several client processes.
+
+Usage:
+    python -m benchmarks.load_test --workers 1 2 4 --duration 10
+"""
+import argparse
+from multiprocessing import Pool
+import os
+from pathlib import Path
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from benchmarks.common import get_graph_db
+
+PORT = 8765
+
+
+def client(args):
+    seed, companies, deadline = args
+    rng = random.Random(seed)
+    count = 0
+    while time.time() < deadline:
+        node_id = f"{rng.choice('ei')}-{rng.randint(1, companies)}"
+        with urlopen(f"http://127.0.0.1:{PORT}/graph?nodeId={node_id}") as response:
+            response.read()
+        count += 1
+    return count
+
+
+def wait_for_server(timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urlopen(f"http://127.0.0.1:{PORT}/favicon.ico"):
+                return
+        except (URLError, ConnectionError):
+            time.sleep(0.2)
+    msg = "gunicorn did not start"
+    raise RuntimeError(msg)
+
+
+def worker_memory(master_pid):
+    """Return the summed (PSS, private) MiB of the gunicorn workers, on Linux.
+
+    Pages of the graph shared copy-on-write with the master are split between
+    the processes in PSS and missing from their private memory.
+    """
+    pss = private = 0
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            ppid = int(stat.read_text().rsplit(")", 1)[1].split()[1])
+            if ppid != master_pid:
+                continue
+            rollup = (stat.parent / "smaps_rollup").read_text().splitlines()
+        except OSError:
+            continue
+        for line in rollup:
+            name, value, *_ = line.split()
+            if name == "Pss:":
+                pss += int(value)
+            elif name in ("Private_Clean:", "Private_Dirty:"):
+                private += int(value)
+    return pss / 2**10, private / 2**10
+
+
+def run(graph_db, workers, clients, duration, companies):
+    workdir = Path(tempfile.mkdtemp(prefix="vfsc-load-"))
+    env = {
+        **os.environ,
+        "WORKERS": str(workers),
+        "BIND": f"127.0.0.1:{PORT}",
+        "CACHE_DIR": str(workdir / "cache"),
+        "LOGS_DIR": str(workdir / "logs"),
+        "DATA_DIR": str(graph_db.parent),
+        "APP_DB_FILE": f"{workdir.name}-app.db",
+        "GRAPH_DB_FILE": graph_db.name,
+    }
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--config",
+            "gunicorn_conf.py",
+            "app.main:create_app()",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_server()
+        deadline = time.time() + duration
+        with Pool(clients) as pool:
+            counts = pool.map(
+                client, [(seed, companies, deadline) for seed in range(clients)]
+            )
+        return sum(counts) / duration, worker_memory(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=50_000)
+    parser.add_argument("--edges", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=int, default=10)
+    args = parser.parse_args()
+
+    graph_db = get_graph_db(args.companies, args.edges)
+    for workers in args.workers:
+        throughput, (pss, private) = run(
+            graph_db, workers, args.clients, args.duration, args.companies
+        )
+        print(
+            f"{workers:>2} workers: {throughput:8.1f} req/s"
+            f" | workers' PSS {pss:7.1f} MiB, private {private:7.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Generate a synthetic graph database with the same schema as the scraper output.
+
+Usage:
+    python -m benchmarks.synthetic /tmp/graph.db --companies 50000 --edges 200000
+"""
+import argparse
+import importlib
+from pathlib import Path
+import random
+import sqlite3
+import sys
+
+# The scraper owns the graph db schema, so synthetic databases are migrated
+# with its migrations, from the scraper checked out alongside the web app
+SCRAPER = Path(__file__).resolve().parents[2] / "scraper"
+
+STATUSES = [
+    "Registered",
+    "Registered",
+    "Registered",
+    "Removed",
+    "Dissolved",
+    "In Liquidation",
+]
+
+
+def import_scraper(name):
+    """Import a module of the scraper, such as `vfscscraper.migrations`."""
+    if str(SCRAPER) not in sys.path:
+        sys.path.append(str(SCRAPER))
+    return importlib.import_module(name)
+
+
+def create_schema(conn):
+    conn.executescript(
+        """
+        CREATE TABLE companies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_name TEXT,
+            company_number TEXT,
+            company_type TEXT,
+            entity_type TEXT,
+            entity_status TEXT,
+            registration_date TEXT,
+            annual_filing_month TEXT,
+            email_address TEXT,
+            office_address TEXT,
+            postal_address TEXT,
+            total_shares INTEGER,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            lastseen TIMESTAMP
+        );
+        CREATE TABLE individuals (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE
+        );
+        CREATE TABLE company_directors (
+            company_id INTEGER,
+            individual_id INTEGER,
+            entity_id INTEGER,
+            appointed_date TEXT,
+            ceased_at TEXT
+        );
+        CREATE TABLE company_shareholders (
+            company_id INTEGER,
+            individual_id INTEGER,
+            entity_id,
+            appointed_date TEXT,
+            ceased_at TEXT,
+            number_of_shares INTEGER
+        );
+        """
+    )
+
+
+def _skewed(rng, n):
+    """Pick an id in 1..n where low ids are picked far more often (hub nodes)."""
+    return (
+        min(int(rng.paretovariate(1.2)), n) if rng.random() < 0.2 else rng.randint(1, n)
+    )
+
+
+def generate_rows(companies=10_000, individuals=None, edges=40_000, seed=42):
+    """Return synthetic (companies, individuals, directors, shareholders) rows.
+
+    The rows match what `app.graph._fetch_graph_data` reads from the database.
+    """
+    rng = random.Random(seed)
+    individuals = individuals or companies
+    company_rows = [
+        (i, f"COMPANY {i} LIMITED", rng.choice(STATUSES))
+        for i in range(1, companies + 1)
+    ]
+    individual_rows = [(i, f"PERSON {i}") for i in range(1, individuals + 1)]
+    directors = []
+    shareholders = []
+    for _ in range(edges):
+        company_id = rng.randint(1, companies)
+        individual_id, entity_id = None, None
+        if rng.random() < 0.85:
+            individual_id = _skewed(rng, individuals)
+        else:
+            entity_id = _skewed(rng, companies)
+        if rng.random() < 0.5:
+            directors.append((company_id, individual_id, entity_id))
+        else:
+            shares = rng.choice([0, 1, 10, 100, 1000])
+            shareholders.append((company_id, individual_id, entity_id, shares))
+    return company_rows, individual_rows, directors, shareholders
+
+
+def create_database(path, companies=10_000, individuals=None, edges=40_000, seed=42):
+    path = Path(path)
+    if path.exists():
+        path.unlink()
+    company_rows, individual_rows, directors, shareholders = generate_rows(
+        companies, individuals, edges, seed
+    )
+    rng = random.Random(seed)
+    with sqlite3.connect(path) as conn:
+        create_schema(conn)
+        conn.executemany(
+            """
+            INSERT INTO companies (id, company_name, company_number, company_type,
+            entity_status, registration_date, updated_at, lastseen)
+            VALUES (?, ?, ?, 'Local', ?, ?, ?, ?)
+            """,
+            (
+                (
+                    id,
+                    name,
+                    str(10_000 + id),
+                    status,
+                    f"{rng.randint(1980, 2024)}-{rng.randint(1, 12):02d}-01 00:00:00",
+                    f"2024-{rng.randint(1, 12):02d}-01 00:00:00",
+                    "2024-08-01 00:00:00",
+                )
+                for id, name, status in company_rows
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO individuals (id, name) VALUES (?, ?)", individual_rows
+        )
+        conn.executemany(
+            """
+            INSERT INTO company_directors (company_id, individual_id, entity_id)
+            VALUES (?, ?, ?)
+            """,
+            directors,
+        )
+        conn.executemany(
+            """
+            INSERT INTO company_shareholders
+            (company_id, individual_id, entity_id, number_of_shares)
+            VALUES (?, ?, ?, ?)
+            """,
+            shareholders,
+        )
+    # Indexed after the rows are in, like a database crawled before the
+    # indexes existed
+    import_scraper("vfscscraper.migrations").migrate(conn)
+    conn.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--companies", type=int, default=10_000)
+    parser.add_argument("--individuals", type=int, default=None)
+    parser.add_argument("--edges", type=int, default=40_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    create_database(args.path, args.companies, args.individuals, args.edges, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -27,3 +27,24 @@ class Config:
     APP_DB = Path(DATA_DIR) / _APP_DB_FILE
     _GRAPH_DB_FILE = environ["GRAPH_DB_FILE"]
     GRAPH_DB = Path(DATA_DIR) / _GRAPH_DB_FILE
+    # Bytes of the graph db each process reads through a memory map
+    GRAPH_DB_MMAP_SIZE = int(environ.get("GRAPH_DB_MMAP_SIZE", 256 * 2**20))
+    # KiB of page cache for each thread's graph db connection
+    GRAPH_DB_CACHE_SIZE = int(environ.get("GRAPH_DB_CACHE_SIZE", 32 * 2**10))
+    # Tables computed from the graph by the `build-*` commands, attached to
+    # graph db connections so writing them leaves the graph db unchanged
+    GRAPH_DERIVED_DB = GRAPH_DB.with_name(f"{_GRAPH_DB_FILE}.derived")
+    # Compiled by `flask compile-graph`; see app/snapshot.py
+    GRAPH_SNAPSHOT = GRAPH_DB.with_name(f"{_GRAPH_DB_FILE}.snapshot")
+    # Built by `flask build-neighborhood-index`; see app/neighborhoods.py
+    GRAPH_NEIGHBORHOODS = GRAPH_DB.with_name(f"{_GRAPH_DB_FILE}.neighborhoods")
+    # Built by `flask build-trigram-index`; see app/trigrams.py
+    GRAPH_TRIGRAMS = GRAPH_DB.with_name(f"{_GRAPH_DB_FILE}.trigrams")
+    # Full graph downloads, one file per graph version; see app/export.py
+    GRAPH_EXPORTS = GRAPH_DB.with_name(f"{_GRAPH_DB_FILE}.exports")
+    # Seconds between checks for a replaced graph db; 0 disables reloading
+    GRAPH_RELOAD_INTERVAL = int(environ.get("GRAPH_RELOAD_INTERVAL", 30))
+    # Seconds a /api/path search may take before returning the paths found
+    PATH_TIME_LIMIT = float(environ.get("PATH_TIME_LIMIT", 0.5))
+    # Most nodes a /api/subgraph export may contain
+    EXPORT_MAX_NODES = int(environ.get("EXPORT_MAX_NODES", 100_000))
@@ -1,4 +1,5 @@
-# import multiprocessing
+import gc
+import multiprocessing
 import os
 
 host = os.getenv("HOST", "0.0.0.0")
@@ -8,10 +9,11 @@ use_bind = bind_env if bind_env else f"{host}:{port}"
 
 # Gunicorn configuration
 bind = use_bind
-# workers = multiprocessing.cpu_count() * 2 + 1
-# Limit 1 worker due to background tasks does not have a writing lock
-workers = 1
+workers = int(os.getenv("WORKERS", multiprocessing.cpu_count()))
 worker_class = "gthread"
+# Load the app, and with it the graph, once in the master so forked workers
+# share its memory copy-on-write
+preload_app = True
 worker_tmp_dir = "/dev/shm"
 threads = 4
 timeout = 30
@@ -37,6 +39,21 @@ def on_starting(server):
     print("Server is starting")
 
 
+def pre_fork(server, _worker):
+    from app.graph_store import graph_store
+
+    # Workers forked after a new graph was published, such as the ones
+    # replacing workers recycled after max_requests, start with that graph
+    # and its cache version rather than the one preloaded at startup
+    try:
+        graph_store.refresh()
+    except Exception:
+        server.log.exception("Error reloading the graph before forking")
+    # Move objects created while preloading out of the garbage collector's
+    # reach so collections in the workers do not write to the shared pages
+    gc.freeze()
+
+
 def on_exit(server):
     print("Server is shutting down")
 
@@ -1,3 +1,5 @@
+import sqlite3
+
 import pytest
 
 
@@ -15,3 +17,43 @@ def app():
 @pytest.fixture(scope="module")
 def client(app):
     return app.test_client()
+
+
+@pytest.fixture()
+def make_graph_db(app, tmp_path):
+    """Return a function pointing the app at a graph db of the given rows.
+
+    Companies are (id, name) pairs and individuals (id, name) pairs; the app
+    is pointed back at its own graph and derived dbs afterwards.
+    """
+    previous = app.config["GRAPH_DB"], app.config["GRAPH_DERIVED_DB"]
+
+    def make(companies, individuals):
+        path = tmp_path / "graph.db"
+        conn = sqlite3.connect(path)
+        conn.execute(
+            """
+            CREATE TABLE companies (
+                id INTEGER PRIMARY KEY, company_name TEXT, company_number TEXT,
+                company_type TEXT, entity_status TEXT, registration_date TEXT,
+                office_address TEXT, postal_address TEXT, lastseen TEXT
+            )
+            """
+        )
+        conn.execute("CREATE TABLE individuals (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.executemany(
+            """
+            INSERT INTO companies (id, company_name, entity_status)
+            VALUES (?, ?, 'Registered')
+            """,
+            companies,
+        )
+        conn.executemany("INSERT INTO individuals VALUES (?, ?)", individuals)
+        conn.commit()
+        conn.close()
+        app.config["GRAPH_DB"] = path
+        app.config["GRAPH_DERIVED_DB"] = tmp_path / "graph.db.derived"
+        return path
+
+    yield make
+    app.config["GRAPH_DB"], app.config["GRAPH_DERIVED_DB"] = previous
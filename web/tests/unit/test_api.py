@@ -0,0 +1,143 @@
+import gzip
+import json
+import time
+
+from app.graph import load_graph
+from app.trigrams import TrigramIndex
+
+
+def test_expand_requires_node_id(client):
+    response = client.get("/api/expand")
+
+    assert response.status_code == 400
+
+
+def test_expand_unknown_node(client):
+    response = client.get("/api/expand?nodeId=e-0")
+
+    assert response.status_code == 404
+
+
+def test_expand_leaves_out_excluded_nodes(client):
+    full = client.get("/api/expand?nodeId=e-1").get_json()
+    ids = [node["data"]["id"] for node in full["nodes"]]
+
+    response = client.post("/api/expand", json={"nodeId": "e-1", "exclude": ids})
+
+    assert response.status_code == 200
+    assert not {n["data"]["id"] for n in response.get_json()["nodes"]} & set(ids)
+
+
+def test_path_requires_both_ends(client):
+    response = client.get("/api/path?from=e-1")
+
+    assert response.status_code == 400
+
+
+def test_path_returns_cytoscape_elements(client):
+    response = client.get("/api/path?from=e-1&to=e-1")
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["paths"] == [["e-1"]]
+    assert [node["data"]["id"] for node in data["nodes"]] == ["e-1"]
+
+
+def test_owners_requires_company(client):
+    response = client.get("/api/owners?nodeId=i-1")
+
+    assert response.status_code == 400
+
+
+def test_subgraph_export_requires_node_id(client):
+    response = client.get("/api/subgraph.ndjson")
+
+    assert response.status_code == 400
+
+
+def test_subgraph_export_unknown_node(client):
+    response = client.get("/api/subgraph.json?nodeId=e-0")
+
+    assert response.status_code == 404
+
+
+def test_subgraph_exports_match(client):
+    ndjson = client.get("/api/subgraph.ndjson?nodeId=e-1&depth=2")
+    document = client.get("/api/subgraph.json?nodeId=e-1&depth=2")
+
+    assert ndjson.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in ndjson.data.decode().splitlines()]
+    groups = [line["group"] for line in lines]
+    assert groups == sorted(groups, key=["nodes", "edges"].index)
+    data = document.get_json()
+    assert [line["data"] for line in lines] == [
+        element["data"] for element in data["nodes"] + data["edges"]
+    ]
+    assert "e-1" in {node["data"]["id"] for node in data["nodes"]}
+
+
+def test_subgraph_export_whole_component(client):
+    neighborhood = client.get("/api/subgraph.json?nodeId=e-1").get_json()
+    component = client.get("/api/subgraph.json?nodeId=e-1&scope=component").get_json()
+
+    assert len(component["nodes"]) >= len(neighborhood["nodes"])
+
+
+def test_subgraph_export_limit(app, client):
+    limit = app.config["EXPORT_MAX_NODES"]
+    app.config["EXPORT_MAX_NODES"] = 1
+    try:
+        response = client.get("/api/subgraph.json?nodeId=e-1&scope=component")
+    finally:
+        app.config["EXPORT_MAX_NODES"] = limit
+
+    assert response.status_code == 400
+
+
+def test_export_unknown_format(client):
+    response = client.get("/api/export/xlsx")
+
+    assert response.status_code == 404
+
+
+def test_export_serves_byte_ranges(client):
+    for _ in range(100):
+        response = client.get("/api/export/csv")
+        if response.status_code != 503:
+            break
+        time.sleep(0.1)
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/gzip"
+    assert gzip.decompress(response.data).startswith(b"source,source_name,target")
+    partial = client.get("/api/export/csv", headers={"Range": "bytes=0-9"})
+    assert partial.status_code == 206
+    assert partial.data == response.data[:10]
+
+
+def test_fuzzy_search_requires_query(client):
+    response = client.get("/api/fuzzy-search?q=%20")
+
+    assert response.status_code == 400
+
+
+def test_fuzzy_search_finds_misspelled_names(client, monkeypatch):
+    G = load_graph()
+    monkeypatch.setattr(G, "trigrams", TrigramIndex.build(G))
+    name = G.label(0)
+
+    response = client.get("/api/fuzzy-search", query_string={"q": name[:-1]})
+
+    assert response.status_code == 200
+    assert response.get_json()["companies"][0]["name"] == name
+
+
+def test_suggest_returns_names_starting_with_query(client):
+    name = load_graph().label(0)
+
+    response = client.get("/api/suggest", query_string={"q": name, "limit": 3})
+
+    assert response.status_code == 200
+    suggestions = response.get_json()["suggestions"]
+    assert 1 <= len(suggestions) <= 3
+    assert name in [suggestion["name"] for suggestion in suggestions]
@@ -0,0 +1,54 @@
+from app.centrality import betweenness, centrality_rows, pagerank
+from app.graph import _construct_csr_graph, _construct_graph
+from benchmarks.synthetic import generate_rows
+import networkx as nx
+import pytest
+
+
+@pytest.fixture(scope="module")
+def graphs():
+    rows = generate_rows(companies=200, edges=600)
+    return _construct_graph(*rows), _construct_csr_graph(*rows)
+
+
+def _by_key(G, scores):
+    return {G.key(index): score for index, score in enumerate(scores)}
+
+
+def test_pagerank_matches_networkx(graphs):
+    nx_graph, G = graphs
+    expected = nx.pagerank(nx_graph.reverse(), weight="weight", tol=1e-12)
+
+    scores = _by_key(G, pagerank(G))
+
+    for node, score in expected.items():
+        assert scores[node] == pytest.approx(score, rel=1e-4)
+
+
+def test_betweenness_from_every_source_is_exact(graphs):
+    nx_graph, G = graphs
+    expected = nx.betweenness_centrality(nx.Graph(nx_graph), normalized=False)
+
+    scores = _by_key(G, betweenness(G, samples=len(G)))
+
+    for node, score in expected.items():
+        assert scores[node] == pytest.approx(score, abs=1e-6)
+
+
+def test_centrality_rows(graphs):
+    nx_graph, G = graphs
+
+    rows = {(row[0], row[1]): row[2:] for row in centrality_rows(G, samples=10)}
+
+    assert len(rows) == nx_graph.number_of_nodes()
+    degree, in_degree, *_ = rows[("entity", 1)]
+    assert degree == nx_graph.degree("e-1")
+    assert in_degree == nx_graph.in_degree("e-1")
+
+
+def test_unknown_significance_metric_is_not_found(client):
+    response = client.get("/list/significant/bogus")
+
+    assert response.status_code == 404
+    assert b"There is no list of nodes by bogus" in response.data
+    assert client.get("/no/such/page").status_code == 404
@@ -0,0 +1,67 @@
+from app.clusters import communities, components
+from app.graph import _construct_csr_graph, _construct_graph
+from app.views.graph_view import cluster_key
+from benchmarks.synthetic import generate_rows
+import networkx as nx
+import pytest
+
+
+def _partition(G, labels):
+    groups = {}
+    for index, label in enumerate(labels):
+        groups.setdefault(label, set()).add(G.key(index))
+    return sorted(groups.values(), key=min)
+
+
+@pytest.fixture(scope="module")
+def graphs():
+    rows = generate_rows(companies=300, edges=400)
+    return _construct_graph(*rows), _construct_csr_graph(*rows)
+
+
+def test_components_match_networkx(graphs):
+    nx_graph, G = graphs
+    expected = sorted(nx.weakly_connected_components(nx_graph), key=min)
+
+    labels = components(G)
+
+    assert _partition(G, labels) == expected
+    assert list(labels).count(0) == max(len(c) for c in expected)
+
+
+def test_communities_stay_within_components(graphs):
+    _, G = graphs
+
+    component_labels = components(G)
+    for community in _partition(G, communities(G)):
+        assert len({component_labels[G.index(node)] for node in community}) == 1
+
+
+def test_communities_separate_groups():
+    # Two groups of companies sharing directors, joined by one shareholding
+    companies = [(i, f"Company {i}", "Registered") for i in range(1, 9)]
+    individuals = [(i, f"Person {i}") for i in range(1, 7)]
+    directors = [
+        (company, individual, None)
+        for group in ((range(1, 5), range(1, 4)), (range(5, 9), range(4, 7)))
+        for company in group[0]
+        for individual in group[1]
+    ]
+    shareholders = [(5, None, 4, 1)]
+    G = _construct_csr_graph(companies, individuals, directors, shareholders)
+
+    groups = _partition(G, communities(G))
+
+    assert groups == [
+        {"e-1", "e-2", "e-3", "e-4", "i-1", "i-2", "i-3"},
+        {"e-5", "e-6", "e-7", "e-8", "i-4", "i-5", "i-6"},
+    ]
+
+
+def test_cluster_pages_are_cached_by_max_nodes(app):
+    def key(url):
+        with app.test_request_context(url):
+            return cluster_key()
+
+    assert key("/cluster/3?maxNodes=10") != key("/cluster/3?maxNodes=20")
+    assert key("/cluster/3?maxNodes=99999") == key("/cluster/3")
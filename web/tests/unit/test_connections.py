@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import threading
+
+from app.db.connections import ReadOnlyConnections
+import pytest
+
+
+def _create(path, name):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE companies (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.execute("INSERT INTO companies VALUES (1, ?)", (name,))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture()
+def graph_db(tmp_path):
+    path = tmp_path / "graph.db"
+    _create(path, "Old Name")
+    return path
+
+
+def test_connection_is_reused_by_a_thread(graph_db):
+    connections = ReadOnlyConnections()
+
+    assert connections.get(graph_db) is connections.get(graph_db)
+
+
+def test_each_thread_has_its_own_connection(graph_db):
+    connections = ReadOnlyConnections()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(connections.get(graph_db)))
+    thread.start()
+    thread.join()
+
+    assert other[0] is not connections.get(graph_db)
+
+
+def test_forked_process_opens_its_own_connection(graph_db):
+    connections = ReadOnlyConnections()
+    inherited = connections.get(graph_db)
+    read, write = os.pipe()
+
+    pid = os.fork()
+    if pid == 0:
+        db = connections.get(graph_db)
+        ok = db is not inherited and db.execute("SELECT 1").fetchone()[0] == 1
+        os.write(write, b"1" if ok else b"0")
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert os.read(read, 1) == b"1"
+    assert connections.get(graph_db) is inherited
+    assert inherited.execute("SELECT 1").fetchone()[0] == 1
+
+
+def test_connection_is_reopened_when_the_file_is_replaced(graph_db):
+    connections = ReadOnlyConnections()
+    db = connections.get(graph_db)
+    new = graph_db.with_name("graph.db.new")
+    _create(new, "New Name")
+    new.replace(graph_db)
+
+    reopened = connections.get(graph_db)
+
+    assert reopened is not db
+    assert reopened.execute("SELECT name FROM companies").fetchone()[0] == "New Name"
+
+
+def test_connection_sees_changes_to_the_file(graph_db):
+    db = ReadOnlyConnections().get(graph_db)
+    conn = sqlite3.connect(graph_db)
+    conn.execute("UPDATE companies SET name = 'Renamed'")
+    conn.commit()
+    conn.close()
+
+    assert db.execute("SELECT name FROM companies").fetchone()["name"] == "Renamed"
+
+
+def test_connection_is_read_only_and_tuned(graph_db):
+    db = ReadOnlyConnections().get(graph_db, mmap_size=2**20, cache_size=1024)
+
+    assert db.execute("PRAGMA query_only").fetchone()[0] == 1
+    assert db.execute("PRAGMA cache_size").fetchone()[0] == -1024
+    assert db.execute("PRAGMA temp_store").fetchone()[0] == 2
+    with pytest.raises(sqlite3.OperationalError):
+        db.execute("DELETE FROM companies")
+
+
+def test_attached_db_is_read_once_it_exists(graph_db):
+    connections = ReadOnlyConnections()
+    derived = graph_db.with_name("graph.db.derived")
+    db = connections.get(graph_db, attach={"derived": derived})
+    assert db.execute("SELECT * FROM derived.sqlite_master").fetchall() == []
+
+    _create(derived, "Derived Name")
+    db = connections.get(graph_db, attach={"derived": derived})
+
+    query = "SELECT name FROM derived.companies"
+    assert db.execute(query).fetchone()["name"] == "Derived Name"
@@ -0,0 +1,153 @@
+from app.graph import (
+    _construct_csr_graph,
+    _construct_graph,
+    expand_node,
+    extract_budgeted_subgraph,
+    extract_subgraph,
+)
+from app.neighborhoods import NeighborhoodIndex
+import networkx as nx
+import pytest
+
+COMPANIES = [
+    (1, "Alpha Limited", "Registered"),
+    (2, "Beta Limited", "Dissolved"),
+    (3, "Gamma Limited", None),
+    (7, "Delta Limited", "Registered"),
+]
+INDIVIDUALS = [(1, "Alice"), (2, "Bob"), (5, "Carol")]
+DIRECTORS = [(1, 1, None), (1, 2, None), (2, None, 3), (7, 5, None), (3, 99, None)]
+SHAREHOLDERS = [
+    (1, 1, None, 30),
+    (1, None, 2, 70),
+    (2, 5, None, 0),
+    (3, None, 1, 10),
+    (7, 98, None, 10),
+]
+
+
+@pytest.fixture()
+def graphs():
+    rows = (COMPANIES, INDIVIDUALS, DIRECTORS, SHAREHOLDERS)
+    return _construct_graph(*rows), _construct_csr_graph(*rows)
+
+
+def _as_sets(subgraph):
+    nodes = set(subgraph.nodes())
+    edges = sorted(
+        (source, target, data["relationship"], round(data.get("weight", -1), 6))
+        for source, target, data in subgraph.edges(data=True)
+    )
+    return nodes, edges
+
+
+def test_csr_graph_matches_networkx(graphs):
+    nx_graph, csr_graph = graphs
+
+    assert csr_graph.number_of_nodes() == nx_graph.number_of_nodes()
+    assert _as_sets(csr_graph.subgraph(range(len(csr_graph)))) == _as_sets(nx_graph)
+    for node, data in nx_graph.nodes(data=True):
+        assert csr_graph.node_data(csr_graph.index(node)) == data
+
+
+@pytest.mark.parametrize("node_id", ["e-1", "e-2", "e-3", "e-7", "i-1", "i-5"])
+@pytest.mark.parametrize("depth", [1, 2, 3])
+@pytest.mark.parametrize("max_size", [None, 1000, 3])
+def test_extract_subgraph_matches_networkx(graphs, node_id, depth, max_size):
+    nx_graph, csr_graph = graphs
+    if max_size:
+        csr_graph.neighborhoods = NeighborhoodIndex.build(csr_graph, max_size)
+    expected = nx.ego_graph(nx_graph, node_id, radius=depth, undirected=True)
+
+    subgraph = extract_subgraph(csr_graph, node_id, depth)
+
+    assert set(subgraph.nodes()) == set(expected.nodes())
+    assert set(subgraph.edges()) == set(expected.edges())
+
+
+def test_extract_subgraph_unknown_node(graphs):
+    _, csr_graph = graphs
+
+    for node_id in ["e-4", "i-99", "x-1", "e-abc"]:
+        with pytest.raises(ValueError, match="not found"):
+            extract_subgraph(csr_graph, node_id)
+
+
+@pytest.mark.parametrize("node_id", ["e-1", "e-2", "i-5"])
+@pytest.mark.parametrize("depth", [1, 2, 3])
+def test_budgeted_subgraph_within_budget_matches_subgraph(graphs, node_id, depth):
+    _, csr_graph = graphs
+
+    subgraph = extract_budgeted_subgraph(csr_graph, node_id, depth)
+
+    assert _as_sets(subgraph) == _as_sets(extract_subgraph(csr_graph, node_id, depth))
+
+
+def test_budgeted_subgraph_keeps_largest_shareholdings(graphs):
+    _, csr_graph = graphs
+
+    subgraph = extract_budgeted_subgraph(csr_graph, "e-1", max_nodes=3)
+
+    nodes = dict(subgraph.nodes(data=True))
+    assert set(nodes) == {"e-1", "e-2", "e-3", "more-e-1"}
+    assert nodes["more-e-1"]["label"] == "2 more hidden"
+    assert nodes["more-e-1"]["anchor"] == "e-1"
+    assert ("e-1", "more-e-1") in set(subgraph.edges())
+
+
+def test_budgeted_subgraph_caps_edges(graphs):
+    _, csr_graph = graphs
+
+    subgraph = extract_budgeted_subgraph(csr_graph, "e-1", depth=2, max_edges=2)
+
+    assert subgraph.number_of_edges() == 2
+
+
+def test_expand_node_returns_delta(graphs):
+    _, csr_graph = graphs
+
+    delta = expand_node(csr_graph, "e-1", exclude=["e-1", "i-1", "e-404"])
+
+    assert set(delta.nodes()) == {"i-2", "e-2", "e-3"}
+    assert set(delta.edges()) == {
+        ("i-2", "e-1"),
+        ("e-2", "e-1"),
+        ("e-1", "e-3"),
+        ("e-3", "e-2"),
+    }
+
+
+def test_expand_node_links_new_nodes_to_known_nodes(graphs):
+    _, csr_graph = graphs
+
+    delta = expand_node(csr_graph, "e-2", exclude=["e-1"])
+
+    assert set(delta.nodes()) == {"e-2", "e-3", "i-5"}
+    assert ("e-2", "e-1") in set(delta.edges())
+
+
+def test_construct_graph_counts_dangling_rows(graphs):
+    nx_graph, csr_graph = graphs
+
+    assert nx_graph.graph["rejected"] == {"director": 1, "shareholder": 1}
+    assert csr_graph.rejected == {"director": 1, "shareholder": 1}
+
+
+def test_budgeted_subgraph_keeps_the_center_edges():
+    # An individual directing ten companies that all hold shares in each other
+    companies = [(i, f"Company {i}", "Registered") for i in range(1, 11)]
+    directors = [(i, 1, None) for i in range(1, 11)]
+    shareholders = [
+        (i, None, j, 1) for i in range(1, 11) for j in range(1, 11) if i != j
+    ]
+    G = _construct_csr_graph(companies, [(1, "Alice")], directors, shareholders)
+
+    subgraph = extract_budgeted_subgraph(G, "i-1", 1, max_nodes=11)
+
+    edges = set(subgraph.edges())
+    assert subgraph.number_of_edges() == 44
+    assert {("i-1", f"e-{i}") for i in range(1, 11)} <= edges
+    nodes = dict(subgraph.nodes(data=True))
+    more = [data for key, data in nodes.items() if data["type"] == "more"]
+    assert "more-i-1" not in nodes
+    assert sum(int(data["label"].split()[0]) for data in more) == 100 - 44
@@ -0,0 +1,82 @@
+from app.cycles import find_cycles, holding_rows
+from app.graph import _construct_csr_graph, _construct_graph
+from benchmarks.synthetic import generate_rows
+import networkx as nx
+import pytest
+
+COMPANIES = [(i, f"Company {i}", "Registered") for i in range(1, 8)]
+INDIVIDUALS = [(1, "Alice")]
+SHAREHOLDERS = [
+    # Companies 1, 2 and 3 hold each other in a circle
+    (2, None, 1, 30),
+    (2, 1, None, 70),
+    (3, None, 2, 50),
+    (3, None, 4, 50),
+    (1, None, 3, 100),
+    # Companies 4 and 5 hold each other, both ways
+    (4, None, 5, 1),
+    (5, None, 4, 1),
+    # Company 6 holds a chain into the first circle but is not held back
+    (1, None, 6, 0),
+    # Company 7 holds its own shares
+    (7, None, 7, 10),
+]
+
+
+@pytest.fixture()
+def cycles():
+    G = _construct_csr_graph(COMPANIES, INDIVIDUALS, [], SHAREHOLDERS)
+    return G, find_cycles(G)
+
+
+def test_cycles_group_companies_holding_each_other(cycles):
+    G, found = cycles
+
+    members = [{G.key(index) for index in cycle} for cycle, _ in found]
+
+    assert members == [{"e-1", "e-2", "e-3"}, {"e-4", "e-5"}]
+
+
+def test_cycles_store_holdings_on_the_cycle(cycles):
+    G, found = cycles
+
+    rows = list(holding_rows(G, found))
+
+    assert sorted(rows) == [
+        (0, 1, 2, pytest.approx(0.3)),
+        (0, 2, 3, pytest.approx(0.5)),
+        (0, 3, 1, pytest.approx(1.0)),
+        (1, 4, 5, pytest.approx(1.0)),
+        (1, 5, 4, pytest.approx(1.0)),
+    ]
+
+
+def test_cycles_match_networkx():
+    rows = generate_rows(companies=100, edges=3000)
+    nx_graph, G = _construct_graph(*rows), _construct_csr_graph(*rows)
+    holdings = nx.DiGraph(
+        (source, target)
+        for source, target, data in nx_graph.edges(data=True)
+        if data["relationship"] == "shareholder"
+        and source.startswith("e-")
+        and source != target
+    )
+    expected = sorted(
+        (c for c in nx.strongly_connected_components(holdings) if len(c) > 1),
+        key=lambda c: (-len(c), min(G.index(node) for node in c)),
+    )
+
+    found = [{G.key(index) for index in cycle} for cycle, _ in find_cycles(G)]
+
+    assert found == expected
+
+
+def test_cycles_handle_long_chains():
+    n = 10_000
+    companies = [(i, f"Company {i}", "Registered") for i in range(1, n + 1)]
+    shareholders = [(i % n + 1, None, i, 1) for i in range(1, n + 1)]
+    G = _construct_csr_graph(companies, [], [], shareholders)
+
+    ((members, holdings),) = find_cycles(G)
+
+    assert len(members) == len(holdings) == n
@@ -0,0 +1,138 @@
+import csv
+import gzip
+import io
+
+from app.commands import export_graph_command
+from app.export import (
+    ensure_export,
+    export_path,
+    lock_export,
+    unlock_export,
+    write_export,
+)
+from app.graph import _construct_csr_graph
+from benchmarks.synthetic import generate_rows
+import networkx as nx
+import pytest
+
+
+@pytest.fixture(scope="module")
+def graph():
+    companies, individuals, directors, shareholders = generate_rows(
+        companies=50, edges=200
+    )
+    # Names with characters that need escaping in XML and CSV
+    companies[0] = (1, 'A & B "Holdings" <Ltd>,\x01', "Registered")
+    return _construct_csr_graph(companies, individuals, directors, shareholders)
+
+
+def _edges(G):
+    return sorted(
+        (source, target, data["relationship"])
+        for source, target, data in G.subgraph(range(len(G))).edges(data=True)
+    )
+
+
+@pytest.mark.parametrize(
+    ("fmt", "read"), [("graphml", nx.read_graphml), ("gexf", nx.read_gexf)]
+)
+def test_export_xml_formats(graph, tmp_path, fmt, read):
+    path = write_export(graph, fmt, tmp_path / f"graph.{fmt}.gz")
+
+    exported = read(gzip.open(path))
+
+    assert exported.number_of_nodes() == len(graph)
+    assert exported.nodes["e-1"]["label"] == 'A & B "Holdings" <Ltd>,'
+    assert exported.nodes["e-1"]["type"] == "entity"
+    assert sorted(
+        (source, target, data["relationship"])
+        for source, target, data in exported.edges(data=True)
+    ) == _edges(graph)
+
+
+def test_export_csv(graph, tmp_path):
+    path = write_export(graph, "csv", tmp_path / "graph.csv.gz")
+
+    rows = list(csv.DictReader(io.TextIOWrapper(gzip.open(path), newline="")))
+
+    assert sorted(
+        (row["source"], row["target"], row["relationship"]) for row in rows
+    ) == _edges(graph)
+    assert all(
+        (row["weight"] == "") == (row["relationship"] == "director") for row in rows
+    )
+
+
+def test_lock_export_is_taken_once(tmp_path, monkeypatch):
+    path = export_path(tmp_path, "v1", "csv")
+
+    assert lock_export(path)
+    assert not lock_export(path)
+    unlock_export(path)
+    assert lock_export(path)
+
+    monkeypatch.setattr("app.export.EXPORT_LOCK_TIMEOUT", 0)
+    assert lock_export(path)
+
+
+def test_ensure_export_starts_one_writer(tmp_path, monkeypatch):
+    commands = []
+    monkeypatch.setattr(
+        "app.export.subprocess.Popen", lambda args, **kwargs: commands.append(args)
+    )
+
+    assert ensure_export("v1", "csv", tmp_path) is None
+    assert ensure_export("v1", "csv", tmp_path) is None
+    assert len(commands) == 1
+    assert commands[0][-6:] == [
+        "export-graph",
+        "--format",
+        "csv",
+        "--graph-version",
+        "v1",
+        "--locked",
+    ]
+
+    path = export_path(tmp_path, "v1", "csv")
+    path.touch()
+    assert ensure_export("v1", "csv", tmp_path) == path
+
+
+def test_export_graph_command(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, "GRAPH_EXPORTS", tmp_path)
+    stale = export_path(tmp_path, "old", "csv")
+    stale.touch()
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(export_graph_command, ["--format", "csv"])
+
+    assert result.exit_code == 0, result.output
+    [path] = tmp_path.iterdir()
+    assert path.name.endswith(".csv.gz")
+    assert path != stale
+
+    locked = export_path(tmp_path, "old", "gexf")
+    assert lock_export(locked)
+    args = ["--format", "gexf", "--graph-version", "old", "--locked"]
+    result = runner.invoke(export_graph_command, args)
+
+    assert result.exit_code == 0, result.output
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_export_graph_command_releases_locks_on_failure(app, tmp_path, monkeypatch):
+    def fail():
+        msg = "snapshot is corrupt"
+        raise RuntimeError(msg)
+
+    monkeypatch.setitem(app.config, "GRAPH_EXPORTS", tmp_path)
+    monkeypatch.setattr("app.commands.load_graph", fail)
+    paths = [export_path(tmp_path, "v1", fmt) for fmt in ("csv", "gexf")]
+    for path in paths:
+        assert lock_export(path)
+    args = ["--format", "csv", "--format", "gexf", "--graph-version", "v1"]
+
+    result = app.test_cli_runner().invoke(export_graph_command, [*args, "--locked"])
+
+    assert isinstance(result.exception, RuntimeError)
+    assert list(tmp_path.iterdir()) == []
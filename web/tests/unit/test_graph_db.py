@@ -0,0 +1,45 @@
+from app.db.graph_db import get_db, get_nodes_by_ids
+import pytest
+
+COMPANIES = [(1, "Pacific Timber Limited"), (2, "Island Fisheries")]
+INDIVIDUALS = [(1, "Mary Kalsakau"), (2, "Tom Willie")]
+
+
+@pytest.fixture()
+def graph_db(make_graph_db):
+    return make_graph_db(COMPANIES, INDIVIDUALS)
+
+
+@pytest.mark.usefixtures("graph_db")
+def test_get_nodes_by_ids_keeps_the_requested_order(app):
+    with app.test_request_context():
+        nodes = get_nodes_by_ids(["i-2", "e-2", "i-1", "e-1", "i-2"])
+
+    assert [(node["type"], node["name"]) for node in nodes] == [
+        ("individual", "Tom Willie"),
+        ("company", "Island Fisheries"),
+        ("individual", "Mary Kalsakau"),
+        ("company", "Pacific Timber Limited"),
+        ("individual", "Tom Willie"),
+    ]
+
+
+@pytest.mark.usefixtures("graph_db")
+def test_get_nodes_by_ids_skips_unknown_keys(app):
+    with app.test_request_context():
+        nodes = get_nodes_by_ids(["e-9", "x-1", "e-", "i-1"])
+
+    assert [node["name"] for node in nodes] == ["Mary Kalsakau"]
+
+
+@pytest.mark.usefixtures("graph_db")
+def test_get_nodes_by_ids_runs_one_query_per_node_type(app):
+    node_ids = [f"e-{i % 2 + 1}" for i in range(100)] + ["i-1", "i-2"]
+    statements = []
+    with app.test_request_context():
+        get_db().set_trace_callback(statements.append)
+        assert len(get_nodes_by_ids(node_ids)) == 102
+        assert get_nodes_by_ids([]) == []
+        get_db().set_trace_callback(None)
+
+    assert len(statements) == 2
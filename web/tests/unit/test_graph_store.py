@@ -0,0 +1,123 @@
+import sqlite3
+
+from app.graph_store import GraphStore, get_db_version
+from app.snapshot import write_arrays
+from flask import Flask
+import pytest
+
+
+class Builder:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return object()
+
+
+def _write(path, value):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS t (value)")
+    conn.execute("INSERT INTO t VALUES (?)", (value,))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture()
+def paths(tmp_path):
+    names = ["GRAPH_DB", "GRAPH_SNAPSHOT", "GRAPH_NEIGHBORHOODS", "GRAPH_TRIGRAMS"]
+    paths = {name: tmp_path / name.lower() for name in names}
+    paths["GRAPH_DERIVED_DB"] = tmp_path / "graph_derived_db"
+    _write(paths["GRAPH_DB"], 1)
+    return paths
+
+
+@pytest.fixture()
+def builder():
+    return Builder()
+
+
+@pytest.fixture()
+def store(paths, builder):
+    app = Flask(__name__)
+    app.config.update(paths, GRAPH_RELOAD_INTERVAL=0)
+    store = GraphStore(app)
+    store.get(builder)
+    return store
+
+
+def _compile(paths):
+    write_arrays(paths["GRAPH_SNAPSHOT"], {}, get_db_version(paths["GRAPH_DB"]))
+
+
+def test_derived_db_change_keeps_the_graph(store, builder, paths):
+    graph, version = store.get(builder), store.version
+    _write(paths["GRAPH_DERIVED_DB"], 1)
+
+    store.reload()
+
+    assert store.get(builder) is graph
+    assert store.version != version
+    assert builder.calls == 1
+
+
+def test_changed_graph_db_waits_for_its_snapshot(store, builder, paths):
+    _compile(paths)
+    store.reload()
+    graph, version = store.get(builder), store.version
+
+    _write(paths["GRAPH_DB"], 2)
+    store.reload()
+    assert store.get(builder) is graph
+    assert store.version == version
+
+    _compile(paths)
+    store.reload()
+    assert store.get(builder) is not graph
+    assert store.db_version == get_db_version(paths["GRAPH_DB"])
+
+
+def test_changed_graph_db_is_rebuilt_without_a_snapshot(store, builder, paths):
+    graph = store.get(builder)
+    _write(paths["GRAPH_DB"], 2)
+
+    store.reload()
+
+    assert store.get(builder) is not graph
+
+
+def test_new_index_is_loaded(store, builder, paths):
+    graph = store.get(builder)
+    write_arrays(paths["GRAPH_TRIGRAMS"], {}, store.db_version)
+
+    store.reload()
+
+    assert store.get(builder) is not graph
+    assert builder.calls == 2
+
+
+def test_request_keeps_the_graph_it_started_with(store, builder, paths):
+    with store.app.app_context():
+        graph, version = store.get(builder), store.version
+        _write(paths["GRAPH_DB"], 2)
+        store.reload()
+
+        assert store.get(builder) is graph
+        assert store.version == version
+
+    with store.app.app_context():
+        assert store.get(builder) is not graph
+        assert store.version != version
+
+
+def test_refresh_loads_a_graph_published_since(store, builder, paths):
+    graph, version = store.get(builder), store.version
+    store.refresh()
+    assert store.get(builder) is graph
+
+    _write(paths["GRAPH_DB"], 2)
+    store.refresh()
+
+    assert store.get(builder) is not graph
+    assert store.version != version
+    assert builder.calls == 2
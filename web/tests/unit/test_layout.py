@@ -0,0 +1,64 @@
+from app.graph import _construct_csr_graph, extract_budgeted_subgraph
+from app.layout import EDGE_LENGTH, add_positions, force_layout
+from app.payload import subgraph_payload
+import numpy as np
+
+
+def _two_groups():
+    # Two rings of ten nodes joined by a single edge
+    edges = [(i, (i + 1) % 10) for i in range(10)]
+    edges += [(10 + i, 10 + (i + 1) % 10) for i in range(10)]
+    edges.append((0, 10))
+    return np.array(edges).T
+
+
+def test_force_layout_is_deterministic():
+    sources, targets = _two_groups()
+
+    first = force_layout(20, sources, targets, seed=1)
+    second = force_layout(20, sources, targets, seed=1)
+
+    assert np.array_equal(first, second)
+    assert np.isfinite(first).all()
+
+
+def test_force_layout_keeps_groups_apart():
+    sources, targets = _two_groups()
+
+    positions = force_layout(20, sources, targets)
+
+    centers = positions[:10].mean(axis=0), positions[10:].mean(axis=0)
+    spread = max(np.hypot(*(positions[:10] - centers[0]).T))
+    assert np.hypot(*(centers[0] - centers[1])) > spread
+    edge_lengths = np.hypot(*(positions[sources] - positions[targets]).T)
+    assert np.median(edge_lengths) < 3 * EDGE_LENGTH
+
+
+def test_force_layout_small_graphs():
+    assert force_layout(0, [], []).shape == (0, 2)
+    assert force_layout(1, [], []).tolist() == [[0.0, 0.0]]
+
+
+def test_add_positions_sets_every_node():
+    companies = [(i, f"Company {i}", "Registered") for i in range(1, 5)]
+    individuals = [(1, "Alice")]
+    directors = [(i, 1, None) for i in range(1, 5)]
+    G = _construct_csr_graph(companies, individuals, directors, [])
+    payload = subgraph_payload(extract_budgeted_subgraph(G, "i-1"))
+
+    add_positions(payload)
+
+    assert len(payload["nodes"]["x"]) == len(payload["nodes"]["y"]) == 5
+
+
+def test_add_positions_leaves_large_graphs_to_the_browser(monkeypatch):
+    monkeypatch.setattr("app.layout.MAX_LAYOUT_NODES", 4)
+    companies = [(i, f"Company {i}", "Registered") for i in range(1, 5)]
+    directors = [(i, 1, None) for i in range(1, 5)]
+    G = _construct_csr_graph(companies, [(1, "Alice")], directors, [])
+    payload = subgraph_payload(extract_budgeted_subgraph(G, "i-1"))
+
+    add_positions(payload)
+
+    assert "x" not in payload["nodes"]
+    assert "y" not in payload["nodes"]
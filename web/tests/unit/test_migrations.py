@@ -0,0 +1,140 @@
+import sqlite3
+
+from app.db.graph_db import (
+    get_db,
+    get_latest_registered_companies,
+    get_latest_updated_companies,
+    get_oldest_registered_companies,
+)
+from benchmarks.synthetic import SCRAPER, create_database, import_scraper
+import pytest
+
+if not SCRAPER.exists():
+    pytest.skip(
+        "scraper is not checked out alongside the web app", allow_module_level=True
+    )
+
+migrations = import_scraper("vfscscraper.migrations")
+queries = import_scraper("vfscscraper.queries")
+MIGRATIONS, migrate, schema_version = (
+    migrations.MIGRATIONS,
+    migrations.migrate,
+    migrations.schema_version,
+)
+
+
+@pytest.fixture(scope="module")
+def graph_db(tmp_path_factory):
+    return create_database(
+        tmp_path_factory.mktemp("migrations") / "graph.db", companies=2000, edges=8000
+    )
+
+
+def _traced(db, call):
+    """Return the statements `call` runs on `db`, with their parameters bound."""
+    statements = []
+    db.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        db.set_trace_callback(None)
+    return [
+        statement
+        for statement in statements
+        if statement.lstrip().startswith(("SELECT", "UPDATE", "DELETE"))
+    ]
+
+
+def _plans(graph_db, statements, params=()):
+    conn = sqlite3.connect(graph_db)
+    try:
+        return [
+            [
+                detail
+                for *_, detail in conn.execute(
+                    f"EXPLAIN QUERY PLAN {statement}", params
+                )
+            ]
+            for statement in statements
+        ]
+    finally:
+        conn.close()
+
+
+def test_migrate_new_database():
+    conn = sqlite3.connect(":memory:")
+
+    assert migrate(conn) == len(MIGRATIONS)
+    assert schema_version(conn) == len(MIGRATIONS)
+    assert migrate(conn) == 0
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+    assert {"companies", "individuals", "sqlite_stat1"} <= tables
+
+
+def test_migrate_existing_database():
+    conn = sqlite3.connect(":memory:")
+    for statement in MIGRATIONS[0]:
+        conn.execute(statement)
+    conn.execute("INSERT INTO companies (company_name) VALUES ('Pacific Timber')")
+    conn.execute("INSERT INTO company_directors (company_id, entity_id) VALUES (1, 1)")
+    conn.commit()
+
+    assert migrate(conn) == len(MIGRATIONS)
+    assert conn.execute("SELECT company_name FROM companies").fetchall() == [
+        ("Pacific Timber",)
+    ]
+    assert conn.execute(
+        "SELECT company_id, entity_id FROM company_directors"
+    ).fetchall() == [(1, 1)]
+    indexes = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    assert {
+        "ix_companies_company_name",
+        "ix_company_directors_company_id",
+    } <= {row[0] for row in indexes}
+
+
+def test_directors_reference_companies():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+
+    references = conn.execute("PRAGMA foreign_key_list(company_directors)")
+    assert {row[2] for row in references} == {"companies", "individuals"}
+
+
+def test_failed_migration_is_rolled_back(monkeypatch):
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    monkeypatch.setattr(migrations, "MIGRATIONS", [MIGRATIONS[0], ["CREATE INDEX x"]])
+
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(conn)
+    assert schema_version(conn) == 0
+    assert conn.execute("SELECT name FROM sqlite_master").fetchall() == []
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        get_latest_registered_companies,
+        get_oldest_registered_companies,
+        get_latest_updated_companies,
+    ],
+)
+def test_company_lists_are_read_from_covering_indexes(app, graph_db, query):
+    previous = app.config["GRAPH_DB"]
+    app.config["GRAPH_DB"] = graph_db
+    try:
+        with app.app_context():
+            statements = _traced(get_db(), lambda: query.uncached(10))
+    finally:
+        app.config["GRAPH_DB"] = previous
+
+    [plan] = _plans(graph_db, statements)
+    assert [detail for detail in plan if "COVERING INDEX" in detail], plan
+    assert not [detail for detail in plan if "TEMP B-TREE" in detail], plan
+
+
+@pytest.mark.parametrize("query", queries.HOT_QUERIES)
+def test_scraper_lookups_use_indexes(graph_db, query):
+    [plan] = _plans(graph_db, [query], (None,) * query.count("?"))
+
+    assert not [detail for detail in plan if detail.startswith("SCAN")], plan
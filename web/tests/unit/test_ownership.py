@@ -0,0 +1,52 @@
+from app.graph import _construct_csr_graph
+from app.ownership import compute_ownership, ownership_rows
+import pytest
+
+COMPANIES = [(i, f"Company {i}", "Registered") for i in range(1, 7)]
+INDIVIDUALS = [(1, "Alice"), (2, "Bob"), (3, "Carol"), (4, "Dave"), (5, "Erin")]
+SHAREHOLDERS = [
+    # Alice owns half of company 1, which owns 60% of company 2
+    (1, 1, None, 50),
+    (1, 2, None, 50),
+    (2, None, 1, 60),
+    (2, 2, None, 40),
+    # Companies 3 and 4 own half of each other; Carol owns the other halves
+    (3, None, 4, 10),
+    (3, 3, None, 10),
+    (4, None, 3, 10),
+    (4, 3, None, 10),
+    # No share counts were recorded for company 5
+    (5, 4, None, None),
+    (5, 5, None, None),
+    # Erin holds a tiny stake in company 6
+    (6, 5, None, 1),
+    (6, 4, None, 999),
+]
+
+
+@pytest.fixture()
+def ownership():
+    G = _construct_csr_graph(COMPANIES, INDIVIDUALS, [], SHAREHOLDERS)
+    rows = ownership_rows(G, compute_ownership(G))
+    return {(company, individual): value for company, individual, value in rows}
+
+
+def test_ownership_follows_chains(ownership):
+    assert ownership[(1, 1)] == pytest.approx(0.5)
+    assert ownership[(2, 1)] == pytest.approx(0.3)
+    assert ownership[(2, 2)] == pytest.approx(0.4 + 0.6 * 0.5)
+
+
+def test_ownership_converges_on_cycles(ownership):
+    assert ownership[(3, 3)] == pytest.approx(1, abs=0.01)
+    assert ownership[(4, 3)] == pytest.approx(1, abs=0.01)
+
+
+def test_ownership_splits_unknown_share_counts(ownership):
+    assert ownership[(5, 4)] == pytest.approx(0.5)
+    assert ownership[(5, 5)] == pytest.approx(0.5)
+
+
+def test_ownership_drops_tiny_stakes(ownership):
+    assert (6, 5) not in ownership
+    assert ownership[(6, 4)] == pytest.approx(0.999)
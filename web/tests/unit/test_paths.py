@@ -0,0 +1,56 @@
+from app.graph import _construct_csr_graph, _construct_graph
+from app.paths import PathTimeout, k_shortest_paths, shortest_path
+import networkx as nx
+import pytest
+
+# Two routes from Alice to company 4: through company 1 and Bob, or through
+# companies 2 and 3; company 5 is unreachable.
+COMPANIES = [(i, f"Company {i}", "Registered") for i in range(1, 6)]
+INDIVIDUALS = [(1, "Alice"), (2, "Bob")]
+DIRECTORS = [(1, 1, None), (1, 2, None), (4, 2, None), (2, 1, None)]
+SHAREHOLDERS = [(3, None, 2, 10), (4, None, 3, 10)]
+
+
+@pytest.fixture()
+def graphs():
+    rows = (COMPANIES, INDIVIDUALS, DIRECTORS, SHAREHOLDERS)
+    return _construct_graph(*rows), _construct_csr_graph(*rows)
+
+
+def _keys(G, paths):
+    return [[G.key(index) for index in path] for path in paths]
+
+
+@pytest.mark.parametrize("k", [1, 2, 3, 5])
+def test_k_shortest_paths_matches_networkx(graphs, k):
+    nx_graph, G = graphs
+    expected = list(nx.shortest_simple_paths(nx.Graph(nx_graph), "i-1", "e-4"))[:k]
+
+    paths, timed_out = k_shortest_paths(
+        G, G.index("i-1"), G.index("e-4"), k, max_depth=6, time_limit=1
+    )
+
+    assert not timed_out
+    assert [len(p) for p in _keys(G, paths)] == [len(p) for p in expected]
+    assert all(p in expected for p in _keys(G, paths))
+
+
+def test_shortest_path_respects_max_depth(graphs):
+    _, G = graphs
+    source, target = G.index("i-1"), G.index("e-4")
+
+    assert shortest_path(G, source, target, 2, float("inf")) is None
+    assert len(shortest_path(G, source, target, 3, float("inf"))) == 4
+
+
+def test_shortest_path_unreachable(graphs):
+    _, G = graphs
+
+    assert shortest_path(G, G.index("i-1"), G.index("e-5"), 6, float("inf")) is None
+
+
+def test_shortest_path_deadline(graphs):
+    _, G = graphs
+
+    with pytest.raises(PathTimeout):
+        shortest_path(G, G.index("i-1"), G.index("e-4"), 6, deadline=0)
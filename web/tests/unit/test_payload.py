@@ -0,0 +1,72 @@
+import json
+
+from app.graph import _construct_csr_graph, extract_budgeted_subgraph, subgraph_elements
+from app.payload import dumps, subgraph_payload
+from benchmarks.synthetic import generate_rows
+
+
+def _decode(payload):
+    """Rebuild Cytoscape elements the way `decodeGraph` in graph.js does."""
+    nodes, edges = payload["nodes"], payload["edges"]
+    types = [payload["types"][code] for code in nodes["type"]]
+    ids = [f"{t[0]}-{id}" for t, id in zip(types, nodes["id"], strict=True)]
+    for i, anchor in enumerate(nodes["anchor"]):
+        if anchor is not None:
+            ids[i] = f"more-{ids[anchor]}"
+    return {
+        "nodes": [
+            {
+                "data": {
+                    "id": ids[i],
+                    "name": payload["strings"][nodes["name"][i]],
+                    "type": types[i],
+                    "status": payload["statuses"][nodes["status"][i]],
+                    "anchor": None if anchor is None else ids[anchor],
+                }
+            }
+            for i, anchor in enumerate(nodes["anchor"])
+        ],
+        "edges": [
+            {
+                "data": {
+                    "source": ids[source],
+                    "target": ids[target],
+                    "relationship": payload["relationships"][relationship],
+                }
+            }
+            for source, target, relationship in zip(
+                edges["source"], edges["target"], edges["relationship"], strict=True
+            )
+        ],
+    }
+
+
+def test_payload_holds_the_cytoscape_elements():
+    G = _construct_csr_graph(*generate_rows(companies=200, edges=800))
+    hub = max(range(len(G)), key=G.degree)
+    subgraph = extract_budgeted_subgraph(G, G.key(hub), depth=2, max_nodes=20)
+
+    payload = json.loads(dumps(subgraph_payload(subgraph)))
+
+    assert any(t == "more" for t in payload["types"])
+    assert _decode(payload) == subgraph_elements(subgraph)
+
+
+def test_payload_shares_repeated_strings():
+    companies = [(i, "Same Name", "Registered") for i in range(1, 4)]
+    G = _construct_csr_graph(companies, [(1, "Alice")], [(1, 1, None)], [])
+
+    payload = subgraph_payload(G.subgraph(range(len(G))))
+
+    assert payload["strings"] == ["Same Name", "Alice"]
+    assert payload["nodes"]["name"] == [0, 0, 0, 1]
+    assert payload["statuses"] == [None, "Registered"]
+
+
+def test_dumps_escapes_script_end_tags():
+    G = _construct_csr_graph([(1, "</script><b>", None)], [], [], [])
+
+    data = dumps(subgraph_payload(G.subgraph([0])))
+
+    assert "</script>" not in data
+    assert json.loads(data)["strings"] == ["</script><b>"]
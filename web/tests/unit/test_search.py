@@ -0,0 +1,97 @@
+from app.commands import build_search_index_command
+from app.db.graph_db import search_company_names, search_individual_names
+import pytest
+
+COMPANIES = [
+    (1, "Pacific Timber Limited"),
+    (2, "Timber Holdings Limited"),
+    (3, "Société Générale Vanuatu"),
+    (4, "Island Fisheries"),
+    (5, "Coral Limited"),
+    (6, "Island Coral Limited"),
+]
+INDIVIDUALS = [(1, "John Timberlake"), (2, "Marie Dupont")]
+
+
+@pytest.fixture()
+def graph_db(make_graph_db):
+    return make_graph_db(COMPANIES, INDIVIDUALS)
+
+
+def _names(results):
+    return [result["name"] for result in results]
+
+
+def _build_index(app):
+    result = app.test_cli_runner().invoke(build_search_index_command)
+    assert result.exit_code == 0, result.output
+
+
+@pytest.mark.usefixtures("graph_db")
+def test_search_without_index_scans_names(app):
+    with app.test_request_context():
+        assert _names(search_company_names("timber")) == [
+            "Pacific Timber Limited",
+            "Timber Holdings Limited",
+        ]
+        assert _names(search_individual_names("timber")) == ["John Timberlake"]
+
+
+@pytest.mark.usefixtures("graph_db")
+def test_search_matches_whole_words_and_an_unfinished_last_word(app):
+    _build_index(app)
+
+    with app.test_request_context():
+        assert set(_names(search_company_names("timber limited"))) == {
+            "Pacific Timber Limited",
+            "Timber Holdings Limited",
+        }
+        assert _names(search_company_names("pacific tim")) == ["Pacific Timber Limited"]
+        assert _names(search_company_names("pac timber")) == []
+        assert _names(search_individual_names("timber john")) == []
+        assert _names(search_individual_names("john timb")) == ["John Timberlake"]
+
+
+@pytest.mark.usefixtures("graph_db")
+def test_search_ignores_case_accents_and_punctuation(app):
+    _build_index(app)
+
+    with app.test_request_context():
+        assert _names(search_company_names("SOCIETE generale")) == [
+            "Société Générale Vanuatu"
+        ]
+        assert _names(search_individual_names('"marie" (dupont')) == ["Marie Dupont"]
+        assert search_company_names("!!") == []
+
+
+@pytest.mark.usefixtures("graph_db")
+def test_search_is_limited(app):
+    _build_index(app)
+
+    with app.test_request_context():
+        assert len(search_company_names("limited", limit=1)) == 1
+
+
+@pytest.mark.usefixtures("graph_db")
+@pytest.mark.parametrize("indexed", [False, True])
+def test_search_pages_follow_the_cursor(app, indexed):
+    if indexed:
+        _build_index(app)
+
+    with app.test_request_context():
+        everything = search_company_names("limited")
+        pages, after = [], None
+        while page := search_company_names("limited", limit=3, after=after):
+            pages += page
+            after = (page[-1]["rank"], page[-1]["id"])
+
+    assert len(everything) == 4
+    assert [c["id"] for c in pages] == [c["id"] for c in everything]
+    ranks = [(c["rank"], c["id"]) for c in everything]
+    assert ranks == sorted(ranks)
+
+
+def test_search_results_reject_invalid_cursor(client):
+    response = client.get("/search/companies?q=timber&after=nope")
+
+    assert b"The page is not valid" in response.data
@@ -0,0 +1,28 @@
+from app.graph import _construct_csr_graph
+from app.snapshot import load_snapshot, write_snapshot
+from tests.unit.test_csr import COMPANIES, DIRECTORS, INDIVIDUALS, SHAREHOLDERS
+
+
+def test_snapshot_round_trip(tmp_path):
+    G = _construct_csr_graph(COMPANIES, INDIVIDUALS, DIRECTORS, SHAREHOLDERS)
+    path = write_snapshot(G, tmp_path / "graph.db.snapshot", "v1")
+
+    loaded = load_snapshot(path, "v1")
+
+    everything = range(G.number_of_nodes())
+    assert list(loaded.subgraph(everything).nodes(data=True)) == list(
+        G.subgraph(everything).nodes(data=True)
+    )
+    assert list(loaded.subgraph(everything).edges(data=True)) == list(
+        G.subgraph(everything).edges(data=True)
+    )
+    assert "e-7" in loaded
+    assert "e-4" not in loaded
+
+
+def test_snapshot_from_other_version_is_ignored(tmp_path):
+    G = _construct_csr_graph(COMPANIES, INDIVIDUALS, DIRECTORS, SHAREHOLDERS)
+    path = write_snapshot(G, tmp_path / "graph.db.snapshot", "v1")
+
+    assert load_snapshot(path, "v2") is None
+    assert load_snapshot(tmp_path / "missing.snapshot", "v1") is None
@@ -0,0 +1,64 @@
+from app import suggest
+from app.graph import _construct_csr_graph
+from app.suggest import SuggestionIndex, normalize
+from benchmarks.synthetic import generate_rows
+import pytest
+
+COMPANIES = [
+    (1, "Pacific Timber Limited", "Registered"),
+    (2, "Timber Holdings Limited", "Registered"),
+    (3, "Société Générale", None),
+]
+INDIVIDUALS = [(1, "Tim Tari"), (2, "Tom Timber")]
+DIRECTORS = [(1, 1, None), (2, 1, None), (2, 2, None)]
+
+
+@pytest.fixture()
+def graph():
+    return _construct_csr_graph(COMPANIES, INDIVIDUALS, DIRECTORS, [])
+
+
+def _names(G, q, limit=10):
+    return [G.label(index) for index in SuggestionIndex.build(G).suggest(q, limit)]
+
+
+def test_suggest_matches_the_start_of_any_word(graph):
+    # Equally connected names come in the order of the matching text
+    assert _names(graph, "timber") == [
+        "Timber Holdings Limited",
+        "Tom Timber",
+        "Pacific Timber Limited",
+    ]
+    assert _names(graph, "pacific timber l") == ["Pacific Timber Limited"]
+    assert _names(graph, "imber") == []
+
+
+def test_suggest_ranks_best_connected_first(graph):
+    assert _names(graph, "t", limit=2) == ["Tim Tari", "Timber Holdings Limited"]
+
+
+def test_suggest_normalizes_queries(graph):
+    assert _names(graph, "  SOCIETE  gén") == ["Société Générale"]
+    assert _names(graph, "...") == []
+    assert _names(graph, "") == []
+
+
+def test_suggest_matches_a_full_scan(monkeypatch):
+    monkeypatch.setattr(suggest, "BLOCK_SIZE", 8)
+    G = _construct_csr_graph(*generate_rows(companies=300, edges=2000))
+    index = SuggestionIndex.build(G)
+    names = [normalize(G.label(i) or "") for i in range(len(G))]
+
+    for q in ["c", "company 1", "p", "person 2", "limited", "9", "1 l"]:
+        prefix = normalize(q)
+        first_match = {}
+        for node, name in enumerate(names):
+            starts = [0] + [i + 1 for i, byte in enumerate(name) if byte == 32]
+            keys = [(name[s:], node, s) for s in starts if name[s:].startswith(prefix)]
+            if keys:
+                first_match[node] = min(keys)
+        expected = sorted(
+            first_match, key=lambda node: (-G.degree(node), first_match[node])
+        )[:10]
+
+        assert index.suggest(q) == expected, q
@@ -0,0 +1,77 @@
+from app.graph import _construct_csr_graph
+from app.trigrams import TrigramIndex, fuzzy_search, trigrams
+import pytest
+
+COMPANIES = [
+    (1, "Pacific Timber Limited", "Registered"),
+    (2, "Pacifc Timber Ltd", "Registered"),
+    (3, "Island Fisheries Limited", "Dissolved"),
+]
+INDIVIDUALS = [
+    (1, "Jean-Pierre Tari"),
+    (2, "Jean Pierre Tary"),
+    (3, "Mary Kalsakau"),
+    (4, "Marie Kalsakau"),
+    (5, "Tom Willie"),
+]
+
+
+def _codes(*words):
+    return {ord(a) << 42 | ord(b) << 21 | ord(c) for a, b, c in words}
+
+
+@pytest.fixture()
+def graph():
+    G = _construct_csr_graph(COMPANIES, INDIVIDUALS, [], [])
+    G.trigrams = TrigramIndex.build(G)
+    return G
+
+
+def _names(G, matches):
+    return [G.label(index) for index, _ in matches]
+
+
+def test_trigrams_of_padded_words():
+    assert trigrams("Tom") == _codes("  t", " to", "tom", "om ")
+    assert trigrams("TÓM, tom!") == trigrams("tom")
+    assert trigrams("") == set()
+
+
+def test_fuzzy_search_finds_misspellings(graph):
+    matches = fuzzy_search(graph, "Marie Kalsako")
+
+    assert _names(graph, matches["individual"]) == ["Marie Kalsakau", "Mary Kalsakau"]
+    assert matches["entity"] == []
+
+
+def test_fuzzy_search_scores_identical_names_one(graph):
+    ((index, score), *_) = fuzzy_search(graph, "jean pierre tari")["individual"]
+
+    assert graph.label(index) == "Jean-Pierre Tari"
+    assert score == pytest.approx(1.0)
+
+
+def test_fuzzy_search_ranks_by_similarity(graph):
+    matches = fuzzy_search(graph, "Pacific Timber Limited")["entity"]
+
+    assert _names(graph, matches) == ["Pacific Timber Limited", "Pacifc Timber Ltd"]
+    assert matches[0][1] > matches[1][1]
+
+
+def test_fuzzy_search_threshold_and_limit(graph):
+    assert fuzzy_search(graph, "xyz") == {"entity": [], "individual": []}
+    assert fuzzy_search(graph, "") == {"entity": [], "individual": []}
+    assert len(fuzzy_search(graph, "kalsakau", limit=1)["individual"]) == 1
+    assert fuzzy_search(graph, "Tom Willy", threshold=0.9)["individual"] == []
+
+
+def test_trigram_index_round_trips(graph, tmp_path):
+    path = tmp_path / "graph.db.trigrams"
+    graph.trigrams.write(path, "v1")
+
+    assert TrigramIndex.load(path, "v2") is None
+    loaded = TrigramIndex.load(path, "v1")
+    for q in ["Marie Kalsako", "pacific", "Tari"]:
+        expected = fuzzy_search(graph, q)
+        graph.trigrams = loaded
+        assert fuzzy_search(graph, q) == expected